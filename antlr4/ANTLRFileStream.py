@@ -42,13 +42,13 @@ from antlr4.ANTLRInputStream import ANTLRInputStream
 
 class ANTLRFileStream(ANTLRInputStream):
 
-    def __init__(self, fileName, encoding='ascii'):
+    def __init__(self, fileName, encoding='ascii', compact=False):
         self.fileName = fileName
         # read binary to avoid line ending conversion
         with open(fileName, 'rb') as file:
             bytes = file.read()
             data = codecs.decode(bytes, encoding)
-            super(type(self), self).__init__(data)
+            super(ANTLRFileStream, self).__init__(data, compact)
 
 
 class TestANTLRFileStream(unittest.TestCase):
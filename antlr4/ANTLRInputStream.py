@@ -28,28 +28,74 @@
 #   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 #   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # 
+import re
+import sys
 import unittest
+from array import array
+from bisect import bisect_left
 
+from antlr4._compat import array_frombytes
 from antlr4.Token import Token
 
 
 # 
 #  Vacuum all input from a string and then treat it like a buffer. 
 #
+#  By default the characters are kept in a list of ints. With
+#  {@code compact=True} they are kept in the narrowest array that fits
+#  them instead: a {@code bytearray} for Latin-1 text, else an unsigned
+#  16-bit or 32-bit {@code array}. That takes 1 to 4 bytes per character
+#  rather than the 8 bytes (plus an int object for non-Latin-1
+#  characters) of a list entry. {@link #LA} returns ints in both modes.
+#
+#  {@link #getLineAndColumn} finds the position of a character from an
+#  index of the newlines in the input, built the first time it is called.
+#  Lexers use it to compute token positions when they are not tracking
+#  them (see {@link Lexer#setLazyPositions}).
+#
 
 
 class ANTLRInputStream(object):
     
-    def __init__(self, data):
+    def __init__(self, data, compact=False):
         self.name = "<empty>"
         self.strdata = data
+        self.compact = compact
         self._loadString()
 
     def _loadString(self):    
         self._index = 0
-        self.data = [ord(c) for c in self.strdata]
+        self._newlines = None
+        if self.compact:
+            self.data = self._compactData(self.strdata)
+        else:
+            self.data = [ord(c) for c in self.strdata]
         self._size = len(self.data)
 
+    @staticmethod
+    def _compactData(strdata):
+        if isinstance(strdata, bytes):
+            # a Python 2 byte string holds a character per byte already
+            return bytearray(strdata)
+        try:
+            return bytearray(strdata, 'latin-1')
+        except UnicodeEncodeError:
+            pass
+        suffix = '-le' if sys.byteorder == 'little' else '-be'
+        try:
+            encoded = strdata.encode('utf-16' + suffix)
+            if len(encoded) == 2 * len(strdata):
+                codes = array('H')
+            else:
+                # some characters needed a surrogate pair
+                encoded = strdata.encode('utf-32' + suffix)
+                codes = array('I')
+        except UnicodeEncodeError:
+            # lone surrogates
+            return array('I', [ord(c) for c in strdata])
+        array_frombytes(codes, encoded)
+        return codes
+
     @property
     def index(self):
         return self._index
@@ -110,6 +156,24 @@ class ANTLRInputStream(object):
             return self.strdata[start:stop+1]
 
 
+    # Return the line (1..n) and column (0..n-1) of character {@code index},
+    # as a lexer tracking positions would compute them.
+    def getLineAndColumn(self, index):
+        if self._newlines is None:
+            self._newlines = self._newlineIndex()
+        newlines = bisect_left(self._newlines, index)
+        if newlines == 0:
+            return 1, index
+        return newlines + 1, index - self._newlines[newlines - 1] - 1
+
+    def _newlineIndex(self):
+        if len(self.strdata) == self._size:
+            # let the regular expression engine do the scan
+            return array('l', [m.start() for m in re.finditer(u"\n", self.strdata)])
+        # code points and characters don't line up
+        return array('l', [i for i, c in enumerate(self.data) if c == 10])
+
+
 class TestANTLRInputStream(unittest.TestCase):
     
     def testStream(self):
@@ -124,3 +188,24 @@ class TestANTLRInputStream(unittest.TestCase):
         self.assertEqual("bcd", stream.getText(1, 3))
         stream.reset()
         self.assertEqual(0, stream.index)
+
+    def testCompactStream(self):
+        for text, container in ((u"abc\xe9", bytearray), (u"ab\u4e2dc", array), (u"a\U0001F600c", array)):
+            stream = ANTLRInputStream(text, compact=True)
+            self.assertIsInstance(stream.data, container)
+            self.assertEqual([ord(c) for c in text], [stream.LA(i) for i in range(1, len(text) + 1)])
+            self.assertEqual(Token.EOF, stream.LA(len(text) + 1))
+            self.assertEqual(text[1:3], stream.getText(1, 2))
+
+    def testCompactByteString(self):
+        if bytes is str:
+            # Python 2 byte strings, which the list of ints accepts too
+            stream = ANTLRInputStream(b"ab\xe9c", compact=True)
+            self.assertIsInstance(stream.data, bytearray)
+            self.assertEqual([ord(c) for c in b"ab\xe9c"], [stream.LA(i) for i in range(1, 5)])
+            self.assertEqual(list(ANTLRInputStream(b"ab\xe9c").data), list(stream.data))
+
+    def testLineAndColumn(self):
+        stream = ANTLRInputStream(u"ab\n\ncd\ne")
+        self.assertEqual([(1, 0), (1, 2), (2, 0), (3, 0), (3, 2), (4, 0), (4, 1)],
+                         [stream.getLineAndColumn(i) for i in (0, 2, 3, 4, 6, 7, 8)])
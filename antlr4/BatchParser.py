@@ -0,0 +1,324 @@
+# 
+#  [The "BSD license"]
+#   Copyright (c) 2012 Terence Parr
+#   Copyright (c) 2012 Sam Harwell
+#   Copyright (c) 2014 Eric Vergnaud
+#   All rights reserved.
+# 
+#   Redistribution and use in source and binary forms, with or without
+#   modification, are permitted provided that the following conditions
+#   are met:
+# 
+#   1. Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+#   THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#   IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#   OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#   IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#   INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#   NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#   DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#   THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+#
+#  Parses many independent documents on a pool of worker processes.
+#
+#  <p>The GIL keeps threads from parsing in parallel, so this class
+#  hands documents to a {@code multiprocessing} pool instead. Each worker
+#  builds one lexer and one parser when it starts and reuses them for every
+#  document it gets, so the DFA cached in the generated classes'
+#  {@code decisionsToDFA} keeps growing across documents rather than being
+#  rebuilt for each one.</p>
+#
+#  <p>Parse trees refer to the parser and the token stream and are not
+#  worth sending back between processes, so each tree is passed to a
+#  {@code reducer(tree, parser)} in the worker, and its result is what the
+#  caller gets. The default reducer returns the LISP-style string of the
+#  tree. The lexer and parser classes, the reducer and its results must be
+#  picklable, i.e. defined at the top level of a module.</p>
+#
+#  <pre>
+#  with BatchParser(MyLexer, MyParser, "compilationUnit", reducer=countNodes) as batch:
+#      for fileName, count in batch.parseFiles(fileNames):
+#          ...
+#  </pre>
+#
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from antlr4.ANTLRFileStream import ANTLRFileStream
+from antlr4.ANTLRInputStream import ANTLRInputStream
+from antlr4.CommonTokenStream import CommonTokenStream
+from antlr4.Errors import UnsupportedOperationException
+
+
+def toStringTree(tree, parser):
+    return tree.toStringTree(recog=parser)
+
+
+# A reducer returning the tree serialized by {@link RuleContext#toBytes};
+#  the caller gets it back with {@link RuleContext#fromBytes}.
+def toBytes(tree, parser):
+    return tree.toBytes()
+
+
+class BatchParser(object):
+
+    #  {@code startRule} is the name of the parser rule to start with.
+    #  {@code processes} defaults to the number of CPUs. With
+    #  {@code ordered=False} results are returned as they complete rather
+    #  than in the order of the input. {@code chunksize} documents are sent
+    #  to a worker at a time. With {@code twoStage=True} documents are
+    #  parsed with {@link Parser#parseWithTwoStage}.
+    def __init__(self, lexerClass, parserClass, startRule, reducer=toStringTree, processes=None,
+                 ordered=True, chunksize=1, encoding='utf-8', twoStage=False):
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self._pool = multiprocessing.Pool(processes, _initWorker,
+                                          (lexerClass, parserClass, startRule, reducer, twoStage))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    # Parse the files in {@code fileNames}, yielding
+    #  {@code (fileName, result)} pairs. The files are read by the workers.
+    def parseFiles(self, fileNames):
+        return self._map((fileName, None, self.encoding) for fileName in fileNames)
+
+    # Parse the strings in {@code texts}, which is either a mapping from keys
+    #  to strings or a sequence of strings whose keys are their positions.
+    #  Yields {@code (key, result)} pairs.
+    def parseStrings(self, texts):
+        items = texts.items() if hasattr(texts, "items") else enumerate(texts)
+        return self._map((key, text, None) for key, text in items)
+
+    def _map(self, tasks):
+        map = self._pool.imap if self.ordered else self._pool.imap_unordered
+        return map(_parse, tasks, self.chunksize)
+
+    # Wait for the outstanding documents, then stop the workers.
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    # Stop the workers without waiting for outstanding documents.
+    def terminate(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+#
+#  Parses many independent documents on a pool of subinterpreters of the
+#  current process, each with its own GIL (PEP 684), using
+#  {@code concurrent.futures.InterpreterPoolExecutor} from Python 3.14;
+#  on earlier versions the constructor raises
+#  {@link UnsupportedOperationException}.
+#
+#  <p>Workers start faster than processes and take less memory, since they
+#  don't copy the parent process. The runtime is pure Python and keeps no
+#  state outside its modules, so every interpreter imports its own copy:
+#  {@code PredictionContext.EMPTY}, {@code ParseTreeWalker.DEFAULT},
+#  {@code CommonTokenFactory.DEFAULT} and the {@code decisionsToDFA} of the
+#  generated classes are per interpreter, and each worker builds its own
+#  DFA, as a process would. Load a DFA saved with
+#  {@link Recognizer#saveDFA} in a worker to start it warm.</p>
+#
+#  <p>Results cross interpreters as copies. The default reducer returns the
+#  tree serialized by {@link RuleContext#toBytes}, which
+#  {@link RuleContext#fromBytes} turns back into a tree. The arguments and
+#  the reducer have the same requirements as for {@link BatchParser}.</p>
+#
+class InterpreterBatchParser(BatchParser):
+
+    #  {@code interpreters} defaults to the number of CPUs; the other
+    #  arguments are those of {@link BatchParser}, whose
+    #  {@code chunksize} has no effect here.
+    def __init__(self, lexerClass, parserClass, startRule, reducer=toBytes, interpreters=None,
+                 ordered=True, chunksize=1, encoding='utf-8', twoStage=False):
+        try:
+            from concurrent.futures import InterpreterPoolExecutor
+        except ImportError:
+            raise UnsupportedOperationException("Parsing on a pool of interpreters requires Python 3.14 or later.")
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self._pool = InterpreterPoolExecutor(max_workers=interpreters, initializer=_initWorker,
+                                             initargs=(lexerClass, parserClass, startRule, reducer, twoStage))
+
+    def _map(self, tasks):
+        if self.ordered:
+            return self._pool.map(_parse, tasks)
+        from concurrent.futures import as_completed
+        futures = [ self._pool.submit(_parse, task) for task in tasks ]
+        return (future.result() for future in as_completed(futures))
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def terminate(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+# The lexer, parser and settings of the current worker process or
+# interpreter.
+_worker = None
+
+
+class _Worker(object):
+
+    def __init__(self, lexerClass, parserClass, startRule, reducer, twoStage):
+        self.lexer = lexerClass(ANTLRInputStream(u""))
+        self.parser = parserClass(CommonTokenStream(self.lexer))
+        self.startRule = startRule
+        self.reducer = reducer
+        self.twoStage = twoStage
+
+    def parse(self, input):
+        self.lexer.inputStream = input
+        self.parser.setTokenStream(CommonTokenStream(self.lexer))
+        if self.twoStage:
+            tree = self.parser.parseWithTwoStage(self.startRule)
+        else:
+            tree = getattr(self.parser, self.startRule)()
+        return self.reducer(tree, self.parser)
+
+
+def _initWorker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+
+def _parse(task):
+    key, text, encoding = task
+    if text is None:
+        input = ANTLRFileStream(key, encoding)
+    else:
+        input = ANTLRInputStream(text)
+    return key, _worker.parse(input)
+
+
+class TestBatchParser(unittest.TestCase):
+
+    # identifiers can't hold digits
+    TEXTS = [ u"x%s = %d; y;" % (u"abcdefghijklmnopqrst"[i], i) if i % 3 else u"z%s;" % u"abcdefghijklmnopqrst"[i]
+              for i in range(20) ]
+
+    def parseSerially(self, texts, reducer=toStringTree):
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        results = []
+        for text in texts:
+            parser = TParser(CommonTokenStream(TLexer(ANTLRInputStream(text))))
+            results.append(reducer(parser.prog(), parser))
+        return results
+
+    def batch(self, **kwargs):
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        return BatchParser(TLexer, TParser, "prog", processes=2, **kwargs)
+
+    def testOrdered(self):
+        expected = list(enumerate(self.parseSerially(self.TEXTS)))
+        for chunksize in (1, 3):
+            with self.batch(chunksize=chunksize) as batch:
+                self.assertEqual(expected, list(batch.parseStrings(self.TEXTS)))
+
+    def testUnordered(self):
+        expected = list(enumerate(self.parseSerially(self.TEXTS)))
+        with self.batch(ordered=False, chunksize=2) as batch:
+            self.assertEqual(expected, sorted(batch.parseStrings(self.TEXTS)))
+
+    def testTwoStage(self):
+        expected = list(enumerate(self.parseSerially(self.TEXTS)))
+        with self.batch(twoStage=True) as batch:
+            self.assertEqual(expected, list(batch.parseStrings(self.TEXTS)))
+
+    def testMappingAndReducer(self):
+        texts = dict((u"doc%d" % i, text) for i, text in enumerate(self.TEXTS))
+        expected = dict(zip(texts.keys(), self.parseSerially(texts.values(), toBytes)))
+        with self.batch(reducer=toBytes) as batch:
+            self.assertEqual(expected, dict(batch.parseStrings(texts)))
+
+    def testFiles(self):
+        directory = tempfile.mkdtemp()
+        try:
+            fileNames = []
+            for i, text in enumerate(self.TEXTS[:5]):
+                fileNames.append(os.path.join(directory, "doc%d.t" % i))
+                with open(fileNames[-1], "wb") as f:
+                    f.write(text.encode("utf-8"))
+            expected = list(zip(fileNames, self.parseSerially(self.TEXTS[:5])))
+            with self.batch() as batch:
+                self.assertEqual(expected, list(batch.parseFiles(fileNames)))
+        finally:
+            shutil.rmtree(directory)
+
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    InterpreterPoolExecutor = None
+
+requiresInterpreters = unittest.skipIf(InterpreterPoolExecutor is None, "requires Python 3.14 or later")
+
+
+class TestInterpreterBatchParser(TestBatchParser):
+
+    def batch(self, **kwargs):
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        kwargs.setdefault("reducer", toStringTree)
+        return InterpreterBatchParser(TLexer, TParser, "prog", interpreters=2, **kwargs)
+
+    @unittest.skipIf(InterpreterPoolExecutor is not None, "requires Python older than 3.14")
+    def testUnsupported(self):
+        self.assertRaises(UnsupportedOperationException, self.batch)
+
+    # chunksize has no effect, so every size gives the serial results in order
+    @requiresInterpreters
+    def testOrdered(self):
+        super(TestInterpreterBatchParser, self).testOrdered()
+
+    @requiresInterpreters
+    def testUnordered(self):
+        super(TestInterpreterBatchParser, self).testUnordered()
+
+    @requiresInterpreters
+    def testTwoStage(self):
+        super(TestInterpreterBatchParser, self).testTwoStage()
+
+    @requiresInterpreters
+    def testMappingAndReducer(self):
+        super(TestInterpreterBatchParser, self).testMappingAndReducer()
+
+    @requiresInterpreters
+    def testFiles(self):
+        super(TestInterpreterBatchParser, self).testFiles()
+
+    @requiresInterpreters
+    def testDefaultReducer(self):
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        expected = list(enumerate(self.parseSerially(self.TEXTS, toBytes)))
+        with InterpreterBatchParser(TLexer, TParser, "prog", interpreters=2) as batch:
+            self.assertEqual(expected, list(batch.parseStrings(self.TEXTS)))
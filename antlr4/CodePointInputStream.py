@@ -0,0 +1,122 @@
+# 
+#  [The "BSD license"]
+#   Copyright (c) 2012 Terence Parr
+#   Copyright (c) 2012 Sam Harwell
+#   Copyright (c) 2014 Eric Vergnaud
+#   All rights reserved.
+# 
+#   Redistribution and use in source and binary forms, with or without
+#   modification, are permitted provided that the following conditions
+#   are met:
+# 
+#   1. Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+#   THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#   IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#   OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#   IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#   INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#   NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#   DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#   THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+#
+#  An input stream whose symbols are Unicode code points, including those
+#  outside the Basic Multilingual Plane, rather than UTF-16 code units.
+#  Indexes, {@code LA} and {@code getText} all count code points.
+#
+#  On wide Python builds (including every Python 3) strings are already
+#  sequences of code points and this stream behaves like an
+#  {@link ANTLRInputStream}. On narrow Python 2 builds, surrogate pairs are
+#  combined into a single symbol.
+#
+#  To match supplementary characters against wildcards and negated sets,
+#  the lexer must also be switched to code point mode with
+#  {@link Lexer#setCodePointMode}.
+#
+
+import unittest
+from array import array
+
+from antlr4._compat import NARROW_BUILD, unichr
+from antlr4.ANTLRInputStream import ANTLRInputStream
+from antlr4.Token import Token
+
+
+class CodePointInputStream(ANTLRInputStream):
+
+    def _loadString(self):
+        if not NARROW_BUILD:
+            super(CodePointInputStream, self)._loadString()
+            return
+        self._index = 0
+        self._newlines = None
+        self.data = []
+        pending = 0
+        for c in self.strdata:
+            c = ord(c)
+            if 0xDC00 <= c <= 0xDFFF and pending:
+                self.data[-1] = 0x10000 + ((pending - 0xD800) << 10) + (c - 0xDC00)
+                pending = 0
+                continue
+            pending = c if 0xD800 <= c <= 0xDBFF else 0
+            self.data.append(c)
+        if self.compact:
+            self.data = array('I', self.data)
+        self._size = len(self.data)
+
+    def getText(self, start, stop):
+        if not NARROW_BUILD:
+            return super(CodePointInputStream, self).getText(start, stop)
+        if stop >= self._size:
+            stop = self._size-1
+        if start >= self._size:
+            return u""
+        else:
+            return u"".join(unichr(c) for c in self.data[start:stop+1])
+
+
+class TestCodePointInputStream(unittest.TestCase):
+
+    def testSupplementaryCharacters(self):
+        stream = CodePointInputStream(u"a\U0001F600b\U00010400")
+        self.assertEqual(4, stream.size)
+        self.assertEqual(ord("a"), stream.LA(1))
+        stream.consume()
+        self.assertEqual(0x1F600, stream.LA(1))
+        self.assertEqual(ord("b"), stream.LA(2))
+        self.assertEqual(0x10400, stream.LA(3))
+        self.assertEqual(u"\U0001F600b", stream.getText(1, 2))
+        self.assertEqual(u"\U00010400", stream.getText(3, 10))
+
+    def testNarrowBuild(self):
+        global NARROW_BUILD
+        narrowBuild = NARROW_BUILD
+        NARROW_BUILD = True
+        try:
+            # a surrogate pair, a lone high surrogate before a pair, and a
+            # lone low surrogate, as narrow builds store them
+            text = u"a\ud83d\ude00b\ud800\ud801\udc00\udc01"
+            for compact in (False, True):
+                stream = CodePointInputStream(text, compact=compact)
+                self.assertEqual(6, stream.size)
+                self.assertEqual([ ord(u"a"), 0x1F600, ord(u"b"), 0xD800, 0x10400, 0xDC01, Token.EOF ],
+                                 [ stream.LA(i) for i in range(1, 8) ])
+                stream.seek(3)
+                self.assertEqual(0xD800, stream.LA(1))
+                self.assertEqual(ord(u"b"), stream.LA(-1))
+                self.assertEqual(u"\U0001F600b", stream.getText(1, 2))
+                self.assertEqual(u"\ud800\U00010400\udc01", stream.getText(3, 10))
+                self.assertEqual(u"", stream.getText(6, 8))
+        finally:
+            NARROW_BUILD = narrowBuild
+
@@ -0,0 +1,319 @@
+#
+#  [The "BSD license"]
+#   Copyright (c) 2012 Terence Parr
+#   Copyright (c) 2012 Sam Harwell
+#   Copyright (c) 2014 Eric Vergnaud
+#   All rights reserved.
+#
+#   Redistribution and use in source and binary forms, with or without
+#   modification, are permitted provided that the following conditions
+#   are met:
+#
+#   1. Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+#   THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#   IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#   OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#   IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#   INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#   NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#   DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#   THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+#
+# A {@link CommonTokenStream} that keeps the fields of its tokens in
+# parallel {@code array} columns instead of a list of {@link CommonToken}
+# objects. A buffered token takes 24 bytes rather than the few hundred of a
+# token object and its attribute dictionary, and {@link #LA} is a lookup in
+# the column of token types.
+#
+# <p>
+# {@link #tokens} is a {@link TokenColumns}, which indexes like a list but
+# creates a {@link ColumnarToken} view each time it is indexed. Views
+# compare equal when they refer to the same token of the same stream, but
+# are not the same object. Setting a field of a view changes the buffered
+# token.</p>
+#
+# <p>
+# Text and sources are kept per token only for the tokens that need them:
+# tokens whose text was set (by an action or a token factory copying text)
+# or that came from another source than the first token.</p>
+#
+
+import unittest
+from array import array
+
+from antlr4._compat import py2_unicode_compat, text_type
+from antlr4.CommonTokenStream import CommonTokenStream
+from antlr4.Errors import IllegalStateException
+from antlr4.Token import CommonToken, Token
+
+
+# The tokens of a {@link ColumnarTokenStream}.
+class TokenColumns(object):
+
+    def __init__(self):
+        self.types = array('i')
+        self.channels = array('i')
+        self.starts = array('i')
+        self.stops = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        # the source of the first token, shared by most tokens
+        self.source = None
+        # index to source, for the other tokens
+        self.sources = dict()
+        # index to text, for tokens whose text was set
+        self.texts = dict()
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ColumnarToken(self, i) for i in range(*index.indices(len(self.types)))]
+        if index < 0:
+            index += len(self.types)
+        if index < 0 or index >= len(self.types):
+            raise IndexError("token index out of range")
+        return ColumnarToken(self, index)
+
+    def __iter__(self):
+        for i in range(len(self.types)):
+            yield ColumnarToken(self, i)
+
+    def append(self, token):
+        index = len(self.types)
+        self.types.append(token.type)
+        self.channels.append(token.channel)
+        self.starts.append(token.start)
+        self.stops.append(token.stop)
+        self.lines.append(token.line)
+        self.columns.append(token.column)
+        source = (token.getTokenSource(), token.getInputStream())
+        if index == 0:
+            self.source = source
+        elif source[0] is not self.source[0] or source[1] is not self.source[1]:
+            self.sources[index] = source
+        text = token._text if isinstance(token, CommonToken) else token.text
+        if text is not None:
+            self.texts[index] = text
+
+    def getSource(self, index):
+        return self.sources.get(index, self.source)
+
+
+# A token of a {@link TokenColumns}.
+@py2_unicode_compat
+class ColumnarToken(Token):
+
+    __slots__ = ('_tokens', 'tokenIndex')
+
+    def __init__(self, tokens, tokenIndex):
+        self._tokens = tokens
+        self.tokenIndex = tokenIndex
+
+    @property
+    def type(self):
+        return self._tokens.types[self.tokenIndex]
+
+    @type.setter
+    def type(self, type):
+        self._tokens.types[self.tokenIndex] = type
+
+    @property
+    def channel(self):
+        return self._tokens.channels[self.tokenIndex]
+
+    @channel.setter
+    def channel(self, channel):
+        self._tokens.channels[self.tokenIndex] = channel
+
+    @property
+    def start(self):
+        return self._tokens.starts[self.tokenIndex]
+
+    @start.setter
+    def start(self, start):
+        self._tokens.starts[self.tokenIndex] = start
+
+    @property
+    def stop(self):
+        return self._tokens.stops[self.tokenIndex]
+
+    @stop.setter
+    def stop(self, stop):
+        self._tokens.stops[self.tokenIndex] = stop
+
+    @property
+    def line(self):
+        return self._tokens.lines[self.tokenIndex]
+
+    @line.setter
+    def line(self, line):
+        self._tokens.lines[self.tokenIndex] = line
+
+    @property
+    def column(self):
+        return self._tokens.columns[self.tokenIndex]
+
+    @column.setter
+    def column(self, column):
+        self._tokens.columns[self.tokenIndex] = column
+
+    @property
+    def source(self):
+        return self._tokens.getSource(self.tokenIndex)
+
+    @property
+    def text(self):
+        text = self._tokens.texts.get(self.tokenIndex, None)
+        if text is not None:
+            return text
+        input = self.getInputStream()
+        if input is None:
+            return None
+        n = input.size
+        if self.start < n and self.stop < n:
+            return input.getText(self.start, self.stop)
+        else:
+            return u"<EOF>"
+
+    @text.setter
+    def text(self, text):
+        if text is None:
+            self._tokens.texts.pop(self.tokenIndex, None)
+        else:
+            self._tokens.texts[self.tokenIndex] = text
+
+    def getTokenSource(self):
+        return self.source[0]
+
+    def getInputStream(self):
+        return self.source[1]
+
+    # Return a {@link CommonToken} with the fields of this token.
+    def clone(self):
+        t = CommonToken(self.source, self.type, self.channel,
+                        self.start, self.stop, self._tokens.texts.get(self.tokenIndex, None))
+        t.tokenIndex = self.tokenIndex
+        t.line = self.line
+        t.column = self.column
+        return t
+
+    def __eq__(self, other):
+        return isinstance(other, ColumnarToken) and self._tokens is other._tokens \
+            and self.tokenIndex == other.tokenIndex
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._tokens), self.tokenIndex))
+
+    def __str__(self):
+        return text_type(self.clone())
+
+
+class ColumnarTokenStream(CommonTokenStream):
+
+    def __init__(self, lexer, channel=Token.DEFAULT_CHANNEL):
+        super(ColumnarTokenStream, self).__init__(lexer, channel)
+        self.tokens = TokenColumns()
+
+    def setTokenSource(self, tokenSource):
+        super(ColumnarTokenStream, self).setTokenSource(tokenSource)
+        self.tokens = TokenColumns()
+        self.fetchedEOF = False
+
+    # The following methods work on the columns directly rather than
+    # through views and {@code len(self.tokens)}, which both cost a call.
+
+    def consume(self):
+        types = self.tokens.types
+        # only the last buffered token can be EOF
+        if (self.index < 0 or self.index >= len(types) - 1) and self.LA(1) == Token.EOF:
+            raise IllegalStateException("cannot consume EOF")
+        if self.sync(self.index + 1):
+            self.index = self.adjustSeekIndex(self.index + 1)
+
+    def sync(self, i):
+        n = i - len(self.tokens.types) + 1
+        if n > 0:
+            return self.fetch(n) >= n
+        return True
+
+    def LA(self, i):
+        if i == 1 and self.index >= 0:
+            # LT(1) is always buffered once the stream is initialized
+            return self.tokens.types[self.index]
+        return self.LT(i).type
+
+    def LT(self, k):
+        if k == 1 and self.index >= 0:
+            return ColumnarToken(self.tokens, self.index)
+        return super(ColumnarTokenStream, self).LT(k)
+
+    def nextTokenOnChannel(self, i, channel):
+        self.sync(i)
+        tokens = self.tokens
+        if i>=len(tokens.types):
+            return -1
+        while tokens.channels[i]!=self.channel:
+            if tokens.types[i]==Token.EOF:
+                return -1
+            i += 1
+            self.sync(i)
+        return i
+
+    def previousTokenOnChannel(self, i, channel):
+        channels = self.tokens.channels
+        while i>=0 and channels[i]!=channel:
+            i -= 1
+        return i
+
+
+class TestColumnarTokenStream(unittest.TestCase):
+
+    class ListTokenSource(object):
+
+        def __init__(self, types):
+            self.tokens = [CommonToken(type=t, channel=Token.HIDDEN_CHANNEL if t==99 else Token.DEFAULT_CHANNEL,
+                                       start=i, stop=i, text=None if t==2 else str(t)) for i, t in enumerate(types)]
+            self.tokens.append(CommonToken(type=Token.EOF, start=len(types), stop=len(types)-1))
+
+        def nextToken(self):
+            return self.tokens.pop(0) if len(self.tokens) > 1 else self.tokens[0]
+
+    def testStream(self):
+        stream = ColumnarTokenStream(self.ListTokenSource([1, 99, 2, 3, 99, 99, 4]))
+        self.assertEqual([1, 2, 3, 4, Token.EOF], [stream.LA(i) for i in range(1, 6)])
+        stream.consume()
+        self.assertEqual(2, stream.index)
+        self.assertEqual(1, stream.LT(-1).type)
+        self.assertEqual(3, stream.LT(2).type)
+        self.assertEqual(stream.LT(1), stream.get(2))
+        self.assertNotEqual(stream.LT(1), stream.LT(2))
+        stream.fill()
+        self.assertEqual(8, len(stream.tokens))
+        self.assertEqual([u"1", u"99", u"3"], [t.text for t in stream.tokens[:4] if t.type != 2])
+        self.assertEqual(None, stream.get(2).text)
+        self.assertEqual([4, 5], [t.tokenIndex for t in stream.getHiddenTokensToLeft(6)])
+        token = stream.get(3)
+        token.text = u"three"
+        self.assertEqual(u"1", stream.getText((0, 0)))
+        self.assertEqual(u"three", stream.get(3).text)
+        self.assertEqual((3, 3, 3, 3), (token.type, token.start, token.stop, token.tokenIndex))
+        self.assertEqual(5, stream.getNumberOfOnChannelTokens())
+        stream.seek(6)
+        self.assertEqual(4, stream.LA(1))
+        self.assertEqual(3, stream.LA(-1))
@@ -33,7 +33,7 @@
 # This default implementation of {@link TokenFactory} creates
 # {@link CommonToken} objects.
 #
-from antlr4.Token import CommonToken
+from antlr4.Token import CommonToken, LazyPositionToken
 
 
 class TokenFactory(object):
@@ -67,10 +67,15 @@ class CommonTokenFactory(TokenFactory):
         #
         self.copyText = copyText
 
+    # A {@code line} of {@code None} creates a {@link LazyPositionToken},
+    # which computes its line and column when they are first read.
     def create(self, source, type, text, channel, start, stop, line, column):
-        t = CommonToken(source, type, channel, start, stop)
-        t.line = line
-        t.column = column
+        if line is None:
+            t = LazyPositionToken(source, type, channel, start, stop)
+        else:
+            t = CommonToken(source, type, channel, start, stop)
+            t.line = line
+            t.column = column
         if text is not None:
             t.text = text
         elif self.copyText and source[1] is not None:
@@ -33,9 +33,14 @@
 #  uses simplified match() and error recovery mechanisms in the interest
 #  of speed.
 #/
+import unittest
+from array import array
+
+from antlr4._compat import perf_counter, text_type
 from antlr4._java import StringBuilder
 from antlr4.CommonTokenFactory import CommonTokenFactory
-from antlr4.Errors import IllegalStateException, LexerNoViableAltException
+from antlr4.Errors import (IllegalStateException, LexerNoViableAltException,
+                           UnsupportedOperationException)
 from antlr4.Recognizer import Recognizer
 from antlr4.Token import Token
 
@@ -135,31 +140,8 @@ class Lexer(Recognizer, TokenSource):
                 if self._hitEOF:
                     self.emitEOF()
                     return self._token
-                self._token = None
-                self._channel = Token.DEFAULT_CHANNEL
-                self._tokenStartCharIndex = self._input.index
-                self._tokenStartColumn = self._interp.column
-                self._tokenStartLine = self._interp.line
-                self._text = None
-                continueOuter = False
-                while True:
-                    self._type = Token.INVALID_TYPE
-                    ttype = self.SKIP
-                    try:
-                        ttype = self._interp.match(self._input, self._mode)
-                    except LexerNoViableAltException as e:
-                        self.notifyListeners(e)		# report error
-                        self.recover(e)
-                    if self._input.LA(1)==Token.EOF:
-                        self._hitEOF = True
-                    if self._type == Token.INVALID_TYPE:
-                        self._type = ttype
-                    if self._type == self.SKIP:
-                        continueOuter = True
-                        break
-                    if self._type!=self.MORE:
-                        break
-                if continueOuter:
+                self.matchToken()
+                if self._type == self.SKIP:
                     continue
                 if self._token is None:
                     self.emit()
@@ -169,6 +151,33 @@ class Lexer(Recognizer, TokenSource):
             # unbuffered char stream will keep buffering
             self._input.release(tokenStartMarker)
 
+    # Match the next token, running its actions and the rules of any
+    #  {@link #more} before it, without emitting it. Afterwards
+    #  {@link #_type} is the token type, or {@link #SKIP}, and
+    #  {@link #_token} is the token an action emitted, if any.
+    #/
+    def matchToken(self):
+        self._token = None
+        self._channel = Token.DEFAULT_CHANNEL
+        self._tokenStartCharIndex = self._input.index
+        self._tokenStartColumn = self._interp.column
+        self._tokenStartLine = self._interp.line
+        self._text = None
+        while True:
+            self._type = Token.INVALID_TYPE
+            ttype = self.SKIP
+            try:
+                ttype = self._interp.match(self._input, self._mode)
+            except LexerNoViableAltException as e:
+                self.notifyListeners(e)		# report error
+                self.recover(e)
+            if self._input.LA(1)==Token.EOF:
+                self._hitEOF = True
+            if self._type == Token.INVALID_TYPE:
+                self._type = ttype
+            if self._type!=self.MORE:
+                return
+
     # Instruct the lexer to skip creating a token for current lexer rule
     #  and look for another token.  nextToken() knows to keep looking when
     #  a lexer rule finishes with token set to SKIP_TOKEN.  Recall that
@@ -230,8 +239,13 @@ class Lexer(Recognizer, TokenSource):
     #  custom Token objects or provide a new factory.
     #/
     def emit(self):
+        if self._interp.trackPositions:
+            line, column = self._tokenStartLine, self._tokenStartColumn
+        else:
+            # the token computes them if asked
+            line, column = None, None
         t = self._factory.create(self._tokenFactorySourcePair, self._type, self._text, self._channel, self._tokenStartCharIndex,
-                                 self.getCharIndex()-1, self._tokenStartLine, self._tokenStartColumn)
+                                 self.getCharIndex()-1, line, column)
         self.emitToken(t)
         return t
 
@@ -257,6 +271,8 @@ class Lexer(Recognizer, TokenSource):
 
     @property
     def line(self):
+        if not self._interp.trackPositions:
+            return self._input.getLineAndColumn(self._input.index)[0]
         return self._interp.line
 
     @line.setter
@@ -265,6 +281,8 @@ class Lexer(Recognizer, TokenSource):
 
     @property
     def column(self):
+        if not self._interp.trackPositions:
+            return self._input.getLineAndColumn(self._input.index)[1]
         return self._interp.column
 
     @column.setter
@@ -301,13 +319,148 @@ class Lexer(Recognizer, TokenSource):
             t = self.nextToken()
         return tokens
 
+    # Lex the rest of the input without creating token objects, yielding
+    #  {@code (type, start, stop, channel)} for each token, EOF excluded.
+    #  Actions run as usual; a token emitted by an action is reported by its
+    #  fields, and text set with {@link #text} is ignored.
+    #/
+    def iterTokens(self):
+        if self._input is None:
+            raise IllegalStateException("iterTokens requires a non-null input stream.")
+        input = self._input
+        while not self._hitEOF:
+            tokenStartMarker = input.mark()
+            try:
+                self.matchToken()
+            finally:
+                input.release(tokenStartMarker)
+            token = self._token
+            if token is not None:
+                if token.type == Token.EOF:
+                    return
+                yield (token.type, token.start, token.stop, token.channel)
+            elif self._type == Token.EOF:
+                return
+            elif self._type != self.SKIP:
+                yield (self._type, self._tokenStartCharIndex, input.index - 1, self._channel)
+
+    # Lex the rest of the input like {@link #iterTokens}, returning the token
+    #  types, start and stop indexes and channels as four arrays of ints.
+    #/
+    def tokenizeArrays(self):
+        types = array('i')
+        starts = array('i')
+        stops = array('i')
+        channels = array('i')
+        for type, start, stop, channel in self.iterTokens():
+            types.append(type)
+            starts.append(start)
+            stops.append(stop)
+            channels.append(channel)
+        return types, starts, stops, channels
+
     def notifyListeners(self, e):
         start = self._tokenStartCharIndex
         stop = self._input.index
         text = self._input.getText(start, stop)
         msg = "token recognition error at: '" + self.getErrorDisplay(text) + "'"
+        if self._interp.trackPositions:
+            line, column = self._tokenStartLine, self._tokenStartColumn
+        else:
+            line, column = self._input.getLineAndColumn(start)
         listener = self.getErrorListenerDispatch()
-        listener.syntaxError(self, None, self._tokenStartLine, self._tokenStartColumn, msg, e)
+        listener.syntaxError(self, None, line, column, msg, e)
+
+    # Stop tracking the line and column of every character consumed, and
+    # have tokens compute theirs from their start index when first asked,
+    # with the {@code getLineAndColumn} of the input stream (see
+    # {@link ANTLRInputStream}). Switch before lexing; in this mode setting
+    # {@link #line} or {@link #column} from an action has no effect.
+    def setLazyPositions(self, lazyPositions):
+        if lazyPositions and not hasattr(self._input, "getLineAndColumn"):
+            raise UnsupportedOperationException("input stream cannot compute line and column")
+        self._interp.trackPositions = not lazyPositions
+
+    # In frozen DFA mode, tokens are matched by scanning flat tables built
+    # from the DFA, which is much faster once the DFA has seen most of the
+    # input's character patterns; tokens the tables can't match, errors and
+    # the end of the input take the usual path. Only streams that are
+    # {@link ANTLRInputStream}s are scanned this way.
+    def setFrozenDFA(self, frozenDFA):
+        self._interp.frozenDFA = frozenDFA
+
+    # Build the DFA of every mode up front (see
+    # {@link LexerATNSimulator#buildDFA}), so lexing doesn't slow down the
+    # first time each state meets a new kind of character. Call it at
+    # startup, or once offline followed by {@link #saveDFA} and have
+    # production processes {@link #loadDFA} the result.
+    #
+    # @return a dictionary from mode name to a tuple of the number of DFA
+    # states and the seconds it took, or {@code None} for modes with
+    # predicates or position-dependent actions, which are left to be built
+    # as usual
+    def buildDFA(self):
+        modeNames = getattr(self, "modeNames", None)
+        report = dict()
+        for mode in range(len(self._interp.atn.modeToStartState)):
+            name = modeNames[mode] if modeNames is not None and mode < len(modeNames) else text_type(mode)
+            start = perf_counter()
+            states = self._interp.buildDFA(mode)
+            report[name] = None if states is None else (states, perf_counter() - start)
+        return report
+
+    # Compiled DFA mode is frozen DFA mode where, once the tables of a mode
+    # have matched a thousand tokens without being rebuilt, they are turned
+    # into a generated Python function with the character tests of each
+    # state inlined (see {@link LexerDFACompiler}). It pays off for long
+    # inputs; the compiled functions are kept in memory, or on disk when
+    # {@link LexerDFACompiler#DEFAULT} has a directory.
+    def setCompiledDFA(self, compiledDFA):
+        self._interp.frozenDFA = compiledDFA
+        self._interp.compiledDFA = compiledDFA
+
+    # In code point mode, wildcards and negated sets match any Unicode code
+    # point up to U+10FFFF instead of stopping at U+FFFE. Characters outside
+    # the Basic Multilingual Plane are single symbols on all wide Python
+    # builds; on narrow builds read the input with a
+    # {@link CodePointInputStream}.
+    def setCodePointMode(self, codePointMode):
+        if codePointMode:
+            self._interp.maxCharValue = self._interp.MAX_CODE_POINT
+        else:
+            self._interp.maxCharValue = self._interp.MAX_CHAR_VALUE
+
+    # Switch this lexer to a {@link ProfilingLexerATNSimulator}, which
+    # records statistics about the tokens matched in every mode and of every
+    # type, or back to a plain {@link LexerATNSimulator}. Both share the
+    # lexer's DFA, and the position and options of the simulator are kept.
+    # Frozen and compiled DFA mode are suspended while profiling, so a lexer
+    # using them runs another code path in production than the one
+    # profiled: the statistics still tell how the DFA grows, but the times
+    # are those of the DFA and ATN path, not of the tables.
+    #
+    # @see #getLexInfo
+    def setProfile(self, profile):
+        from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+        from antlr4.atn.ProfilingLexerATNSimulator import ProfilingLexerATNSimulator
+        interp = self._interp
+        if profile:
+            if not isinstance(interp, ProfilingLexerATNSimulator):
+                self._interp = ProfilingLexerATNSimulator(self)
+        elif isinstance(interp, ProfilingLexerATNSimulator):
+            self._interp = LexerATNSimulator(self, interp.atn, interp.decisionToDFA, interp.sharedContextCache)
+            self._interp.copyState(interp)
+            self._interp.copySettings(interp)
+
+    # Return the {@link LexInfo} of the profiling gathered since
+    # {@link #setProfile} was called, or {@code None} if this lexer is not
+    # profiling.
+    def getLexInfo(self):
+        from antlr4.atn.LexInfo import LexInfo
+        from antlr4.atn.ProfilingLexerATNSimulator import ProfilingLexerATNSimulator
+        if isinstance(self._interp, ProfilingLexerATNSimulator):
+            return LexInfo(self._interp)
+        return None
 
     def getErrorDisplay(self, s):
         buf = StringBuilder()
@@ -343,3 +496,148 @@ class Lexer(Recognizer, TokenSource):
             else:
                 # TODO: Do we lose character or line position information?
                 self._input.consume()
+
+
+class TestLexer(unittest.TestCase):
+
+    INPUTS = [ u"x = 1; y;\nz = 22;", u"", u"  \n ", u"x # 1;\n\u00e9t\u00e9 ?= 2", u"x = 1" ]
+
+    def lexer(self, text, lexerClass=None, streamClass=None):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4._testgrammar.TLexer import TLexer
+        lexer = (lexerClass or TLexer)((streamClass or ANTLRInputStream)(text))
+        lexer._listeners = []
+        return lexer
+
+    def fields(self, tokens):
+        return [ (t.type, t.start, t.stop, t.channel) for t in tokens ]
+
+    def testIterTokens(self):
+        from antlr4._testgrammar.TLexer import TLexer
+        class MoreLexer(TLexer):
+            # whitespace becomes part of the next token
+            def skip(self):
+                self.more()
+        for lexerClass in (None, MoreLexer):
+            for text in self.INPUTS:
+                expected = self.fields(self.lexer(text, lexerClass).getAllTokens())
+                self.assertEqual(expected, list(self.lexer(text, lexerClass).iterTokens()))
+                arrays = self.lexer(text, lexerClass).tokenizeArrays()
+                self.assertEqual(expected, list(zip(*[ list(a) for a in arrays ])))
+        # picks up where nextToken left off
+        lexer = self.lexer(self.INPUTS[0])
+        first = lexer.nextToken()
+        self.assertEqual(self.fields(self.lexer(self.INPUTS[0]).getAllTokens()),
+                         self.fields([first]) + list(lexer.iterTokens()))
+
+    def testSparseEdges(self):
+        from antlr4.atn.ATNSimulator import ATNSimulator
+        from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TLexer import TLexer
+        class FreshLexer(TLexer):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+        dfa = FreshLexer.decisionsToDFA[0]
+        def edges():
+            return sorted((s.stateNumber, t) for s in dfa.states
+                          for t in list((s.sparseEdges or {}).keys())
+                          + [ i for i, target in enumerate(s.edges or []) if target is not None ])
+        # '\u00b0' is no letter, like '#'
+        text = u"\u00e9t\u00e9 = 1; \u4e2d\u6587;\n\u00b0 x # 2;"
+        expected = self.fields(self.lexer(text, FreshLexer).getAllTokens())
+        states, before = len(dfa.states), edges()
+        offset = LexerATNSimulator.MIN_DFA_EDGE
+        for c in u"\u00e9\u4e2d\u00b0":
+            self.assertIn(ord(c) - offset, dfa.s0.sparseEdges)
+        self.assertIs(ATNSimulator.ERROR, dfa.s0.sparseEdges[ord(u"\u00b0") - offset])
+        self.assertIs(ATNSimulator.ERROR, dfa.s0.edges[ord(u"#") - offset])
+        # the second pass follows the edges of the first, and only the end of
+        # the input takes the ATN
+        lexer = self.lexer(text, FreshLexer)
+        lexer.setProfile(True)
+        self.assertEqual(expected, self.fields(lexer.getAllTokens()))
+        self.assertEqual((states, before), (len(dfa.states), edges()))
+        mode = lexer.getLexInfo().getModeInfo()[0]
+        self.assertEqual((1, 0), (mode.ATNTransitions, mode.ATNStartStates))
+
+    def testLazyPositions(self):
+        import importlib
+        codePointInputStream = importlib.import_module("antlr4.CodePointInputStream")
+        narrowBuild = codePointInputStream.NARROW_BUILD
+        try:
+            for narrow in (False, True):
+                # the code point stream of a narrow build, which combines
+                # surrogate pairs itself
+                codePointInputStream.NARROW_BUILD = narrow
+                self.checkLazyPositions(codePointInputStream.CodePointInputStream)
+        finally:
+            codePointInputStream.NARROW_BUILD = narrowBuild
+        self.checkLazyPositions(None)
+
+    def checkLazyPositions(self, streamClass):
+        for text in (u"x = 1;\ny;\n\nz = 22;\n", u"x = 1;\r\ny;\r\n\r\n  z = 22;",
+                     u"x;\r\ny = 1;\n\r\nz;\r", u"x # 1;\r\n?", u"x;\n\U0001F600 y = 1;\n"):
+            positions = []
+            for lazy in (False, True):
+                lexer = self.lexer(text, streamClass=streamClass)
+                lexer.setLazyPositions(lazy)
+                tokens = [ lexer.nextToken() ]
+                while tokens[-1].type != Token.EOF:
+                    tokens.append(lexer.nextToken())
+                if lazy:
+                    from antlr4.Token import LazyPositionToken
+                    self.assertIsInstance(tokens[0], LazyPositionToken)
+                    self.assertIsNone(tokens[0]._line)
+                positions.append([ (t.type, t.start, t.line, t.column) for t in tokens ])
+            self.assertEqual(positions[0], positions[1])
+
+    def testFrozenDFA(self):
+        from antlr4.dfa.FrozenLexerDFA import FrozenLexerDFA
+        from antlr4._testgrammar.TLexer import TLexer
+        text = u"\n".join(u"x%d = %d; y%d;" % (i, i * 7, i) for i in range(300)) + u" \u00e9t\u00e9 = 1; x # 2;"
+        expected = self.fields(self.lexer(text).getAllTokens())
+        compileMatches = FrozenLexerDFA.COMPILE_MATCHES
+        FrozenLexerDFA.COMPILE_MATCHES = 100
+        try:
+            for compiled in (False, True):
+                TLexer.decisionsToDFA[0].frozen = None
+                lexer = self.lexer(text)
+                if compiled:
+                    lexer.setCompiledDFA(True)
+                else:
+                    lexer.setFrozenDFA(True)
+                self.assertEqual(expected, self.fields(lexer.getAllTokens()))
+                frozen = TLexer.decisionsToDFA[0].frozen
+                self.assertEqual(compiled, frozen.scanner is not None)
+                states = len(frozen.predictions)
+                self.assertEqual(states, len(frozen.executors))
+                self.assertEqual(states * frozen.width, len(frozen.transitions))
+                accepting = [ p is not None for p in frozen.predictions ]
+                self.assertEqual(frozen.acceptLimit // frozen.width, accepting.count(True))
+                self.assertEqual(sorted(accepting, reverse=True), accepting)
+        finally:
+            FrozenLexerDFA.COMPILE_MATCHES = compileMatches
+            TLexer.decisionsToDFA[0].frozen = None
+
+    def testBuildDFA(self):
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TLexer import TLexer
+        def freshLexer():
+            # a lexer class with DFAs of its own
+            class FreshLexer(TLexer):
+                decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+            return FreshLexer
+        built = freshLexer()
+        report = self.lexer(u"", built).buildDFA()
+        self.assertEqual([u"DEFAULT_MODE"], list(report.keys()))
+        states, seconds = report[u"DEFAULT_MODE"]
+        self.assertEqual(len(built.decisionsToDFA[0].states), states)
+        self.assertTrue(seconds >= 0)
+        onDemand = freshLexer()
+        for text in self.INPUTS + [ u"abc = 123;\r\n\tdef;" ]:
+            expected = self.fields(self.lexer(text, onDemand).getAllTokens())
+            self.assertEqual(expected, self.fields(self.lexer(text, built).getAllTokens()))
+            # every ASCII character already has its edge
+            if all(ord(c) < 128 for c in text):
+                self.assertEqual(states, len(built.decisionsToDFA[0].states))
+
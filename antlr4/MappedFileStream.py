@@ -0,0 +1,289 @@
+# 
+#  [The "BSD license"]
+#   Copyright (c) 2012 Terence Parr
+#   Copyright (c) 2012 Sam Harwell
+#   Copyright (c) 2014 Eric Vergnaud
+#   All rights reserved.
+# 
+#   Redistribution and use in source and binary forms, with or without
+#   modification, are permitted provided that the following conditions
+#   are met:
+# 
+#   1. Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+#   THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#   IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#   OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#   IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#   INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#   NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#   DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#   THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+#
+#  A character stream over a memory-mapped file. Unlike
+#  {@link ANTLRFileStream}, the file is neither read nor decoded up front,
+#  so the memory needed to lex a file is bounded by the page cache rather
+#  than the heap.
+#
+#  <p>For {@code 'ascii'} and {@code 'latin-1'} every byte is a character
+#  and the stream indexes the mapped bytes directly (on Python 3; Python 2
+#  uses the general scheme below). Bytes above 127 in an {@code 'ascii'}
+#  file are returned as their Latin-1 characters by {@link #LA} and only
+#  rejected when {@link #getText} decodes them.</p>
+#
+#  <p>Other encodings are decoded a page ({@link #PAGE_SIZE} bytes) at a
+#  time, when the lexer first reaches it, keeping the most recently used
+#  {@link #CACHED_PAGES} decoded pages. The stream records where each page
+#  starts as it goes, so seeking back to any earlier character is cheap.
+#  {@link #size} has to decode the rest of the file the first time it is
+#  called.</p>
+#
+#  <p>Call {@link #close} to unmap the file when the stream is no longer
+#  used.</p>
+#
+
+import codecs
+import mmap
+import os
+import sys
+import tempfile
+import unittest
+from bisect import bisect_right
+
+from antlr4._compat import PY2
+from antlr4.Token import Token
+
+
+class MappedFileStream(object):
+
+    PAGE_SIZE = 1 << 16
+    CACHED_PAGES = 4
+
+    def __init__(self, fileName, encoding='ascii'):
+        self.fileName = fileName
+        self.name = fileName
+        self.encoding = codecs.lookup(encoding).name
+        self._index = 0
+        with open(fileName, 'rb') as file:
+            if os.fstat(file.fileno()).st_size > 0:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._map = None
+        self._bytes = b"" if self._map is None else self._map
+        self._direct = not PY2 and self.encoding in ('ascii', 'latin-1', 'iso8859-1')
+        if self._direct:
+            self._size = len(self._bytes)
+        else:
+            self._codec, start = self._byteOrder(self.encoding, self._bytes[:4])
+            # per page: start offset in bytes and in characters, and the state
+            # of the decoder at its start
+            self._decoder = codecs.getincrementaldecoder(self._codec)()
+            self._byteStarts = [ start ]
+            self._charStarts = [ 0 ]
+            self._states = [ self._decoder.getstate()[1] ]
+            self._pages = dict()
+            self._size = None
+            # the page containing the current lookahead
+            self._pageStart = 0
+            self._pageStop = 0
+            self._pageText = u""
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def size(self):
+        if self._size is None:
+            while self._size is None:
+                self._indexNextPage()
+        return self._size
+
+    def reset(self):
+        self._index = 0
+
+    def consume(self):
+        if self.LA(1) == Token.EOF:
+            raise Exception("cannot consume EOF")
+        self._index += 1
+
+    def LA(self, offset):
+        if offset==0:
+            return 0 # undefined
+        if offset<0:
+            offset += 1 # e.g., translate LA(-1) to use offset=0
+        pos = self._index + offset - 1
+        if self._direct:
+            if pos < 0 or pos >= self._size:
+                return Token.EOF
+            return self._bytes[pos]
+        if self._pageStart <= pos < self._pageStop:
+            return ord(self._pageText[pos - self._pageStart])
+        if pos < 0 or not self._loadPage(pos):
+            return Token.EOF
+        return ord(self._pageText[pos - self._pageStart])
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+    # mark/release do nothing; the whole file stays mapped
+    def mark(self):
+        return -1
+
+    def release(self, marker):
+        pass
+
+    def seek(self, _index):
+        if _index<=self._index:
+            self._index = _index
+            return
+        # seek forward, but not past the end
+        if self._direct:
+            self._index = min(_index, self._size)
+        elif self._loadPage(_index):
+            self._index = _index
+        else:
+            self._index = self._size
+
+    def getText(self, start, stop):
+        if self._direct:
+            if stop >= self._size:
+                stop = self._size-1
+            if start >= self._size:
+                return u""
+            return self._bytes[start:stop+1].decode(self.encoding)
+        parts = []
+        pos = start
+        while pos <= stop and self._loadPage(pos):
+            end = min(stop + 1, self._pageStop)
+            parts.append(self._pageText[pos - self._pageStart:end - self._pageStart])
+            pos = end
+        return u"".join(parts)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._bytes = b""
+
+    # The UTF-16 and UTF-32 decoders of Python 2 don't keep the byte order in
+    # their state, so pages after the first could not be decoded. Take the
+    # byte order from the BOM instead, and return the codec for it and the
+    # offset of the first character.
+    @staticmethod
+    def _byteOrder(encoding, head):
+        if encoding == 'utf-16':
+            boms = ((codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be'))
+        elif encoding == 'utf-32':
+            boms = ((codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be'))
+        else:
+            return encoding, 0
+        for bom, codec in boms:
+            if head.startswith(bom):
+                return codec, len(bom)
+        # no BOM: native byte order, like the decoders themselves
+        return encoding + ('-le' if sys.byteorder == 'little' else '-be'), 0
+
+    # Make the page containing character {@code pos} the current page.
+    #
+    # @return {@code false} if {@code pos} is past the end of the file
+    def _loadPage(self, pos):
+        while self._size is None and pos >= self._charStarts[-1]:
+            self._indexNextPage()
+        if self._size is not None and pos >= self._size:
+            return False
+        page = bisect_right(self._charStarts, pos) - 1
+        text = self._pages.get(page, None)
+        if text is None:
+            decoder = codecs.getincrementaldecoder(self._codec)()
+            decoder.setstate((b"", self._states[page]))
+            data = self._bytes[self._byteStarts[page]:self._byteStarts[page + 1]]
+            text = decoder.decode(data, True)
+            self._cachePage(page, text)
+        self._pageStart = self._charStarts[page]
+        self._pageStop = self._pageStart + len(text)
+        self._pageText = text
+        return True
+
+    # Decode the page following the last known one, recording where the
+    # next one starts.
+    def _indexNextPage(self):
+        start = self._byteStarts[-1]
+        stop = start
+        text = u""
+        # a page holds at least one character
+        while len(text) == 0 and stop < len(self._bytes):
+            data = self._bytes[stop:stop + self.PAGE_SIZE]
+            stop += len(data)
+            text = self._decoder.decode(data, stop >= len(self._bytes))
+        if len(text) == 0:
+            self._size = self._charStarts[-1]
+            return
+        pending, state = self._decoder.getstate()
+        # the next page starts with the pending bytes
+        self._decoder.setstate((b"", state))
+        self._cachePage(len(self._charStarts) - 1, text)
+        self._byteStarts.append(stop - len(pending))
+        self._charStarts.append(self._charStarts[-1] + len(text))
+        self._states.append(state)
+        if stop >= len(self._bytes):
+            self._size = self._charStarts[-1]
+
+    def _cachePage(self, page, text):
+        if len(self._pages) >= self.CACHED_PAGES:
+            # the lexer moves forward, so drop the page furthest from here
+            del self._pages[max(self._pages, key=lambda p: abs(p - page))]
+        self._pages[page] = text
+
+
+class TestMappedFileStream(unittest.TestCase):
+
+    def checkStream(self, text, encoding, pageSize):
+        fd, fileName = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(text.encode(encoding))
+            stream = MappedFileStream(fileName, encoding)
+            stream.PAGE_SIZE = pageSize
+            for i in range(len(text)):
+                self.assertEqual(ord(text[i]), stream.LA(1))
+                stream.consume()
+            self.assertEqual(Token.EOF, stream.LA(1))
+            self.assertEqual(len(text), stream.size)
+            stream.seek(1)
+            self.assertEqual(ord(text[1]), stream.LA(1))
+            self.assertEqual(text[1:-1], stream.getText(1, len(text) - 2))
+            self.assertEqual(text, stream.getText(0, len(text) + 5))
+            stream.close()
+        finally:
+            os.remove(fileName)
+
+    def testSingleByte(self):
+        self.checkStream(u"abc = 1;\r\nxyz", 'ascii', 4)
+
+    def testMultiByte(self):
+        self.checkStream(u"h\xe9llo \u4e16\u754c \U0001F600 end", 'utf-8', 3)
+
+    def testStatefulDecoder(self):
+        self.checkStream(u"h\xe9llo \u4e16\u754c end", 'utf-16', 5)
+
+    def testEmptyFile(self):
+        fd, fileName = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            stream = MappedFileStream(fileName, 'utf-8')
+            self.assertEqual(Token.EOF, stream.LA(1))
+            self.assertEqual(0, stream.size)
+            self.assertEqual(u"", stream.getText(0, 10))
+        finally:
+            os.remove(fileName)
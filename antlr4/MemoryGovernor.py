@@ -0,0 +1,319 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Keeps the caches that prediction grows, the states of the shared
+# {@link DFA}s and their {@link PredictionContextCache}, within a budget.
+#
+# <p>A long running process that parses varied or hostile input builds DFA
+# states and prediction contexts for every path prediction has taken, and
+# never drops them. Register its recognizers with a governor and call
+# {@link #enforce} between parses: when the DFAs or the contexts are over
+# budget, it first compacts the configurations of the parser DFA states
+# (see {@link DFA#compact}), then clears the DFAs of the decisions and lexer
+# modes that have gone unused longest, and ages the context caches, which
+# drops the contexts unused since the previous call. Prediction rebuilds
+# what it needs again, so the decisions every parse goes through stay
+# warm.</p>
+#
+# <pre>
+# governor = MemoryGovernor(maxStates=200000, maxBytes=256 * 1024 * 1024)
+# for text in texts:
+#     lexer = governor.register(MyLexer(InputStream(text)))
+#     parser = governor.register(MyParser(CommonTokenStream(lexer)))
+#     ...
+#     governor.enforce()
+# </pre>
+#
+# <p>Byte counts are estimates from {@code sys.getsizeof}, for budgeting
+# only. {@link #enforce} clears DFAs shared by every recognizer of a class,
+# so it must not run while another thread is parsing with them.</p>
+import sys
+import unittest
+
+from antlr4._compat import py2_unicode_compat
+from antlr4.atn.ATNConfig import ATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNState import BasicState
+from antlr4.atn.ATNType import ATNType
+from antlr4.atn.PredictionContext import (PredictionContext,
+                                          PredictionContextCache,
+                                          SingletonPredictionContext)
+
+
+@py2_unicode_compat
+class MemoryUsage(object):
+
+    def __init__(self, states, contexts, bytes):
+        # the number of DFA states
+        self.states = states
+        # the number of cached prediction contexts
+        self.contexts = contexts
+        # an estimate of the memory they take
+        self.bytes = bytes
+
+    def __str__(self):
+        return u"%d DFA states, %d prediction contexts, about %d bytes" % (self.states, self.contexts, self.bytes)
+
+
+class MemoryGovernor(object):
+
+    # Each limit is {@code None} for no limit.
+    def __init__(self, maxStates=None, maxContexts=None, maxBytes=None):
+        self.maxStates = maxStates
+        self.maxContexts = maxContexts
+        self.maxBytes = maxBytes
+        self.dfas = []
+        self.caches = []
+        # the number of calls to enforce since each DFA was last used, by id
+        self.idle = dict()
+        # the number of DFAs cleared so far
+        self.evictions = 0
+        config = ATNConfig(BasicState(), 1, SingletonPredictionContext(PredictionContext.EMPTY, 1))
+        self.configBytes = sys.getsizeof(config) + sys.getsizeof(config.__dict__)
+        configs = ATNConfigSet()
+        self.configSetBytes = sys.getsizeof(configs) + sys.getsizeof(configs.__dict__) + sys.getsizeof(configs.configs)
+        self.contextBytes = sys.getsizeof(config.context) + sys.getsizeof(config.context.__dict__)
+
+    # Govern the DFAs and the context cache of {@code recognizer}, a lexer
+    # or a parser, along with those of all other recognizers of its class.
+    #
+    # @return {@code recognizer}
+    def register(self, recognizer):
+        interp = recognizer._interp
+        for dfa in interp.decisionToDFA:
+            if id(dfa) not in self.idle:
+                self.idle[id(dfa)] = 0
+                self.dfas.append(dfa)
+        cache = interp.sharedContextCache
+        if cache is not None and not any(c is cache for c in self.caches):
+            self.caches.append(cache)
+        return recognizer
+
+    def usage(self):
+        states = sum(len(dfa.states) for dfa in self.dfas)
+        contexts = sum(len(cache) for cache in self.caches)
+        size = sum(self.dfaBytes(dfa) for dfa in self.dfas) + contexts * self.contextBytes
+        return MemoryUsage(states, contexts, size)
+
+    # Bring the governed caches back within budget. Call it between parses.
+    #
+    # @return the usage afterwards
+    def enforce(self):
+        for dfa in self.dfas:
+            if dfa.used:
+                self.idle[id(dfa)] = 0
+                dfa.used = False
+            else:
+                self.idle[id(dfa)] += 1
+        usage = self.usage()
+        if self.maxContexts is not None and usage.contexts > self.maxContexts:
+            self.ageCaches(usage, self.maxContexts)
+        if self.overBudget(usage):
+            for dfa in self.dfas:
+                if not self.isLexer(dfa):
+                    dfa.compact()
+            usage = self.usage()
+        if self.overBudget(usage):
+            # coldest first, then largest first; the ones in use go last
+            victims = sorted((dfa for dfa in self.dfas if len(dfa.states) > 0),
+                             key=lambda dfa: (-self.idle[id(dfa)], -len(dfa.states)))
+            for dfa in victims:
+                if not self.overBudget(usage):
+                    break
+                usage.states -= len(dfa.states)
+                usage.bytes -= self.dfaBytes(dfa)
+                with dfa.lock:
+                    dfa.clear()
+                self.evictions += 1
+            # the contexts of the cleared states are only held by the caches
+            self.ageCaches(usage, None)
+        return usage
+
+    def overBudget(self, usage):
+        return (self.maxStates is not None and usage.states > self.maxStates) \
+            or (self.maxBytes is not None and usage.bytes > self.maxBytes)
+
+    # Age the context caches, dropping the contexts unused since the
+    # previous call, and if they still hold more than {@code maxContexts},
+    # all of them.
+    def ageCaches(self, usage, maxContexts):
+        for cache in self.caches:
+            usage.contexts -= len(cache.old)
+            usage.bytes -= len(cache.old) * self.contextBytes
+            cache.age()
+        if maxContexts is not None and usage.contexts > maxContexts:
+            for cache in self.caches:
+                usage.contexts -= len(cache.old)
+                usage.bytes -= len(cache.old) * self.contextBytes
+                cache.age()
+
+    def isLexer(self, dfa):
+        return dfa.atnStartState.atn.grammarType == ATNType.LEXER
+
+    def dfaBytes(self, dfa):
+        size = sum(self.stateBytes(s) for s in dfa.states)
+        frozen = dfa.frozen
+        if frozen is not None:
+            size += sys.getsizeof(frozen.transitions) + sys.getsizeof(frozen.predictions) \
+                + sys.getsizeof(frozen.executors) \
+                + sum(sys.getsizeof(t) for t in frozen.sparseTransitions.values())
+        return size
+
+    def stateBytes(self, s):
+        size = sys.getsizeof(s) + sys.getsizeof(s.__dict__)
+        if s.edges is not None:
+            size += sys.getsizeof(s.edges)
+        if s.sparseEdges is not None:
+            size += sys.getsizeof(s.sparseEdges)
+        if s.isCompact():
+            size += sys.getsizeof(s.compactConfigs) + sys.getsizeof(s.compactConfigs.fields)
+            if s.expandedConfigs is not None:
+                size += self.configSetBytes + len(s.expandedConfigs) * self.configBytes
+        elif s.configs is not None:
+            size += self.configSetBytes + len(s.configs) * self.configBytes
+        return size
+
+
+class TestMemoryGovernor(unittest.TestCase):
+
+    TEXT = u"x = 1; y;\nabc = 22;"
+
+    # a generated lexer and parser with DFAs of their own, registered with
+    # {@code governor}
+    def recognizers(self, governor):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        from antlr4.atn.PredictionContext import PredictionContextCache
+        class FreshLexer(TLexer):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+        class FreshParser(TParser):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TParser.atn.decisionToState) ]
+            sharedContextCache = PredictionContextCache()
+        lexer = governor.register(FreshLexer(ANTLRInputStream(u"")))
+        parser = governor.register(FreshParser(CommonTokenStream(lexer)))
+        parser._listeners = []
+        return lexer, parser
+
+    def parse(self, lexer, parser, text):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        lexer.inputStream = ANTLRInputStream(text)
+        parser.setTokenStream(CommonTokenStream(lexer))
+        return parser.prog().toStringTree(recog=parser)
+
+    def lex(self, lexer, text):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        lexer.inputStream = ANTLRInputStream(text)
+        return lexer.getAllTokens()
+
+    def contexts(self, n):
+        return [ SingletonPredictionContext.create(PredictionContext.EMPTY, i) for i in range(1, n + 1) ]
+
+    def testEvictionOrder(self):
+        governor = MemoryGovernor()
+        lexer, parser = self.recognizers(governor)
+        lexerDFA = lexer._interp.decisionToDFA[0]
+        parserDFA = parser._interp.decisionToDFA[2]
+        self.parse(lexer, parser, self.TEXT)
+        governor.enforce()
+        lexerStates, parserStates = len(lexerDFA.states), len(parserDFA.states)
+        self.assertTrue(lexerStates > parserStates > 0)
+        # the parser's DFA went unused since the last call: it goes first
+        self.lex(lexer, self.TEXT)
+        governor.maxStates = lexerStates + parserStates - 1
+        usage = governor.enforce()
+        self.assertEqual((lexerStates, 0), (len(lexerDFA.states), len(parserDFA.states)))
+        self.assertEqual(lexerStates, usage.states)
+        self.assertEqual(1, governor.evictions)
+        # both in use: the larger goes first
+        self.parse(lexer, parser, self.TEXT)
+        governor.enforce()
+        self.assertEqual((0, parserStates), (len(lexerDFA.states), len(parserDFA.states)))
+        self.assertEqual(2, governor.evictions)
+        # within budget again
+        self.lex(lexer, u"x;")
+        governor.enforce()
+        self.assertEqual(2, governor.evictions)
+
+    def testCacheAging(self):
+        cache = PredictionContextCache()
+        contexts = self.contexts(4)
+        for ctx in contexts:
+            self.assertIs(ctx, cache.add(ctx))
+        cache.age()
+        self.assertEqual((0, 4), (len(cache.cache), len(cache.old)))
+        # a context used again moves back, and an equal one finds it
+        self.assertIs(contexts[0], cache.add(self.contexts(1)[0]))
+        self.assertIs(contexts[1], cache.get(contexts[1]))
+        self.assertEqual((2, 2), (len(cache.cache), len(cache.old)))
+        # the others are dropped by the next call
+        cache.age()
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(contexts[2]))
+        self.assertIs(contexts[0], cache.get(contexts[0]))
+
+    def testContextBudget(self):
+        governor = MemoryGovernor(maxContexts=5)
+        lexer, parser = self.recognizers(governor)
+        cache = parser._interp.sharedContextCache
+        contexts = self.contexts(8)
+        for ctx in contexts:
+            cache.add(ctx)
+        cache.age()
+        for ctx in contexts[:3]:
+            cache.get(ctx)
+        # the five unused since the last aging are dropped, which is enough
+        self.assertEqual(3, governor.enforce().contexts)
+        self.assertEqual(contexts[:3], sorted(cache.old.keys(), key=contexts.index))
+        self.assertEqual(0, len(cache.cache))
+        # still over budget after aging once: all are dropped
+        for ctx in contexts:
+            cache.add(ctx)
+        self.assertEqual(0, governor.enforce().contexts)
+        self.assertEqual(0, len(cache))
+
+    def testSameTrees(self):
+        texts = [ self.TEXT, u"a;", u"x = ; y;", u"b = 3;\nc = 4; d;" ] * 3
+        expected = [ self.parse(*(self.recognizers(MemoryGovernor()) + (text,))) for text in texts ]
+        governor = MemoryGovernor(maxStates=1, maxContexts=0)
+        lexer, parser = self.recognizers(governor)
+        cache = parser._interp.sharedContextCache
+        trees = []
+        for text in texts:
+            for ctx in self.contexts(3):
+                cache.add(ctx)
+            trees.append(self.parse(lexer, parser, text))
+            usage = governor.enforce()
+            self.assertEqual((0, 0), (usage.states, usage.contexts))
+        self.assertEqual(expected, trees)
+        self.assertTrue(governor.evictions > 0)
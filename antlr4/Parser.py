@@ -28,11 +28,15 @@
 #  self SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 from __future__ import print_function
 
+import unittest
+
 from antlr4._compat import text_type
 from antlr4.atn.ATNDeserializationOptions import ATNDeserializationOptions
 from antlr4.atn.ATNDeserializer import ATNDeserializer
-from antlr4.Errors import UnsupportedOperationException
-from antlr4.ErrorStrategy import DefaultErrorStrategy
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.Errors import (ParseCancellationException,
+                           UnsupportedOperationException)
+from antlr4.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
 from antlr4.Lexer import Lexer
 from antlr4.Recognizer import Recognizer
 from antlr4.Token import Token
@@ -92,6 +96,10 @@ class Parser (Recognizer):
         # The number of syntax errors reported during parsing. self value is
         # incremented each time {@link #notifyErrorListeners} is called.
         self._syntaxErrors = 0
+        # The number of {@link #parseWithTwoStage} calls, and how many of them
+        # had to fall back to full LL prediction.
+        self.twoStageParses = 0
+        self.twoStageFallbacks = 0
         self.setInputStream(input)
 
     # reset the parser's state#
@@ -573,3 +581,137 @@ class Parser (Recognizer):
                 self.removeParseListener(self._tracer)
             self._tracer = TraceListener()
             self.addParseListener(self._tracer)
+
+    # Switch this parser to a {@link ProfilingATNSimulator}, which records
+    #  statistics about the prediction of every decision, or back to a plain
+    #  {@link ParserATNSimulator}. Both share the parser's DFA, and the
+    #  prediction mode is kept.
+    #
+    #  @see #getParseInfo
+    #
+    def setProfile(self, profile):
+        from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+        from antlr4.atn.ProfilingATNSimulator import ProfilingATNSimulator
+        interp = self._interp
+        if profile:
+            if not isinstance(interp, ProfilingATNSimulator):
+                self._interp = ProfilingATNSimulator(self)
+        elif isinstance(interp, ProfilingATNSimulator):
+            self._interp = ParserATNSimulator(self, interp.atn, interp.decisionToDFA, interp.sharedContextCache)
+        self._interp.predictionMode = interp.predictionMode
+
+    # Return the {@link ParseInfo} of the profiling gathered since
+    #  {@link #setProfile} was called, or {@code None} if this parser is not
+    #  profiling.
+    #
+    def getParseInfo(self):
+        from antlr4.atn.ParseInfo import ParseInfo
+        from antlr4.atn.ProfilingATNSimulator import ProfilingATNSimulator
+        if isinstance(self._interp, ProfilingATNSimulator):
+            return ParseInfo(self._interp)
+        return None
+
+    # Parse with the two-stage strategy: first with SLL prediction and a
+    #  {@link BailErrorStrategy}, which is much faster and succeeds for almost
+    #  all valid input. Only if that fails is the token stream rewound and
+    #  the input parsed again with full LL prediction and the parser's own
+    #  error strategy, which gives the correct result for ambiguous input and
+    #  the proper error reports for invalid input. Error listeners are muted
+    #  during the first stage; parse listeners are not.
+    #
+    #  {@code startRule} is a rule function of self parser, or its name.
+    #  Returns the context returned by the rule function. The prediction mode,
+    #  error strategy and error listeners are restored afterwards.
+    #
+    #  {@link #twoStageParses} and {@link #twoStageFallbacks} count how often
+    #  self was called and how often the second stage was needed.
+    #
+    def parseWithTwoStage(self, startRule):
+        if not callable(startRule):
+            startRule = getattr(self, startRule)
+        predictionMode = self._interp.predictionMode
+        errHandler = self._errHandler
+        listeners = self._listeners
+        syntaxErrors = self._syntaxErrors
+        self.twoStageParses += 1
+        # keep the tokens of the first stage in unbuffered streams
+        marker = self._input.mark()
+        try:
+            self._input.LT(1) # make sure index is initialized
+            startIndex = self._input.index
+            try:
+                self._interp.predictionMode = PredictionMode.SLL
+                self._errHandler = BailErrorStrategy()
+                self._listeners = []
+                return startRule()
+            except ParseCancellationException:
+                pass
+            finally:
+                self._errHandler = errHandler
+                self._listeners = listeners
+            self.twoStageFallbacks += 1
+            self._input.seek(startIndex)
+            self._ctx = None
+            self._syntaxErrors = syntaxErrors
+            self._precedenceStack = [0]
+            self._errHandler.reset(self)
+            self._interp.predictionMode = PredictionMode.LL
+            return startRule()
+        finally:
+            self._interp.predictionMode = predictionMode
+            self._input.release(marker)
+
+
+class TestParser(unittest.TestCase):
+
+    VALID = u"a = 1; b;\ncc = 22;"
+    INVALID = u"a b; c = ;"
+
+    def parser(self, text, streamClass=None):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4.ErrorListener import ErrorListener
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        lexer = TLexer(ANTLRInputStream(text))
+        lexer._listeners = []
+        parser = TParser((streamClass or CommonTokenStream)(lexer))
+        class SyntaxErrors(ErrorListener):
+            def __init__(self):
+                self.errors = []
+            def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+                self.errors.append((line, column, msg))
+        listener = SyntaxErrors()
+        parser._listeners = [ listener ]
+        return parser, listener
+
+    # the tree and syntax errors of a plain LL parse
+    def parseLL(self, text):
+        parser, listener = self.parser(text)
+        parser._interp.predictionMode = PredictionMode.LL
+        tree = parser.prog().toStringTree(recog=parser)
+        return tree, listener.errors, parser._syntaxErrors
+
+    def testTwoStage(self):
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4.UnbufferedTokenStream import UnbufferedTokenStream
+        for streamClass in (CommonTokenStream, UnbufferedTokenStream):
+            for text, fallbacks in ((self.VALID, 0), (self.INVALID, 1)):
+                parser, listener = self.parser(text, streamClass)
+                predictionMode = PredictionMode.LL_EXACT_AMBIG_DETECTION
+                parser._interp.predictionMode = predictionMode
+                errHandler = parser._errHandler
+                listeners = parser._listeners
+                tree = parser.parseWithTwoStage("prog")
+                self.assertEqual((1, fallbacks), (parser.twoStageParses, parser.twoStageFallbacks))
+                # the second stage starts over from the first token
+                self.assertEqual(0, tree.start.tokenIndex)
+                self.assertEqual(self.parseLL(text),
+                                 (tree.toStringTree(recog=parser), listener.errors,
+                                  parser._syntaxErrors))
+                self.assertEqual(predictionMode, parser._interp.predictionMode)
+                self.assertIs(errHandler, parser._errHandler)
+                self.assertIs(listeners, parser._listeners)
+        self.assertEqual([], self.parseLL(self.VALID)[1])
+        self.assertNotEqual([], self.parseLL(self.INVALID)[1])
+
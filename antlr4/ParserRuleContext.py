@@ -170,7 +170,7 @@ class ParserRuleContext(RuleContext):
         return contexts
 
     def getChildCount(self):
-        return len(self.children)
+        return len(self.children) if self.children is not None else 0
 
     def getSourceInterval(self):
         if self.start is None or self.stop is None:
@@ -28,16 +28,60 @@
 #  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 #  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
 from antlr4._compat import text_type
 from antlr4.ErrorListener import ConsoleErrorListener, ProxyErrorListener
 from antlr4.Token import Token
 
 
+# A class attribute computed by the decorated function the first time it is
+#  read, and then stored in the class that defines it, so subclasses share
+#  it. Generated recognizers declare their {@code atn}, {@code decisionsToDFA}
+#  and {@code sharedContextCache} this way: importing a grammar costs nothing
+#  until its first recognizer is created.
+#
+class LazyClassAttribute(object):
+
+    def __init__(self, function):
+        self.function = function
+        self.name = function.__name__
+        self.lock = threading.Lock()
+
+    def __get__(self, obj, owner):
+        for cls in owner.__mro__:
+            if cls.__dict__.get(self.name, None) is self:
+                break
+        with self.lock:
+            # another thread may have computed it while we waited
+            value = cls.__dict__[self.name]
+            if value is self:
+                value = self.function(cls)
+                setattr(cls, self.name, value)
+        return value
+
+
 class Recognizer(object):
 
     tokenTypeMapCache = dict()
     ruleIndexMapCache = dict()
 
+    # The {@link ATNCache} generated recognizers load their ATN through, or
+    #  {@code None} to deserialize it every time. Set it on this class, or on
+    #  a generated class, before the first recognizer is created.
+    atnCache = None
+
+    @classmethod
+    def deserializeATN(cls, data):
+        if cls.atnCache is not None:
+            return cls.atnCache.deserialize(data)
+        from antlr4.atn.ATNDeserializer import ATNDeserializer
+        return ATNDeserializer().deserialize(data)
+
     def __init__(self):
         self._listeners = [ ConsoleErrorListener.INSTANCE ]
         self._interp = None
@@ -137,6 +181,26 @@ class Recognizer(object):
     def getErrorListenerDispatch(self):
         return ProxyErrorListener(self._listeners)
 
+    # Save the DFA built so far for this recognizer's grammar, which is
+    # shared by all recognizers of the same class, to {@code fileName}.
+    #
+    # @see DFA#save
+    def saveDFA(self, fileName):
+        from antlr4.dfa.DFA import DFA
+        DFA.save(self._interp.decisionToDFA, fileName)
+
+    # Warm up the DFA shared by all recognizers of this class with the
+    # states saved to {@code fileName} by {@link #saveDFA}, typically by a
+    # previous run of the same grammar.
+    #
+    # @return {@code true} if the DFA was loaded, {@code false} if the file
+    # was saved for a different version of the grammar or is truncated or
+    # corrupt.
+    # @see DFA#load
+    def loadDFA(self, fileName):
+        from antlr4.dfa.DFA import DFA
+        return DFA.load(self._interp.decisionToDFA, fileName)
+
     # subclass needs to override these if there are sempreds or actions
     # that the ATN interp needs to execute
     def sempred(self, localctx, ruleIndex, actionIndex):
@@ -159,3 +223,42 @@ class Recognizer(object):
     @state.setter
     def state(self, atnState):
         self._stateNumber = atnState
+
+
+class TestLazyClassAttribute(unittest.TestCase):
+
+    # a parse in a fresh interpreter, printing whether the ATN was built on
+    # import and the runtime modules loaded
+    SCRIPT = "\n".join([
+        "import sys",
+        "from antlr4._testgrammar.TLexer import TLexer",
+        "from antlr4._testgrammar.TParser import TParser",
+        "print(type(TParser.__dict__['atn']).__name__)",
+        "from antlr4.ANTLRInputStream import ANTLRInputStream",
+        "from antlr4.CommonTokenStream import CommonTokenStream",
+        "TParser(CommonTokenStream(TLexer(ANTLRInputStream(u'x = 1; y;')))).prog()",
+        "print(' '.join(sorted(m for m in sys.modules if m.startswith('antlr4'))))",
+    ])
+
+    # modules generated code never needs
+    UNUSED = [ "antlr4.atn.ATNCache", "antlr4.atn.ProfilingATNSimulator",
+               "antlr4.atn.ProfilingLexerATNSimulator", "antlr4.BatchParser", "antlr4.tree.SerializedTree" ]
+
+    # exported modules the eager imports of Python 2 load
+    UNUSED_EXPORTS = [ "antlr4.ANTLRFileStream", "antlr4.CodePointInputStream", "antlr4.ColumnarTokenStream",
+                       "antlr4.DiagnosticErrorListener", "antlr4.MappedFileStream", "antlr4.MemoryGovernor",
+                       "antlr4.UnbufferedCharStream" ]
+
+    def testGeneratedRecognizerImports(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, "-c", self.SCRIPT], env=env)
+        lazy, modules = output.decode("ascii").splitlines()
+        self.assertEqual("LazyClassAttribute", lazy)
+        modules = modules.split()
+        self.assertIn("antlr4.Parser", modules)
+        unused = self.UNUSED
+        if sys.version_info >= (3, 5):
+            unused = unused + self.UNUSED_EXPORTS
+        for name in unused:
+            self.assertNotIn(name, modules)
@@ -185,6 +185,25 @@ class RuleContext(RuleNode):
    #
     def toStringTree(self, ruleNames=None, recog=None):
         return Trees.toStringTree(self, ruleNames=ruleNames, recog=recog)
+
+    # Serialize the tree rooted at this context to a compact string of bytes
+    #  that can be stored or sent to another process. Only the rule indexes,
+    #  invoking states and tokens are kept, not the generated context
+    #  classes or their fields.
+    #
+    #  @see antlr4.tree.SerializedTree
+    #
+    def toBytes(self):
+        from antlr4.tree.SerializedTree import SerializedTree
+        return SerializedTree.fromTree(self).toBytes()
+
+    # Rebuild a tree serialized by {@link #toBytes}. The nodes are
+    #  {@link ParserRuleContext}s whose children are created as they are
+    #  visited.
+    @staticmethod
+    def fromBytes(data):
+        from antlr4.tree.SerializedTree import SerializedTree
+        return SerializedTree.fromBytes(data).root
    #  }
    #
    #  @Override
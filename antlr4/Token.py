@@ -37,6 +37,8 @@ from antlr4._compat import py2_unicode_compat
 
 class Token (object):
 
+    __slots__ = ()
+
     INVALID_TYPE = 0
 
     # During lookahead operations, this "token" signifies we hit rule end ATN state
@@ -142,3 +144,46 @@ class CommonToken(Token):
         return u"[@%d,%d:%d='%s',<%d>%s,%d:%d]" % (
             self.tokenIndex, self.start, self.stop, txt, self.type,
             channel_str, self.line, self.column)
+
+
+# A {@link CommonToken} whose line and column are computed from its start
+# index when first read, by {@code getLineAndColumn} of its input stream.
+# Lexers create them when they are not tracking positions (see
+# {@link Lexer#setLazyPositions}).
+class LazyPositionToken(CommonToken):
+
+    def __init__(self, source=CommonToken.EMPTY_SOURCE, type=None,
+                 channel=Token.DEFAULT_CHANNEL, start=0, stop=0, text=None):
+        # without a source, the base class doesn't ask the lexer for its
+        # position, which would compute it for the wrong index
+        super(LazyPositionToken, self).__init__(CommonToken.EMPTY_SOURCE, type, channel, start, stop, text)
+        self.source = source
+        self._line = None
+        self._column = None
+
+    @property
+    def line(self):
+        if self._line is None:
+            self._computePosition()
+        return self._line
+
+    @line.setter
+    def line(self, line):
+        self._line = line
+
+    @property
+    def column(self):
+        if self._column is None:
+            self._computePosition()
+        return self._column
+
+    @column.setter
+    def column(self, column):
+        self._column = column
+
+    def _computePosition(self):
+        line, column = self.getInputStream().getLineAndColumn(self.start)
+        if self._line is None:
+            self._line = line
+        if self._column is None:
+            self._column = column
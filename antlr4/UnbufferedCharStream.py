@@ -0,0 +1,205 @@
+# 
+#  [The "BSD license"]
+#   Copyright (c) 2012 Terence Parr
+#   Copyright (c) 2012 Sam Harwell
+#   Copyright (c) 2014 Eric Vergnaud
+#   All rights reserved.
+# 
+#   Redistribution and use in source and binary forms, with or without
+#   modification, are permitted provided that the following conditions
+#   are met:
+# 
+#   1. Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#   2. Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#   3. The name of the author may not be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+# 
+#   THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#   IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#   OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#   IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#   INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#   NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#   DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#   THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#   THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+#
+#  A character stream that reads its input from a file-like object or a
+#  socket a chunk at a time and, instead of keeping the whole input like
+#  {@link ANTLRInputStream}, only keeps the characters from the oldest
+#  outstanding {@link #mark} onwards. The lexer marks the start of each
+#  token, so memory use is bounded by the longest token plus
+#  {@code chunkSize}, however long the input is.
+#
+#  <p>Input is read with {@code read1}, {@code recv} or {@code read},
+#  whichever the object has first, so a socket or pipe is lexed as soon as
+#  data arrives. Bytes are decoded with {@code encoding}; text is used as
+#  is.</p>
+#
+#  <p>The stream cannot know its {@link #size}, and {@link #getText} only
+#  works for characters still in the buffer, so tokens have to copy their
+#  text when they are created: set the lexer's token factory to
+#  {@code CommonTokenFactory(copyText=True)}.</p>
+#
+
+import codecs
+import io
+import unittest
+
+from antlr4.Errors import IllegalStateException, UnsupportedOperationException
+from antlr4.Token import Token
+
+
+class UnbufferedCharStream(object):
+
+    def __init__(self, input, encoding='utf-8', chunkSize=4096, name=u"<unknown>"):
+        self.input = input
+        self.name = name
+        self.chunkSize = chunkSize
+        for method in ('read1', 'recv', 'read'):
+            if hasattr(input, method):
+                self._read = getattr(input, method)
+                break
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        # the buffered characters; _data[_p] is LA(1)
+        self._data = u""
+        self._p = 0
+        # true once the whole input has been read into _data
+        self._eof = False
+        self._numMarkers = 0
+        # LA(-1) when _p is 0
+        self._lastCharBufferStart = Token.EOF
+        # absolute index of LA(1)
+        self._currentCharIndex = 0
+
+    @property
+    def index(self):
+        return self._currentCharIndex
+
+    @property
+    def size(self):
+        raise UnsupportedOperationException("Unbuffered stream cannot know its size")
+
+    def reset(self):
+        self.seek(0)
+
+    def consume(self):
+        if self.LA(1) == Token.EOF:
+            raise Exception("cannot consume EOF")
+        self._p += 1
+        self._currentCharIndex += 1
+        if self._numMarkers == 0 and self._p >= self.chunkSize:
+            self._dropConsumed()
+
+    def LA(self, offset):
+        if offset==0:
+            return 0 # undefined
+        if offset==-1:
+            return ord(self._data[self._p - 1]) if self._p > 0 else self._lastCharBufferStart
+        index = self._p + offset - 1
+        if index < 0:
+            raise IndexError("cannot look back more than one character")
+        if index >= len(self._data):
+            self._sync(index)
+            if index >= len(self._data):
+                return Token.EOF
+        return ord(self._data[index])
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+    # Return a marker that keeps the characters from the current position on
+    # buffered until it is released. Markers must be released in the reverse
+    # order of the calls to mark.
+    def mark(self):
+        self._numMarkers += 1
+        return -self._numMarkers
+
+    def release(self, marker):
+        if marker != -self._numMarkers:
+            raise IllegalStateException("release() called with an invalid marker.")
+        self._numMarkers -= 1
+        if self._numMarkers == 0 and self._p >= self.chunkSize:
+            self._dropConsumed()
+
+    # Seek to {@code index}, which must be a buffered character: one at or
+    # after the oldest outstanding mark.
+    def seek(self, index):
+        if index == self._currentCharIndex:
+            return
+        if index > self._currentCharIndex:
+            # seek forward, but not past the end
+            self._sync(self._p + index - self._currentCharIndex - 1)
+            index = min(index, self._bufferStartIndex() + len(self._data))
+        i = index - self._bufferStartIndex()
+        if i < 0 or i > len(self._data):
+            raise UnsupportedOperationException("seek to index outside buffer: %d not in %d..%d" %
+                                                (index, self._bufferStartIndex(), self._bufferStartIndex() + len(self._data)))
+        self._p = i
+        self._currentCharIndex = index
+
+    def getText(self, start, stop):
+        bufferStart = self._bufferStartIndex()
+        if self._eof:
+            stop = min(stop, bufferStart + len(self._data) - 1)
+        if start < bufferStart or stop >= bufferStart + len(self._data):
+            raise UnsupportedOperationException("interval %d..%d outside buffer: %d..%d" %
+                                                (start, stop, bufferStart, bufferStart + len(self._data) - 1))
+        return self._data[start - bufferStart:stop - bufferStart + 1]
+
+    def _bufferStartIndex(self):
+        return self._currentCharIndex - self._p
+
+    # Read until _data[index] is buffered or the input is exhausted.
+    def _sync(self, index):
+        while index >= len(self._data) and not self._eof:
+            chunk = self._read(self.chunkSize)
+            if len(chunk) == 0:
+                self._eof = True
+            if isinstance(chunk, bytes):
+                # a chunk may end in the middle of a character
+                chunk = self._decoder.decode(chunk, self._eof)
+            self._data += chunk
+
+    def _dropConsumed(self):
+        self._lastCharBufferStart = ord(self._data[self._p - 1])
+        self._data = self._data[self._p:]
+        self._p = 0
+
+
+class TestUnbufferedCharStream(unittest.TestCase):
+
+    def testStream(self):
+        text = u"h\xe9llo w\xf6rld \u4e16\u754c " * 50
+        for input in (io.StringIO(text), io.BytesIO(text.encode('utf-8'))):
+            stream = UnbufferedCharStream(input, chunkSize=7)
+            self.assertEqual(0, stream.index)
+            marker = stream.mark()
+            for i in range(len(text)):
+                self.assertEqual(ord(text[i]), stream.LA(1))
+                stream.consume()
+                self.assertEqual(ord(text[i]), stream.LA(-1))
+            self.assertEqual(Token.EOF, stream.LA(1))
+            self.assertEqual(text[3:10], stream.getText(3, 9))
+            stream.seek(2)
+            self.assertEqual(ord(text[2]), stream.LA(1))
+            stream.release(marker)
+            self.assertEqual(text[2:], stream.getText(2, len(text) + 3))
+
+    def testReleasedCharactersAreDropped(self):
+        stream = UnbufferedCharStream(io.StringIO(u"abc" * 1000), chunkSize=16)
+        for i in range(2500):
+            marker = stream.mark()
+            stream.consume()
+            stream.release(marker)
+            self.assertTrue(len(stream._data) <= 2 * stream.chunkSize)
+        self.assertEqual(2500, stream.index)
+        self.assertEqual(ord("b"), stream.LA(1))
+        self.assertRaises(UnsupportedOperationException, stream.seek, 0)
+        self.assertRaises(UnsupportedOperationException, stream.getText, 0, 2500)
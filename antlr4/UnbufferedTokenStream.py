@@ -0,0 +1,270 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+#
+# A token stream that pulls tokens from its {@link TokenSource} on demand and,
+# unlike {@link BufferedTokenStream}, does not keep them: only the tokens from
+# the oldest outstanding {@link #mark} onwards stay in the buffer. The parser
+# marks the input while predicting, so the buffer holds the lookahead of the
+# current decision and memory use does not grow with the input.
+#
+# <p>
+# Like {@link CommonTokenStream}, the stream only delivers tokens on one
+# channel; the others are dropped as they are fetched. Token indexes count
+# the tokens delivered on that channel.</p>
+#
+# <p>
+# Tokens that have been released are gone, so {@link #get}, {@link #seek} and
+# {@link #getText} only work inside the buffer and {@link #size} is unknown.
+# Build the parser with {@code buildParseTrees=False} and do the work in
+# actions or parse listeners; a parse tree would keep every token alive
+# anyway.</p>
+#
+
+import unittest
+
+from antlr4.BufferedTokenStream import TokenStream
+from antlr4.Errors import IllegalStateException, UnsupportedOperationException
+from antlr4.Token import CommonToken, Token
+
+
+class UnbufferedTokenStream(TokenStream):
+
+    def __init__(self, tokenSource, channel=Token.DEFAULT_CHANNEL):
+        self.tokenSource = tokenSource
+        self.channel = channel
+        self._reset()
+
+    def _reset(self):
+        # The buffered tokens; {@link #tokens}{@code [}{@link #p}{@code ]} is
+        # {@link #LT LT(1)}. Tokens before {@link #p} are only kept while a
+        # marker is outstanding.
+        self.tokens = []
+        self.p = 0
+        # The number of outstanding markers; mark/release must nest.
+        self.numMarkers = 0
+        # {@link #LT LT(-1)}, which may no longer be in the buffer.
+        self.lastToken = None
+        # {@link #LT LT(-1)} when {@link #p} is 0, needed by {@link #seek}.
+        self.lastTokenBufferStart = None
+        # The absolute index of {@link #LT LT(1)}.
+        self.currentTokenIndex = 0
+        self.sync(1)
+
+    @property
+    def index(self):
+        return self.currentTokenIndex
+
+    @property
+    def size(self):
+        raise UnsupportedOperationException("Unbuffered stream cannot know its size")
+
+    def get(self, i):
+        bufferStartIndex = self.getBufferStartIndex()
+        if i < bufferStartIndex or i >= bufferStartIndex + len(self.tokens):
+            raise UnsupportedOperationException("get(" + str(i) + ") outside buffer: " +
+                                                str(bufferStartIndex) + ".." + str(bufferStartIndex + len(self.tokens)))
+        return self.tokens[i - bufferStartIndex]
+
+    def LT(self, i):
+        if i==0:
+            return None
+        if i==-1:
+            return self.lastToken
+        if i < 0:
+            raise IndexError("LT(" + str(i) + ") gives negative index")
+        self.sync(i)
+        index = self.p + i - 1
+        if index >= len(self.tokens):
+            # EOF must be the last token
+            return self.tokens[len(self.tokens) - 1]
+        return self.tokens[index]
+
+    def LA(self, i):
+        return self.LT(i).type
+
+    def consume(self):
+        if self.LA(1) == Token.EOF:
+            raise IllegalStateException("cannot consume EOF")
+        # track last token for LT(-1)
+        self.lastToken = self.tokens[self.p]
+        # if we're at last token and no markers, opportunity to flush buffer
+        if self.p == len(self.tokens) - 1 and self.numMarkers == 0:
+            del self.tokens[:]
+            self.p = -1 # p += 1 will leave this at 0
+            self.lastTokenBufferStart = self.lastToken
+        self.p += 1
+        self.currentTokenIndex += 1
+        self.sync(1)
+
+    # Make sure we have {@code want} tokens from the current {@link #p}
+    # position on.
+    def sync(self, want):
+        need = (self.p + want - 1) - len(self.tokens) + 1 # how many more elements we need?
+        if need > 0:
+            self.fill(need)
+
+    # Add {@code n} tokens on {@link #channel} to the buffer. Returns the
+    # number of tokens actually added; fewer than {@code n} once EOF is in the
+    # buffer.
+    def fill(self, n):
+        for i in range(0, n):
+            if len(self.tokens) > 0 and self.tokens[len(self.tokens) - 1].type == Token.EOF:
+                return i
+            t = self.tokenSource.nextToken()
+            while t.channel != self.channel and t.type != Token.EOF:
+                t = self.tokenSource.nextToken()
+            t.tokenIndex = self.getBufferStartIndex() + len(self.tokens)
+            self.tokens.append(t)
+        return n
+
+    # Return a marker that keeps the tokens from the current position on
+    # buffered until it is released. Markers must be released in the reverse
+    # order of the calls to mark.
+    def mark(self):
+        if self.numMarkers == 0:
+            self.lastTokenBufferStart = self.lastToken
+        self.numMarkers += 1
+        return -self.numMarkers
+
+    def release(self, marker):
+        if marker != -self.numMarkers:
+            raise IllegalStateException("release() called with an invalid marker.")
+        self.numMarkers -= 1
+        if self.numMarkers == 0: # can we release buffer?
+            if self.p > 0:
+                del self.tokens[:self.p]
+                self.p = 0
+            self.lastTokenBufferStart = self.lastToken
+
+    def reset(self):
+        self.seek(0)
+
+    def seek(self, index):
+        if index == self.currentTokenIndex:
+            return
+        if index > self.currentTokenIndex:
+            self.sync(index - self.currentTokenIndex)
+            index = min(index, self.getBufferStartIndex() + len(self.tokens) - 1)
+        bufferStartIndex = self.getBufferStartIndex()
+        i = index - bufferStartIndex
+        if i < 0 or i >= len(self.tokens):
+            raise UnsupportedOperationException("seek to index outside buffer: " + str(index) +
+                                                " not in " + str(bufferStartIndex) + ".." +
+                                                str(bufferStartIndex + len(self.tokens)))
+        self.p = i
+        self.currentTokenIndex = index
+        if self.p == 0:
+            self.lastToken = self.lastTokenBufferStart
+        else:
+            self.lastToken = self.tokens[self.p - 1]
+
+    def getBufferStartIndex(self):
+        return self.currentTokenIndex - self.p
+
+    # Get the text of the buffered tokens in {@code interval}, which may be
+    # given as token indexes or tokens.
+    def getText(self, interval=None):
+        bufferStartIndex = self.getBufferStartIndex()
+        bufferStopIndex = bufferStartIndex + len(self.tokens) - 1
+        if interval is None:
+            interval = (bufferStartIndex, bufferStopIndex)
+        start = interval[0]
+        if isinstance(start, Token):
+            start = start.tokenIndex
+        stop = interval[1]
+        if isinstance(stop, Token):
+            stop = stop.tokenIndex
+        if start is None or stop is None or start<0 or stop<0:
+            return ""
+        if start < bufferStartIndex or stop > bufferStopIndex:
+            raise UnsupportedOperationException("interval " + str(start) + ".." + str(stop) +
+                                                " not in " + str(bufferStartIndex) + ".." + str(bufferStopIndex))
+        texts = []
+        for i in range(start - bufferStartIndex, stop - bufferStartIndex + 1):
+            t = self.tokens[i]
+            if t.type == Token.EOF:
+                break
+            texts.append(t.text)
+        return u"".join(texts)
+
+    def getSourceName(self):
+        return self.tokenSource.getSourceName()
+
+    # Reset this token stream by setting its token source.#/
+    def setTokenSource(self, tokenSource):
+        self.tokenSource = tokenSource
+        self._reset()
+
+
+class TestUnbufferedTokenStream(unittest.TestCase):
+
+    class ListTokenSource(object):
+
+        def __init__(self, types):
+            self.tokens = [CommonToken(type=t, channel=Token.HIDDEN_CHANNEL if t==99 else Token.DEFAULT_CHANNEL,
+                                       text=str(t)) for t in types]
+            self.tokens.append(CommonToken(type=Token.EOF))
+
+        def nextToken(self):
+            return self.tokens.pop(0) if len(self.tokens) > 1 else self.tokens[0]
+
+    def testStream(self):
+        stream = UnbufferedTokenStream(self.ListTokenSource([1, 99, 2, 3, 99, 99, 4]))
+        self.assertEqual(0, stream.index)
+        self.assertEqual([1, 2, 3, 4, Token.EOF], [stream.LA(i) for i in range(1, 6)])
+        marker = stream.mark()
+        stream.consume()
+        stream.consume()
+        self.assertEqual(2, stream.LT(-1).type)
+        self.assertEqual(2, stream.index)
+        self.assertEqual(u"123", stream.getText((0, 2)))
+        stream.seek(0)
+        self.assertEqual(1, stream.LA(1))
+        stream.release(marker)
+        self.assertRaises(IllegalStateException, stream.release, marker)
+        stream.seek(9)
+        self.assertEqual(4, stream.index)
+        self.assertEqual(Token.EOF, stream.LA(1))
+        self.assertRaises(IllegalStateException, stream.consume)
+
+    def testReleasedTokensAreDropped(self):
+        stream = UnbufferedTokenStream(self.ListTokenSource([1, 2] * 500))
+        for i in range(999):
+            marker = stream.mark()
+            stream.LT(3)
+            stream.consume()
+            stream.release(marker)
+            self.assertTrue(len(stream.tokens) <= 3)
+        self.assertEqual(2, stream.LA(1))
+        self.assertEqual(1, stream.LT(-1).type)
+        self.assertRaises(UnsupportedOperationException, stream.seek, 0)
+        self.assertRaises(UnsupportedOperationException, stream.get, 0)
@@ -1,25 +1,106 @@
-from antlr4.ANTLRFileStream import ANTLRFileStream
-from antlr4.atn.ATN import ATN
-from antlr4.atn.ATNDeserializer import ATNDeserializer
-from antlr4.atn.LexerATNSimulator import LexerATNSimulator
-from antlr4.atn.ParserATNSimulator import ParserATNSimulator
-from antlr4.atn.PredictionContext import PredictionContextCache
-from antlr4.atn.PredictionMode import PredictionMode
-from antlr4.BufferedTokenStream import TokenStream
-from antlr4.CommonTokenStream import CommonTokenStream
-from antlr4.dfa.DFA import DFA
-from antlr4.DiagnosticErrorListener import DiagnosticErrorListener
-from antlr4.Errors import (IllegalStateException, NoViableAltException,
-                           RecognitionException)
-from antlr4.ErrorStrategy import BailErrorStrategy
-from antlr4.Lexer import Lexer
-from antlr4.misc.Utils import str_list
-from antlr4.Parser import Parser
-from antlr4.ParserRuleContext import ParserRuleContext
-from antlr4.Token import Token
-from antlr4.tree.Tree import (ErrorNode, ParseTreeListener, ParseTreeVisitor,
-                              ParseTreeWalker, RuleNode, TerminalNode)
-
-FileStream = ANTLRFileStream
+import sys
+import types
 
 __version__ = '4.4.1'
+
+# the module defining each name exported by this package
+_exports = {
+    'ANTLRFileStream': 'antlr4.ANTLRFileStream',
+    'ATN': 'antlr4.atn.ATN',
+    'ATNDeserializer': 'antlr4.atn.ATNDeserializer',
+    'LexerATNSimulator': 'antlr4.atn.LexerATNSimulator',
+    'ParserATNSimulator': 'antlr4.atn.ParserATNSimulator',
+    'PredictionContextCache': 'antlr4.atn.PredictionContext',
+    'PredictionMode': 'antlr4.atn.PredictionMode',
+    'TokenStream': 'antlr4.BufferedTokenStream',
+    'CodePointInputStream': 'antlr4.CodePointInputStream',
+    'ColumnarTokenStream': 'antlr4.ColumnarTokenStream',
+    'CommonTokenStream': 'antlr4.CommonTokenStream',
+    'DFA': 'antlr4.dfa.DFA',
+    'DiagnosticErrorListener': 'antlr4.DiagnosticErrorListener',
+    'IllegalStateException': 'antlr4.Errors',
+    'NoViableAltException': 'antlr4.Errors',
+    'RecognitionException': 'antlr4.Errors',
+    'BailErrorStrategy': 'antlr4.ErrorStrategy',
+    'Lexer': 'antlr4.Lexer',
+    'MappedFileStream': 'antlr4.MappedFileStream',
+    'MemoryGovernor': 'antlr4.MemoryGovernor',
+    'str_list': 'antlr4.misc.Utils',
+    'Parser': 'antlr4.Parser',
+    'ParserRuleContext': 'antlr4.ParserRuleContext',
+    'LazyClassAttribute': 'antlr4.Recognizer',
+    'Token': 'antlr4.Token',
+    'ErrorNode': 'antlr4.tree.Tree',
+    'ParseTreeListener': 'antlr4.tree.Tree',
+    'ParseTreeVisitor': 'antlr4.tree.Tree',
+    'ParseTreeWalker': 'antlr4.tree.Tree',
+    'RuleNode': 'antlr4.tree.Tree',
+    'TerminalNode': 'antlr4.tree.Tree',
+    'UnbufferedCharStream': 'antlr4.UnbufferedCharStream',
+    'UnbufferedTokenStream': 'antlr4.UnbufferedTokenStream',
+}
+
+__all__ = sorted(_exports) + ['FileStream']
+
+
+if sys.version_info >= (3, 5):
+    import importlib
+
+    # Import the modules behind the exported names on first use, so a
+    # command line tool only pays for the parts of the runtime it needs.
+    # Note that {@code from antlr4 import *} uses every name.
+    class _LazyModule(types.ModuleType):
+
+        def __getattr__(self, name):
+            target = 'ANTLRFileStream' if name == 'FileStream' else name
+            module = _exports.get(target, None)
+            if module is None:
+                raise AttributeError("module %r has no attribute %r" % (__name__, name))
+            value = getattr(importlib.import_module(module), target)
+            self.__dict__[name] = value
+            return value
+
+        # Importing a submodule binds it in its package, and many of them
+        # have the name of the class they define, like antlr4.Lexer: keep
+        # exporting the class.
+        def __setattr__(self, name, value):
+            if name in _exports and isinstance(value, types.ModuleType):
+                return
+            super(_LazyModule, self).__setattr__(name, value)
+
+        def __dir__(self):
+            return sorted(set(self.__dict__) | set(__all__))
+
+    sys.modules[__name__].__class__ = _LazyModule
+
+else:
+    from antlr4.ANTLRFileStream import ANTLRFileStream
+    from antlr4.atn.ATN import ATN
+    from antlr4.atn.ATNDeserializer import ATNDeserializer
+    from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+    from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+    from antlr4.atn.PredictionContext import PredictionContextCache
+    from antlr4.atn.PredictionMode import PredictionMode
+    from antlr4.BufferedTokenStream import TokenStream
+    from antlr4.CodePointInputStream import CodePointInputStream
+    from antlr4.ColumnarTokenStream import ColumnarTokenStream
+    from antlr4.CommonTokenStream import CommonTokenStream
+    from antlr4.dfa.DFA import DFA
+    from antlr4.DiagnosticErrorListener import DiagnosticErrorListener
+    from antlr4.Errors import (IllegalStateException, NoViableAltException,
+                               RecognitionException)
+    from antlr4.ErrorStrategy import BailErrorStrategy
+    from antlr4.Lexer import Lexer
+    from antlr4.MappedFileStream import MappedFileStream
+    from antlr4.MemoryGovernor import MemoryGovernor
+    from antlr4.misc.Utils import str_list
+    from antlr4.Parser import Parser
+    from antlr4.ParserRuleContext import ParserRuleContext
+    from antlr4.Recognizer import LazyClassAttribute
+    from antlr4.Token import Token
+    from antlr4.tree.Tree import (ErrorNode, ParseTreeListener, ParseTreeVisitor,
+                                  ParseTreeWalker, RuleNode, TerminalNode)
+    from antlr4.UnbufferedCharStream import UnbufferedCharStream
+    from antlr4.UnbufferedTokenStream import UnbufferedTokenStream
+
+    FileStream = ANTLRFileStream
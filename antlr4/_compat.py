@@ -1,16 +1,60 @@
+import os
 import sys
+import tempfile
+import time
 
 PY2 = sys.version_info[0] == 2
 
+# Narrow builds store characters outside the Basic Multilingual Plane as
+# two UTF-16 surrogates.
+NARROW_BUILD = sys.maxunicode == 0xFFFF
+
 if PY2:
     text_type = unicode
-    unichr = unichr
     xrange = xrange
+
+    if NARROW_BUILD:
+        _unichr = unichr
+
+        def unichr(c):
+            if c <= 0xFFFF:
+                return _unichr(c)
+            c -= 0x10000
+            return _unichr(0xD800 | (c >> 10)) + _unichr(0xDC00 | (c & 0x3FF))
+    else:
+        unichr = unichr
+
+    def array_tobytes(a):
+        return a.tostring()
+
+    def array_frombytes(a, data):
+        a.fromstring(data)
+
+    perf_counter = time.time
 else:
     text_type = str
     unichr = chr
     xrange = range
 
+    def array_tobytes(a):
+        return a.tobytes()
+
+    def array_frombytes(a, data):
+        a.frombytes(data)
+
+    perf_counter = time.perf_counter
+
+
+# The directory {@code name} in the user's cache directory, for callers that
+# want {@link ATNCache} or {@link LexerDFACompiler} to keep their files in the
+# usual place.
+def user_cache_dir(name):
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", None) or tempfile.gettempdir()
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", None) or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, name)
+
 
 def py2_unicode_compat(class_):
     assert '__str__' in class_.__dict__
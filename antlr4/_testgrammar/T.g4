@@ -0,0 +1,13 @@
+grammar T;
+
+prog : stat+ EOF ;
+
+stat : ID EQ NUM SEMI
+     | ID SEMI
+     ;
+
+ID : [a-zA-Z_\u00C0-\uFFFD]+ ;
+NUM : [0-9]+ ;
+WS : [ \t\r\n]+ -> skip ;
+SEMI : ';' ;
+EQ : '=' ;
@@ -0,0 +1,90 @@
+# T.g4 lexer, in the form tool/Python.stg generates; see __init__.py
+from __future__ import print_function
+
+from io import StringIO
+
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.PredictionContext import PredictionContextCache
+from antlr4.dfa.DFA import DFA
+from antlr4.Lexer import Lexer
+from antlr4.Recognizer import LazyClassAttribute
+from antlr4.Token import Token
+
+
+def serializedATN():
+    with StringIO() as buf:
+        buf.write(u"\u0003\u0430\ud6d1\u8206\uad2d\u4417\uaef1\u8d80\uaadd\u0002")
+        buf.write(u"\u0007\u002a\u0008\u0001\u0009\u0002\u0004\u0002\u0003\u0002")
+        buf.write(u"\u000a\u0002\u0006\u0002\u0006\u0003\u0002\u0003\u0002\u000d")
+        buf.write(u"\u0002\u000e\u0002\u000a\u0003\u0002\u0009\u0003\u0004\u0003")
+        buf.write(u"\u0003\u0003\u000a\u0003\u0006\u0003\u0010\u0003\u0003\u0003")
+        buf.write(u"\u0003\u000d\u0003\u000e\u0003\u0014\u0003\u0003\u0009\u0004")
+        buf.write(u"\u0004\u0004\u0003\u0004\u000a\u0004\u0006\u0004\u001a\u0003")
+        buf.write(u"\u0004\u0003\u0004\u000d\u0004\u000e\u0004\u001e\u0003\u0004")
+        buf.write(u"\u0003\u0004\u0009\u0005\u0004\u0005\u0003\u0005\u0003\u0005")
+        buf.write(u"\u0009\u0006\u0004\u0006\u0003\u0006\u0003\u0006\u0002\u0002")
+        buf.write(u"\u0007\u0004\u0003\u000e\u0004\u0018\u0005\u0023\u0006\u0027")
+        buf.write(u"\u0007\u0003\u0002\u0005\u0006\u0002C\u005caac\u007c\u00c2")
+        buf.write(u"\uffff\u0003\u00022\u003b\u0005\u0002\u000b\u000c\u000f")
+        buf.write(u"\u000f\u0022\u0022\u002c\u0002\u0004\u0003\u0002\u0002\u0002")
+        buf.write(u"\u0004\u0005\u0003\u0002\u0002\u0002\u0005\u0007\u0003\u0002")
+        buf.write(u"\u0002\u0002\u0007\u0008\u0003\u0002\u0002\u0002\u0008\u0009")
+        buf.write(u"\u0009\u0002\u0002\u0002\u0009\u0006\u0003\u0002\u0002\u0002")
+        buf.write(u"\u0006\u000a\u0003\u0002\u0002\u0002\u000a\u0007\u0003\u0002")
+        buf.write(u"\u0002\u0002\u000a\u000b\u0003\u0002\u0002\u0002\u000b\u000c")
+        buf.write(u"\u0003\u0002\u0002\u0002\u000c\u0003\u0003\u0002\u0002\u0002")
+        buf.write(u"\u0002\u000e\u0003\u0002\u0002\u0002\u000e\u000f\u0003\u0002")
+        buf.write(u"\u0002\u0002\u000f\u0011\u0003\u0002\u0002\u0002\u0011\u0012")
+        buf.write(u"\u0003\u0002\u0002\u0002\u0012\u0013\u0009\u0003\u0002\u0002")
+        buf.write(u"\u0013\u0010\u0003\u0002\u0002\u0002\u0010\u0014\u0003\u0002")
+        buf.write(u"\u0002\u0002\u0014\u0011\u0003\u0002\u0002\u0002\u0014\u0015")
+        buf.write(u"\u0003\u0002\u0002\u0002\u0015\u0016\u0003\u0002\u0002\u0002")
+        buf.write(u"\u0016\u000d\u0003\u0002\u0002\u0002\u0002\u0018\u0003\u0002")
+        buf.write(u"\u0002\u0002\u0018\u0019\u0003\u0002\u0002\u0002\u0019\u001b")
+        buf.write(u"\u0003\u0002\u0002\u0002\u001b\u001c\u0003\u0002\u0002\u0002")
+        buf.write(u"\u001c\u001d\u0009\u0004\u0002\u0002\u001d\u001a\u0003\u0002")
+        buf.write(u"\u0002\u0002\u001a\u001e\u0003\u0002\u0002\u0002\u001e\u001b")
+        buf.write(u"\u0003\u0002\u0002\u0002\u001e\u001f\u0003\u0002\u0002\u0002")
+        buf.write(u"\u001f\u0020\u0003\u0002\u0002\u0002\u0020\u0021\u0008\u0004")
+        buf.write(u"\u0002\u0002\u0021\u0017\u0003\u0002\u0002\u0002\u0002\u0023")
+        buf.write(u"\u0003\u0002\u0002\u0002\u0023\u0024\u0003\u0002\u0002\u0002")
+        buf.write(u"\u0024\u0025\u0007\u003d\u0002\u0002\u0025\u0022\u0003\u0002")
+        buf.write(u"\u0002\u0002\u0002\u0027\u0003\u0002\u0002\u0002\u0027\u0028")
+        buf.write(u"\u0003\u0002\u0002\u0002\u0028\u0029\u0007\u003f\u0002\u0002")
+        buf.write(u"\u0029\u0026\u0003\u0002\u0002\u0002\u0009\u0002\u0007\u000a")
+        buf.write(u"\u0011\u0014\u001b\u001e\u0003\u0008\u0002\u0002")
+        return buf.getvalue()
+
+
+
+class TLexer(Lexer):
+
+    @LazyClassAttribute
+    def atn(cls):
+        return cls.deserializeATN(serializedATN())
+
+    @LazyClassAttribute
+    def decisionsToDFA(cls):
+        return [ DFA(ds, i) for i, ds in enumerate(cls.atn.decisionToState) ]
+    
+    ID = 1
+    NUM = 2
+    WS = 3
+    SEMI = 4
+    EQ = 5
+    
+    modeNames = [ u"DEFAULT_MODE" ]
+    
+    tokenNames = [ u"<INVALID>",
+            u"ID", u"NUM", u"WS", u"';'", u"'='" ]
+    
+    ruleNames = [ u"ID", u"NUM", u"WS", u"SEMI", u"EQ" ]
+    
+    grammarFileName = u"T.g4"
+    
+    def __init__(self, input=None):
+        super(TLexer, self).__init__(input)
+        self.checkVersion("4.4.1")
+        self._interp = LexerATNSimulator(self, self.atn, self.decisionsToDFA, PredictionContextCache())
+        self._actions = None
+        self._predicates = None
@@ -0,0 +1,23 @@
+# T.g4 listener, in the form tool/Python.stg generates; see __init__.py
+from antlr4.tree.Tree import ParseTreeListener
+
+
+# This class defines a complete listener for a parse tree produced by TParser.
+class TListener(ParseTreeListener):
+
+    # Enter a parse tree produced by TParser#prog.
+    def enterProg(self, ctx):
+        pass
+
+    # Exit a parse tree produced by TParser#prog.
+    def exitProg(self, ctx):
+        pass
+
+
+    # Enter a parse tree produced by TParser#stat.
+    def enterStat(self, ctx):
+        pass
+
+    # Exit a parse tree produced by TParser#stat.
+    def exitStat(self, ctx):
+        pass
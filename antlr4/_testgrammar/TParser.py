@@ -0,0 +1,216 @@
+# T.g4 parser, in the form tool/Python.stg generates; see __init__.py
+from __future__ import print_function
+
+from io import StringIO
+
+from antlr4.atn.ATN import ATN
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.atn.PredictionContext import PredictionContextCache
+from antlr4.dfa.DFA import DFA
+from antlr4.Errors import (FailedPredicateException, NoViableAltException,
+                           RecognitionException)
+from antlr4.Parser import Parser
+from antlr4.ParserRuleContext import ParserRuleContext
+from antlr4.Recognizer import LazyClassAttribute
+from antlr4.Token import Token
+
+package = globals().get("__package__", None)
+ischild = len(package)>0 if package is not None else False
+if ischild:
+    from .TListener import TListener
+else:
+    from TListener import TListener
+
+
+def serializedATN():
+    with StringIO() as buf:
+        buf.write(u"\u0003\u0430\ud6d1\u8206\uad2d\u4417\uaef1\u8d80\uaadd\u0003")
+        buf.write(u"\u0007\u0019\u0009\u0002\u0004\u0002\u0009\u0003\u0004\u0003")
+        buf.write(u"\u0003\u0002\u000a\u0002\u0006\u0002\u0007\u0003\u0002\u0003")
+        buf.write(u"\u0002\u000d\u0002\u000e\u0002\u000b\u0003\u0002\u0003\u0002")
+        buf.write(u"\u000a\u0003\u0005\u0003\u000f\u0003\u0003\u0003\u0003\u0003")
+        buf.write(u"\u0003\u0003\u0003\u0003\u0003\u0003\u0003\u0003\u0003\u0003")
+        buf.write(u"\u0003\u0002\u0002\u0004\u0003\u0005\u0002\u0002\u0019\u0003")
+        buf.write(u"\u0006\u0003\u0002\u0002\u0002\u0006\u0008\u0003\u0002\u0002")
+        buf.write(u"\u0002\u0008\u0009\u0003\u0002\u0002\u0002\u0009\u000a\u0005")
+        buf.write(u"\u0005\u0003\u0002\u000a\u0007\u0003\u0002\u0002\u0002\u0007")
+        buf.write(u"\u000b\u0003\u0002\u0002\u0002\u000b\u0008\u0003\u0002\u0002")
+        buf.write(u"\u0002\u000b\u000c\u0003\u0002\u0002\u0002\u000c\u000d\u0003")
+        buf.write(u"\u0002\u0002\u0002\u000d\u000e\u0007\u0002\u0002\u0003\u000e")
+        buf.write(u"\u0002\u0003\u0002\u0002\u0002\u0005\u0010\u0003\u0002\u0002")
+        buf.write(u"\u0002\u0010\u0011\u0003\u0002\u0002\u0002\u0011\u0012\u0007")
+        buf.write(u"\u0003\u0002\u0002\u0012\u0013\u0007\u0007\u0002\u0002\u0013")
+        buf.write(u"\u0014\u0007\u0004\u0002\u0002\u0014\u0015\u0007\u0006\u0002")
+        buf.write(u"\u0002\u0015\u000f\u0003\u0002\u0002\u0002\u0010\u0016\u0003")
+        buf.write(u"\u0002\u0002\u0002\u0016\u0017\u0007\u0003\u0002\u0002\u0017")
+        buf.write(u"\u0018\u0007\u0006\u0002\u0002\u0018\u000f\u0003\u0002\u0002")
+        buf.write(u"\u0002\u000f\u0004\u0003\u0002\u0002\u0002\u0005\u0008\u000b")
+        buf.write(u"\u0010")
+        return buf.getvalue()
+
+
+
+class TParser ( Parser ):
+	
+    grammarFileName = "T.g4"
+
+    @LazyClassAttribute
+    def atn(cls):
+        return cls.deserializeATN(serializedATN())
+
+    @LazyClassAttribute
+    def decisionsToDFA(cls):
+        return [ DFA(ds, i) for i, ds in enumerate(cls.atn.decisionToState) ]
+
+    @LazyClassAttribute
+    def sharedContextCache(cls):
+        return PredictionContextCache()
+	
+    EOF = Token.EOF
+    ID=1
+    NUM=2
+    WS=3
+    SEMI=4
+    EQ=5
+
+    tokenNames = [ u"<INVALID>", u"ID", u"NUM", u"WS", u"';'", u"'='" ]
+
+    RULE_prog = 0
+    RULE_stat = 1
+
+    ruleNames =  [ u"prog", u"stat" ]
+	
+    def __init__(self, input):
+        super(TParser, self).__init__(input)
+        self.checkVersion("4.4.1")
+        self._interp = ParserATNSimulator(self, self.atn, self.decisionsToDFA, self.sharedContextCache)
+        self._predicates = None
+
+
+
+    class ProgContext(ParserRuleContext):
+
+        def __init__(self, parser, parent=None, invokingState=-1):
+            super(TParser.ProgContext, self).__init__(parent, invokingState)
+            self.parser = parser
+
+        def EOF(self):
+            return self.getToken(TParser.EOF, 0)
+
+        def stat(self, i=None):
+            if i is None:
+                return self.getTypedRuleContexts(TParser.StatContext)
+            else:
+                return self.getTypedRuleContext(TParser.StatContext,i)
+
+
+        def getRuleIndex(self):
+            return TParser.RULE_prog
+
+        def enterRule(self, listener):
+            if isinstance( listener, TListener ):
+                listener.enterProg(self)
+
+        def exitRule(self, listener):
+            if isinstance( listener, TListener ):
+                listener.exitProg(self)
+
+
+
+
+    def prog(self):
+
+        localctx = TParser.ProgContext(self, self._ctx, self.state)
+        self.enterRule(localctx, 1, self.RULE_prog)
+        self._la = 0 # Token type
+        try:
+            self.enterOuterAlt(localctx, 1)
+            self.state = 6 
+            self._errHandler.sync(self)
+            _la = self._input.LA(1)
+            while True:
+                self.state = 7
+                self.stat()
+                self.state = 9 
+                self._errHandler.sync(self)
+                _la = self._input.LA(1)
+                if not (_la==TParser.ID):
+                    break
+
+            self.state = 11
+            self.match(TParser.EOF)
+        except RecognitionException as re:
+            localctx.exception = re
+            self._errHandler.reportError(self, re)
+            self._errHandler.recover(self, re)
+        finally:
+            self.exitRule()
+        return localctx
+
+    class StatContext(ParserRuleContext):
+
+        def __init__(self, parser, parent=None, invokingState=-1):
+            super(TParser.StatContext, self).__init__(parent, invokingState)
+            self.parser = parser
+
+        def ID(self):
+            return self.getToken(TParser.ID, 0)
+
+        def EQ(self):
+            return self.getToken(TParser.EQ, 0)
+
+        def NUM(self):
+            return self.getToken(TParser.NUM, 0)
+
+        def SEMI(self):
+            return self.getToken(TParser.SEMI, 0)
+
+        def getRuleIndex(self):
+            return TParser.RULE_stat
+
+        def enterRule(self, listener):
+            if isinstance( listener, TListener ):
+                listener.enterStat(self)
+
+        def exitRule(self, listener):
+            if isinstance( listener, TListener ):
+                listener.exitStat(self)
+
+
+
+
+    def stat(self):
+
+        localctx = TParser.StatContext(self, self._ctx, self.state)
+        self.enterRule(localctx, 3, self.RULE_stat)
+        try:
+            self.state = 14
+            la_ = self._interp.adaptivePredict(self._input,2,self._ctx)
+            if la_ == 1:
+                self.enterOuterAlt(localctx, 1)
+                self.state = 15
+                self.match(TParser.ID)
+                self.state = 16
+                self.match(TParser.EQ)
+                self.state = 17
+                self.match(TParser.NUM)
+                self.state = 18
+                self.match(TParser.SEMI)
+                pass
+
+            elif la_ == 2:
+                self.enterOuterAlt(localctx, 2)
+                self.state = 20
+                self.match(TParser.ID)
+                self.state = 21
+                self.match(TParser.SEMI)
+                pass
+
+
+        except RecognitionException as re:
+            localctx.exception = re
+            self._errHandler.reportError(self, re)
+            self._errHandler.recover(self, re)
+        finally:
+            self.exitRule()
+        return localctx
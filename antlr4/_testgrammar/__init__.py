@@ -0,0 +1,4 @@
+# The recognizers of T.g4, laid out as tool/Python.stg generates them, for
+# the tests embedded in the runtime's modules. The serialized ATNs are those
+# of the grammar; regenerate the modules with the tool after changing it or
+# the template.
@@ -61,6 +61,9 @@ class ATN(object):
         # be referenced by action transitions in the ATN.
         self.lexerActions = None
         self.modeToStartState = []
+        # A digest of the serialized ATN this ATN was deserialized from, or
+        # {@code null} if it was built some other way.
+        self.checksum = None
 
     # Compute the set of valid tokens that can occur starting in state {@code s}.
     #  If {@code ctx} is null, the set of tokens will not include what can follow
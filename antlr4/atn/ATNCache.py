@@ -0,0 +1,447 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# A cache of deserialized ATNs.
+#
+# <p>Generated recognizers deserialize their ATN when their module is
+# imported, and {@link ATNDeserializer} builds every {@link ATNState},
+# {@link Transition} and {@link IntervalSet} one at a time in Python, which
+# takes a noticeable part of the import time of a large grammar. The first
+# time an ATN is deserialized, {@link #deserialize} also stores the finished
+# object graph in a file as flat {@code marshal} tables: one table per class
+# and set of field names, with a row of field values for each object, where
+# references to other objects are replaced by their position. Later
+# processes load the tables and rebuild the graph in bulk, creating every
+# object without running its constructor and setting all its fields at
+# once.</p>
+#
+# <p>Files are keyed by {@link ATN#checksum}, the deserialization options,
+# the runtime version and the Python version, so a changed grammar or runtime
+# never sees a stale file. A missing, unreadable or damaged file is replaced
+# by deserializing the ATN again. The tables may only name the classes an
+# ATN is made of; a file naming any other class is treated as damaged. Even
+# so, {@code marshal} data is not meant to be read from untrusted places:
+# keep the files in a directory only the user can write to, such as
+# {@code user_cache_dir("antlr4-atn")}.</p>
+#
+# <p>Generated recognizers load their ATN through
+# {@link Recognizer#atnCache}, which is {@code None} by default. To use a
+# cache, set it before the first recognizer is created:</p>
+#
+# <pre>
+# Recognizer.atnCache = ATNCache(user_cache_dir("antlr4-atn"))
+# </pre>
+#
+# <p>It pays off on Python 2 and on Python 3 before 3.11; from 3.11 on the
+# deserializer itself is about as fast (see
+# {@code benchmarks/atncache.py}).</p>
+import gc
+import hashlib
+import importlib
+import marshal
+import os
+import sys
+import tempfile
+import unittest
+
+from antlr4._compat import text_type, xrange
+from antlr4.atn.ATN import ATN
+from antlr4.atn.ATNDeserializationOptions import ATNDeserializationOptions
+from antlr4.atn.ATNDeserializer import ATNDeserializer
+
+FORMAT_VERSION = 1
+
+# kinds of table columns
+PLAIN = 0
+OBJECT = 1
+OBJECT_LIST = 2
+RANGE_COLUMN = 3
+ENCODED = 4
+
+# tags of encoded values
+REFERENCE = 0
+LIST = 1
+DICT = 2
+RANGE = 3
+
+PLAIN_TYPES = (type(None), bool, int, float, text_type, str)
+if sys.version_info[0] == 2:
+    PLAIN_TYPES += (long,)
+
+# the modules defining the classes an ATN is made of; the tables may only
+# name classes defined in these
+ATN_MODULES = ("antlr4.atn.ATN", "antlr4.atn.ATNState", "antlr4.atn.Transition",
+               "antlr4.atn.LexerAction", "antlr4.atn.SemanticContext", "antlr4.misc.IntervalSet")
+
+
+def atnClass(module, className):
+    if module not in ATN_MODULES:
+        raise ValueError("not an ATN class: " + module + "." + className)
+    cls = getattr(importlib.import_module(module), className, None)
+    if not isinstance(cls, type) or cls.__module__ != module:
+        raise ValueError("not an ATN class: " + module + "." + className)
+    return cls
+
+
+class ATNCache(object):
+
+    def __init__(self, directory):
+        # the directory holding the cache files, or {@code None} to disable
+        # caching
+        self.directory = directory
+
+    # Return the ATN for the serialized ATN {@code data}, as
+    # {@link ATNDeserializer#deserialize} would.
+    def deserialize(self, data, options=None):
+        if options is None:
+            options = ATNDeserializationOptions.defaultOptions
+        if self.directory is None:
+            return ATNDeserializer(options).deserialize(data)
+        fileName = os.path.join(self.directory, self.key(data, options) + ".atn")
+        try:
+            with open(fileName, "rb") as f:
+                cached = f.read()
+        except (IOError, OSError):
+            cached = None
+        if cached is not None:
+            # the collector would walk the new objects over and over while
+            # they are being created, for nothing: none of them are garbage
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                return ATNReader().read(marshal.loads(cached))
+            except Exception:
+                # damaged or out of date; rebuild it
+                pass
+            finally:
+                if enabled:
+                    gc.enable()
+        atn = ATNDeserializer(options).deserialize(data)
+        self.save(atn, fileName)
+        return atn
+
+    def key(self, data, options):
+        from antlr4 import __version__
+        key = u"|".join((ATNDeserializer.checksum(data), text_type(options.verifyATN),
+                         text_type(options.generateRuleBypassTransitions), __version__,
+                         text_type(sys.version_info[:2]), text_type(FORMAT_VERSION)))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def save(self, atn, fileName):
+        try:
+            tables = ATNWriter().write(atn)
+        except ValueError:
+            # the ATN holds something the tables can't represent
+            return
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # write to a temporary file and rename it, so other processes
+            # never see a partial file
+            fd, tempName = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                marshal.dump(tables, f)
+            try:
+                os.rename(tempName, fileName)
+            except OSError:
+                # another process created it first (Windows)
+                os.remove(tempName)
+        except (IOError, OSError):
+            # the cache is an optimization; ignore an unwritable directory
+            pass
+
+    # Remove all cached ATNs.
+    def clear(self):
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".atn"):
+                os.remove(os.path.join(self.directory, name))
+
+
+# Flattens the object graph of an ATN into marshal-able tables.
+class ATNWriter(object):
+
+    def __init__(self):
+        self.objects = []
+        self.objectIds = dict()
+
+    def write(self, atn):
+        self.addObject(atn)
+        # find all objects first; a table's position is the position of the
+        # first object with its class and field names
+        i = 0
+        while i < len(self.objects):
+            # in the order of the field names, so an ATN read back from the
+            # tables gives the same tables
+            fields = self.objects[i].__dict__
+            for name in sorted(fields.keys()):
+                self.addObjects(fields[name])
+            i += 1
+        shapes = dict()
+        for obj in self.objects:
+            shape = self.shape(obj)
+            if shape not in shapes:
+                shapes[shape] = []
+            shapes[shape].append(obj)
+        # number the objects in table order
+        tables = sorted(shapes.items(), key=lambda item: self.objectIds[id(item[1][0])])
+        self.objectIds = dict()
+        for shape, objs in tables:
+            for obj in objs:
+                self.objectIds[id(obj)] = len(self.objectIds)
+        return (FORMAT_VERSION, [self.writeTable(shape, objs) for shape, objs in tables],
+                self.objectIds[id(atn)])
+
+    def shape(self, obj):
+        cls = type(obj)
+        # refuse what the reader would; the ATN isn't saved then
+        atnClass(cls.__module__, cls.__name__)
+        if getattr(cls, "INSTANCE", None) is obj:
+            # a singleton, such as LexerSkipAction.INSTANCE
+            return (cls, None)
+        return (cls, tuple(sorted(obj.__dict__.keys())))
+
+    def writeTable(self, shape, objs):
+        cls, names = shape
+        if names is None:
+            return (cls.__module__, cls.__name__, None, None, None, 1)
+        kinds = []
+        columns = []
+        for name in names:
+            values = [obj.__dict__[name] for obj in objs]
+            if all(isinstance(v, PLAIN_TYPES) for v in values):
+                kinds.append(PLAIN)
+            elif all(v is None or self.isObject(v) for v in values):
+                kinds.append(OBJECT)
+                values = [-1 if v is None else self.objectIds[id(v)] for v in values]
+            elif all(isinstance(v, list) and all(x is None or self.isObject(x) for x in v) for v in values):
+                kinds.append(OBJECT_LIST)
+                values = [[-1 if x is None else self.objectIds[id(x)] for x in v] for v in values]
+            elif all(isinstance(v, type(xrange(0))) for v in values):
+                kinds.append(RANGE_COLUMN)
+                values = [self.encode(v)[1:] for v in values]
+            else:
+                kinds.append(ENCODED)
+                values = [self.encode(v) for v in values]
+            columns.append(values)
+        return (cls.__module__, cls.__name__, names, kinds, columns, len(objs))
+
+    def isObject(self, value):
+        return not isinstance(value, PLAIN_TYPES + (list, dict, type(xrange(0))))
+
+    def addObjects(self, value):
+        if isinstance(value, PLAIN_TYPES + (type(xrange(0)),)):
+            pass
+        elif isinstance(value, list):
+            for v in value:
+                self.addObjects(v)
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                self.addObjects(k)
+                self.addObjects(v)
+        else:
+            self.addObject(value)
+
+    def addObject(self, obj):
+        if id(obj) in self.objectIds:
+            return
+        if not hasattr(obj, "__dict__") or isinstance(obj, (tuple, set, frozenset, type)):
+            raise ValueError("cannot cache " + type(obj).__name__)
+        self.objectIds[id(obj)] = len(self.objects)
+        self.objects.append(obj)
+
+    def encode(self, value):
+        if value is None or isinstance(value, PLAIN_TYPES):
+            return value
+        elif isinstance(value, list):
+            return (LIST, [self.encode(v) for v in value])
+        elif isinstance(value, dict):
+            return (DICT, [(self.encode(k), self.encode(v)) for k, v in value.items()])
+        elif isinstance(value, type(xrange(0))):
+            start = value[0] if len(value) > 0 else 0
+            return (RANGE, start, start + len(value))
+        else:
+            return (REFERENCE, self.objectIds[id(value)])
+
+
+# Rebuilds an ATN from the tables of {@link ATNWriter}.
+class ATNReader(object):
+
+    def read(self, tables):
+        formatVersion, tables, root = tables
+        if formatVersion != FORMAT_VERSION:
+            raise ValueError("unsupported ATN cache format")
+        # create all objects first, so fields can refer to any of them
+        objects = []
+        for module, className, names, kinds, columns, count in tables:
+            cls = atnClass(module, className)
+            if names is None:
+                objects.append(cls.INSTANCE)
+            else:
+                new = cls.__new__
+                objects.extend([new(cls) for i in xrange(count)])
+        self.objects = objects
+        objects.append(None) # so that index -1 is None
+        # then set their fields a column at a time
+        start = 0
+        for module, className, names, kinds, columns, count in tables:
+            if names is not None:
+                values = [self.readColumn(kind, column) for kind, column in zip(kinds, columns)]
+                for obj, row in zip(objects[start:start + count], zip(*values)):
+                    obj.__dict__ = dict(zip(names, row))
+            start += count
+        atn = objects[root]
+        if not isinstance(atn, ATN):
+            raise ValueError("not an ATN")
+        return atn
+
+    def readColumn(self, kind, column):
+        objects = self.objects
+        if kind == PLAIN:
+            return column
+        elif kind == OBJECT:
+            return [objects[i] for i in column]
+        elif kind == OBJECT_LIST:
+            return [[objects[i] for i in v] for v in column]
+        elif kind == RANGE_COLUMN:
+            return [xrange(start, stop) for start, stop in column]
+        else:
+            return [self.decode(v) for v in column]
+
+    def decode(self, value):
+        if not isinstance(value, tuple):
+            return value
+        tag = value[0]
+        if tag == REFERENCE:
+            return self.objects[value[1]]
+        elif tag == LIST:
+            return [self.decode(v) for v in value[1]]
+        elif tag == DICT:
+            return dict((self.decode(k), self.decode(v)) for k, v in value[1])
+        else:
+            return xrange(value[1], value[2])
+
+
+
+class TestATNCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    # the object graph of {@code atn}, with objects numbered in the order
+    # they are reached
+    def graph(self, atn):
+        objects = [atn]
+        ids = { id(atn): 0 }
+        def ref(value):
+            if isinstance(value, PLAIN_TYPES):
+                return value
+            elif isinstance(value, list):
+                return [ref(v) for v in value]
+            elif isinstance(value, dict):
+                return sorted((ref(k), ref(v)) for k, v in value.items())
+            elif isinstance(value, type(xrange(0))):
+                return ("range", list(value))
+            if id(value) not in ids:
+                ids[id(value)] = len(objects)
+                objects.append(value)
+            return ("object", ids[id(value)])
+        graph = []
+        i = 0
+        while i < len(objects):
+            obj = objects[i]
+            fields = [(name, ref(obj.__dict__[name])) for name in sorted(obj.__dict__.keys())]
+            graph.append((type(obj), fields))
+            i += 1
+        return graph
+
+    def serializedATNs(self):
+        from antlr4._testgrammar import TLexer, TParser
+        return [TLexer.serializedATN(), TParser.serializedATN()]
+
+    def testRoundTrip(self):
+        cache = ATNCache(self.directory)
+        for data in self.serializedATNs():
+            expected = ATNDeserializer().deserialize(data)
+            first = cache.deserialize(data)
+            fileName = os.path.join(self.directory, cache.key(data, ATNDeserializationOptions.defaultOptions) + ".atn")
+            self.assertTrue(os.path.exists(fileName))
+            with open(fileName, "rb") as f:
+                loaded = ATNReader().read(marshal.loads(f.read()))
+            second = cache.deserialize(data)
+            self.assertIsNot(first, second)
+            for atn in (first, loaded, second):
+                self.assertEqual(self.graph(expected), self.graph(atn))
+
+    def testRecognizer(self):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        cache = ATNCache(self.directory)
+        class CachedLexer(TLexer):
+            atnCache = cache
+        class CachedParser(TParser):
+            atnCache = cache
+        lexerATN, parserATN = [c.deserializeATN(data) for c, data in zip((CachedLexer, CachedParser), self.serializedATNs())]
+        self.assertEqual(2, len(os.listdir(self.directory)))
+        self.assertIsNone(TParser.atnCache)
+        lexerATN, parserATN = [c.deserializeATN(data) for c, data in zip((CachedLexer, CachedParser), self.serializedATNs())]
+        # TParser.atn may have cached lookahead sets by now
+        self.assertEqual(self.graph(ATNDeserializer().deserialize(self.serializedATNs()[1])), self.graph(parserATN))
+        lexer = TLexer(ANTLRInputStream(u"x = 1; y;"))
+        lexer._interp = lexer._interp.__class__(lexer, lexerATN, TLexer.decisionsToDFA, lexer._interp.sharedContextCache)
+        parser = TParser(CommonTokenStream(lexer))
+        parser._interp = parser._interp.__class__(parser, parserATN, TParser.decisionsToDFA, TParser.sharedContextCache)
+        parser._listeners = []
+        self.assertEqual(u"(prog (stat x = 1 ;) (stat y ;) <EOF>)", parser.prog().toStringTree(recog=parser))
+
+    def testOnlyATNClasses(self):
+        data = self.serializedATNs()[0]
+        tables = ATNWriter().write(ATNDeserializer().deserialize(data))
+        for module, className in (("os", "system"), ("antlr4.atn.ATNCache", "ATNCache"),
+                                  ("antlr4.atn.ATNState", "ATNType"), ("antlr4.atn.ATN", "Nonexistent")):
+            table = (module, className) + tables[1][0][2:]
+            self.assertRaises(ValueError, ATNReader().read, (tables[0], [table] + tables[1][1:], tables[2]))
+        # a damaged file is replaced
+        cache = ATNCache(self.directory)
+        fileName = os.path.join(self.directory, cache.key(data, ATNDeserializationOptions.defaultOptions) + ".atn")
+        table = ("os", "system") + tables[1][0][2:]
+        with open(fileName, "wb") as f:
+            marshal.dump((tables[0], [table] + tables[1][1:], tables[2]), f)
+        self.assertEqual(self.graph(ATNDeserializer().deserialize(data)), self.graph(cache.deserialize(data)))
+        with open(fileName, "rb") as f:
+            self.assertEqual(tables, marshal.loads(f.read()))
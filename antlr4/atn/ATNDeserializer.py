@@ -27,8 +27,10 @@
 #  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 #  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #/
+import hashlib
 from uuid import UUID
 
+from antlr4._compat import text_type
 from antlr4.atn.ATN import ATN
 from antlr4.atn.ATNDeserializationOptions import ATNDeserializationOptions
 from antlr4.atn.ATNState import *
@@ -91,13 +93,22 @@ class ATNDeserializer (object):
         self.readLexerActions(atn)
         self.markPrecedenceDecisions(atn)
         self.verifyATN(atn)
+        atn.checksum = self.checksum(data)
         if self.deserializationOptions.generateRuleBypassTransitions \
                 and atn.grammarType == ATNType.PARSER:
             self.generateRuleBypassTransitions(atn)
             # re-verify after modification
             self.verifyATN(atn)
+            atn.checksum += u"+bypass"
         return atn
 
+    # Compute a digest of the serialized ATN {@code data}. Data derived from
+    # the ATN, such as a saved DFA, is only valid for the exact same
+    # serialized ATN and is keyed by this value.
+    @staticmethod
+    def checksum(data):
+        return text_type(hashlib.sha1(data.encode("unicode_escape")).hexdigest())
+
     def reset(self, data):
         def adjust(c):
             v = ord(c)
@@ -0,0 +1,163 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# The statistics {@link ProfilingATNSimulator} gathers for a decision, and
+# the events it records on the way.
+#
+# <p>Parsing performance in ANTLR 4 is heavily influenced by both static
+# factors (e.g. the form of the rules in the grammar) and dynamic factors
+# (e.g. the choice of input and the state of the DFA cache at the time
+# profiling operations are started). For best results, gather and use
+# aggregate statistics from a large sample of inputs representing the
+# inputs expected in production before using the results to make changes
+# in the grammar.</p>
+from antlr4._compat import py2_unicode_compat
+
+
+@py2_unicode_compat
+class DecisionInfo(object):
+
+    def __init__(self, decision):
+        # The decision number, which is an index into {@link ATN#decisionToState}.
+        self.decision = decision
+        # The total number of times {@link ParserATNSimulator#adaptivePredict}
+        #  was invoked for this decision.
+        self.invocations = 0
+        # The total time spent in {@link ParserATNSimulator#adaptivePredict}
+        #  for this decision, in seconds. It includes the time spent in
+        #  predicates and in the other events.
+        self.timeInPrediction = 0.0
+        # The sum of the lookahead required for SLL prediction for this
+        #  decision, including the tokens consumed by SLL before a fallback to
+        #  full context prediction.
+        self.SLL_TotalLook = 0
+        # The minimum and maximum lookahead required for any single SLL
+        #  prediction to complete for this decision, and the
+        #  {@link LookaheadEventInfo} of the maximum.
+        self.SLL_MinLook = 0
+        self.SLL_MaxLook = 0
+        self.SLL_MaxLookEvent = None
+        # The same for full context (LL) prediction, which only counts the
+        #  predictions that fell back to it.
+        self.LL_TotalLook = 0
+        self.LL_MinLook = 0
+        self.LL_MaxLook = 0
+        self.LL_MaxLookEvent = None
+        # The {@link ContextSensitivityInfo}, {@link ErrorInfo},
+        #  {@link AmbiguityInfo} and {@link PredicateEvalInfo} events of this
+        #  decision.
+        self.contextSensitivities = []
+        self.errors = []
+        self.ambiguities = []
+        self.predicateEvals = []
+        # The number of steps of SLL prediction that had to compute a reach
+        #  set with the ATN because the DFA had no edge yet, and that
+        #  followed a DFA edge.
+        self.SLL_ATNTransitions = 0
+        self.SLL_DFATransitions = 0
+        # The number of times SLL prediction found a conflict and fell back to
+        #  full context prediction, and the number of steps full context
+        #  prediction took, all with the ATN.
+        self.LL_Fallback = 0
+        self.LL_ATNTransitions = 0
+
+    def __str__(self):
+        return u"{decision=%d, contextSensitivities=%d, errors=%d, ambiguities=%d, SLL_lookahead=%d, " \
+               u"SLL_ATNTransitions=%d, SLL_DFATransitions=%d, LL_Fallback=%d, LL_lookahead=%d, " \
+               u"LL_ATNTransitions=%d}" % (self.decision, len(self.contextSensitivities), len(self.errors),
+                                           len(self.ambiguities), self.SLL_TotalLook, self.SLL_ATNTransitions,
+                                           self.SLL_DFATransitions, self.LL_Fallback, self.LL_TotalLook,
+                                           self.LL_ATNTransitions)
+
+
+# An event during the prediction of a decision, which covers the tokens
+# from {@code startIndex} to {@code stopIndex} of {@code input}.
+class DecisionEventInfo(object):
+
+    def __init__(self, decision, configs, input, startIndex, stopIndex, fullCtx):
+        self.decision = decision
+        # The configuration set of the prediction when the event happened, or
+        #  {@code None}.
+        self.configs = configs
+        self.input = input
+        self.startIndex = startIndex
+        self.stopIndex = stopIndex
+        # {@code true} if the event happened during full context prediction,
+        #  {@code false} during SLL prediction.
+        self.fullCtx = fullCtx
+
+
+# SLL and full context prediction both found a conflict between
+# {@code ambigAlts}; see {@link ParserATNSimulator#reportAmbiguity}. When
+# {@code fullCtx} is true, the input really is ambiguous in this context.
+class AmbiguityInfo(DecisionEventInfo):
+
+    def __init__(self, decision, configs, ambigAlts, input, startIndex, stopIndex, fullCtx):
+        super(AmbiguityInfo, self).__init__(decision, configs, input, startIndex, stopIndex, fullCtx)
+        self.ambigAlts = ambigAlts
+
+
+# SLL prediction found a conflict that full context prediction resolved to
+# a different alternative than SLL would have picked; see
+# {@link ParserATNSimulator#reportContextSensitivity}.
+class ContextSensitivityInfo(DecisionEventInfo):
+
+    def __init__(self, decision, configs, input, startIndex, stopIndex):
+        super(ContextSensitivityInfo, self).__init__(decision, configs, input, startIndex, stopIndex, True)
+
+
+# Prediction found a syntax error. It may not be reported: a later decision
+# can recover, or prediction can pick an alternative that finished the
+# rule.
+class ErrorInfo(DecisionEventInfo):
+
+    def __init__(self, decision, configs, input, startIndex, stopIndex, fullCtx):
+        super(ErrorInfo, self).__init__(decision, configs, input, startIndex, stopIndex, fullCtx)
+
+
+# The prediction of {@code predictedAlt} that needed the most lookahead so
+# far; see {@link DecisionInfo#SLL_MaxLookEvent}.
+class LookaheadEventInfo(DecisionEventInfo):
+
+    def __init__(self, decision, configs, predictedAlt, input, startIndex, stopIndex, fullCtx):
+        super(LookaheadEventInfo, self).__init__(decision, configs, input, startIndex, stopIndex, fullCtx)
+        self.predictedAlt = predictedAlt
+
+
+# The evaluation of the semantic context {@code semctx} of a configuration
+# predicting {@code predictedAlt}, to {@code evalResult}. Precedence
+# predicates are not recorded.
+class PredicateEvalInfo(DecisionEventInfo):
+
+    def __init__(self, decision, input, startIndex, stopIndex, semctx, evalResult, predictedAlt, fullCtx):
+        super(PredicateEvalInfo, self).__init__(decision, None, input, startIndex, stopIndex, fullCtx)
+        self.semctx = semctx
+        self.evalResult = evalResult
+        self.predictedAlt = predictedAlt
@@ -0,0 +1,118 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# The profiling information gathered by a {@link ProfilingLexerATNSimulator}
+# during lexing; see {@link Lexer#getLexInfo}.
+from antlr4._compat import text_type
+from antlr4.Token import Token
+
+
+class LexInfo(object):
+
+    def __init__(self, atnSimulator):
+        self.atnSimulator = atnSimulator
+
+    # Return the {@link MatchInfo} of every mode, indexed by mode.
+    def getModeInfo(self):
+        return self.atnSimulator.getModeInfo()
+
+    # Return the {@link MatchInfo} of every token type matched, by token
+    # type. Failed matches count under {@link Token#INVALID_TYPE}.
+    def getTokenTypeInfo(self):
+        return self.atnSimulator.getTokenTypeInfo()
+
+    # Return the total time spent matching tokens, in seconds.
+    def getTotalTimeInMatch(self):
+        return sum(info.time for info in self.getModeInfo())
+
+    # Return the total time spent computing ATN transitions and start
+    # states, in seconds.
+    def getTotalATNTime(self):
+        return sum(info.ATNTime for info in self.getModeInfo())
+
+    # Return the number of characters that followed a DFA edge.
+    def getTotalDFATransitions(self):
+        return sum(info.DFATransitions for info in self.getModeInfo())
+
+    # Return the number of characters that had to compute a transition with
+    # the ATN.
+    def getTotalATNTransitions(self):
+        return sum(info.ATNTransitions for info in self.getModeInfo())
+
+    # Return the number of DFA states of {@code mode}, or of all modes if it
+    # is {@code None}.
+    def getDFASize(self, mode=None):
+        decisionToDFA = self.atnSimulator.decisionToDFA
+        if mode is not None:
+            return len(decisionToDFA[mode].states)
+        return sum(len(dfa.states) for dfa in decisionToDFA)
+
+    # Return a table of the modes that matched tokens followed by one of the
+    # token types, the slowest first, or the {@code limit} slowest token
+    # types. {@code modeNames} and {@code tokenNames} name the modes and
+    # token types, as in a generated lexer.
+    def report(self, modeNames=None, tokenNames=None, limit=None):
+        modes = [ info for info in self.getModeInfo() if info.matches > 0 ]
+        tokenTypes = sorted(self.getTokenTypeInfo().values(), key=lambda info: (-info.time, info.key))
+        if limit is not None:
+            tokenTypes = tokenTypes[:limit]
+        header = (u"matches", u"time ms", u"chars", u"max chars", u"DFA", u"ATN", u"DFA %",
+                  u"sparse ATN", u"ATN starts", u"ATN ms", u"closure", u"suppressed", u"predicates", u"errors")
+        rows = [ (u"mode",) + header ]
+        rows.extend((self.name(modeNames, info.key),) + self.cells(info) for info in modes)
+        rows.append((u"token type",) + header)
+        rows.extend((self.tokenName(tokenNames, info.key),) + self.cells(info) for info in tokenTypes)
+        widths = [ max(len(row[i]) for row in rows) for i in range(len(rows[0])) ]
+        lines = []
+        for row in rows:
+            if row[0] == u"token type":
+                lines.append(u"")
+            cells = [ row[0].ljust(widths[0]) ]
+            cells.extend(cell.rjust(width) for cell, width in zip(row[1:], widths[1:]))
+            lines.append(u"  ".join(cells).rstrip())
+        return u"\n".join(lines)
+
+    def cells(self, info):
+        hitRate = info.getDFAHitRate()
+        return (text_type(info.matches), u"%.3f" % (info.time * 1000), text_type(info.chars),
+                text_type(info.maxChars), text_type(info.DFATransitions), text_type(info.ATNTransitions),
+                u"-" if hitRate is None else u"%.1f" % (hitRate * 100), text_type(info.sparseATNTransitions),
+                text_type(info.ATNStartStates), u"%.3f" % (info.ATNTime * 1000), text_type(info.closureOps),
+                text_type(info.suppressedEdges), text_type(info.predicateEvals), text_type(info.errors))
+
+    def name(self, names, index):
+        if names is not None and 0 <= index < len(names):
+            return text_type(names[index])
+        return text_type(index)
+
+    def tokenName(self, tokenNames, tokenType):
+        if tokenType == Token.EOF:
+            return u"EOF"
+        return self.name(tokenNames, tokenType)
@@ -44,7 +44,8 @@
 #  then the ATN does the accept and the DFA simulator that invoked it
 #  can simply return the predicted token type.</p>
 #/
-from antlr4 import Lexer
+from antlr4._compat import unichr
+from antlr4.ANTLRInputStream import ANTLRInputStream
 from antlr4.atn.ATN import ATN
 from antlr4.atn.ATNConfig import LexerATNConfig
 from antlr4.atn.ATNConfigSet import OrderedATNConfigSet
@@ -55,6 +56,8 @@ from antlr4.atn.PredictionContext import (PredictionContext,
                                           SingletonPredictionContext)
 from antlr4.atn.Transition import Transition
 from antlr4.dfa.DFAState import DFAState
+from antlr4.dfa.FrozenLexerDFA import FrozenLexerDFA
+from antlr4.dfa.LexerDFACompiler import LexerDFACompiler
 from antlr4.Errors import (LexerNoViableAltException,
                            UnsupportedOperationException)
 from antlr4.Token import Token
@@ -76,10 +79,21 @@ class LexerATNSimulator(ATNSimulator):
     debug = False
     dfa_debug = False
 
+    # Edges for characters in this range are stored in the dense
+    # DFAState.edges array, all others in DFAState.sparseEdges.
     MIN_DFA_EDGE = 0
-    MAX_DFA_EDGE = 127 # forces unicode to stay in ATN
+    MAX_DFA_EDGE = 127
 
-    ERROR = None
+    # Wildcards and negated sets match characters up to MAX_CHAR_VALUE, the
+    # largest UTF-16 code unit, unless the simulator is in code point mode
+    # (see Lexer.setCodePointMode), where they match up to MAX_CODE_POINT.
+    MIN_CHAR_VALUE = 0x0000
+    MAX_CHAR_VALUE = 0xFFFE
+    MAX_CODE_POINT = 0x10FFFF
+
+    # The largest class of characters past MAX_DFA_EDGE that buildDFA adds
+    # edges for.
+    MAX_SPARSE_CLASS = 256
 
     match_calls = 0
 
@@ -96,10 +110,21 @@ class LexerATNSimulator(ATNSimulator):
         self.line = 1
         # The index of the character relative to the beginning of the line 0..n-1#/
         self.column = 0
+        # When false, line and column are not updated as characters are
+        #  consumed; see Lexer.setLazyPositions.
+        self.trackPositions = True
+        # When true, match scans the tables of a FrozenLexerDFA; see
+        #  Lexer.setFrozenDFA.
+        self.frozenDFA = False
+        # When true, the tables are compiled to a Python function once the
+        #  DFA settles; see Lexer.setCompiledDFA.
+        self.compiledDFA = False
         from antlr4.Lexer import Lexer
         self.mode = Lexer.DEFAULT_MODE
         # Used during DFA/ATN exec to record the most recent accept configuration info
         self.prevAccept = SimState()
+        # The largest character matched by wildcards and negated sets
+        self.maxCharValue = self.MAX_CHAR_VALUE
 
 
     def copyState(self, simulator ):
@@ -108,14 +133,31 @@ class LexerATNSimulator(ATNSimulator):
         self.mode = simulator.mode
         self.startIndex = simulator.startIndex
 
+    # Copy the matching options set with {@link Lexer#setLazyPositions},
+    # {@link Lexer#setCompiledDFA} and {@link Lexer#setCodePointMode}.
+    def copySettings(self, simulator):
+        self.trackPositions = simulator.trackPositions
+        self.frozenDFA = simulator.frozenDFA
+        self.compiledDFA = simulator.compiledDFA
+        self.maxCharValue = simulator.maxCharValue
+
     def match(self, input , mode):
         self.match_calls += 1
         self.mode = mode
+        dfa = self.decisionToDFA[mode]
+        dfa.used = True
+        # an ANTLRInputStream needs no mark
+        if self.frozenDFA and dfa.s0 is not None and isinstance(input, ANTLRInputStream):
+            self.startIndex = input.index
+            ttype = self.matchFrozen(input, dfa)
+            if ttype is not None:
+                return ttype
+            # take the ATN path from the start of the token
+            input.seek(self.startIndex)
         mark = input.mark()
         try:
             self.startIndex = input.index
             self.prevAccept.reset()
-            dfa = self.decisionToDFA[mode]
             if dfa.s0 is None:
                 return self.matchATN(input)
             else:
@@ -123,11 +165,111 @@ class LexerATNSimulator(ATNSimulator):
         finally:
             input.release(mark)
 
+    # Match a token by scanning the flat tables of {@code dfa}, or the
+    # function compiled from them, doing inline what execATN, consume and
+    # accept do per character.
+    #
+    # @return the token type, or {@code None} if the tables can't tell, for
+    # a missing edge, an error or the end of the input; the caller then
+    # matches the token on the ATN path.
+    def matchFrozen(self, input, dfa):
+        frozen = dfa.frozen
+        if frozen is None or frozen.s0 is not dfa.s0 or frozen.misses >= frozen.REFREEZE_MISSES:
+            # freezing reads every state, so keep other threads from adding
+            # edges meanwhile
+            with dfa.lock:
+                frozen = dfa.frozen
+                if frozen is None or frozen.s0 is not dfa.s0 or frozen.misses >= frozen.REFREEZE_MISSES:
+                    frozen = dfa.frozen = FrozenLexerDFA(dfa, self.MIN_DFA_EDGE, self.MAX_DFA_EDGE)
+        start = input.index
+        size = input.size
+        if frozen.scanner is not None:
+            # the scanner matches runs of characters in the string when it
+            # has a character per symbol
+            text = input.strdata if len(input.strdata) == size else None
+            result = frozen.scanner(input.data, text, start, size, self.maxCharValue)
+        else:
+            if self.compiledDFA:
+                frozen.matches += 1
+                if frozen.matches >= frozen.COMPILE_MATCHES:
+                    frozen.scanner = LexerDFACompiler.DEFAULT.compile(frozen)
+            result = self.scanFrozen(frozen, input.data, start, size)
+        if result is None:
+            frozen.misses += 1
+            return None
+        accept, acceptPos = result
+        if accept < 0:
+            # let the ATN path report the error
+            return None
+        input.seek(acceptPos)
+        if self.trackPositions:
+            if len(input.strdata) == size:
+                newlines = input.strdata.count(u"\n", start, acceptPos)
+                if newlines == 0:
+                    self.column += acceptPos - start
+                else:
+                    self.line += newlines
+                    self.column = acceptPos - input.strdata.rfind(u"\n", start, acceptPos) - 1
+            else:
+                self.countLines(input.data[start:acceptPos])
+        accept //= frozen.width
+        lexerActionExecutor = frozen.executors[accept]
+        if lexerActionExecutor is not None and self.recog is not None:
+            lexerActionExecutor.execute(self.recog, input, start)
+        return frozen.predictions[accept]
+
+    # Scan the tables of {@code frozen} from {@code pos}.
+    #
+    # @return {@code None} for a missing edge, otherwise the offset of the
+    # last accept state seen, or -1, and the position after its token
+    def scanFrozen(self, frozen, data, pos, size):
+        transitions = frozen.transitions
+        acceptLimit = frozen.acceptLimit
+        minEdge = self.MIN_DFA_EDGE
+        maxEdge = self.MAX_DFA_EDGE
+        s = frozen.start
+        accept = -1
+        acceptPos = pos
+        while pos < size:
+            c = data[pos]
+            if c <= maxEdge:
+                target = transitions[s + c - minEdge]
+            else:
+                sparse = frozen.sparseTransitions.get(s, None)
+                if sparse is None or c > self.maxCharValue:
+                    target = FrozenLexerDFA.MISSING
+                else:
+                    target = sparse.get(c - minEdge, FrozenLexerDFA.MISSING)
+            if target < 0:
+                if target == FrozenLexerDFA.MISSING:
+                    return None
+                break
+            s = target
+            pos += 1
+            if s < acceptLimit:
+                accept = s
+                acceptPos = pos
+        else:
+            # the ATN path decides what to do at EOF
+            return -1, pos
+        return accept, acceptPos
+
+    # Update line and column for the code points of a token, as consume
+    # would have one at a time.
+    def countLines(self, codes):
+        newlines = codes.count(10)
+        if newlines == 0:
+            self.column += len(codes)
+        else:
+            self.line += newlines
+            self.column = codes[::-1].index(10)
+
     def reset(self):
         self.prevAccept.reset()
         self.startIndex = -1
         self.line = 1
         self.column = 0
+        from antlr4.Lexer import Lexer
         self.mode = Lexer.DEFAULT_MODE
 
     def matchATN(self, input):
@@ -187,7 +329,7 @@ class LexerATNSimulator(ATNSimulator):
                 target = self.computeTargetState(input, s, t)
                 # print("Computed:" + str(target))
 
-            if target == self.ERROR:
+            if target is self.ERROR:
                 break
 
             if target.isAcceptState:
@@ -213,10 +355,16 @@ class LexerATNSimulator(ATNSimulator):
     # {@code t}, or {@code null} if the target state for this edge is not
     # already cached
     def getExistingTargetState(self, s, t):
-        if s.edges is None or t < self.MIN_DFA_EDGE or t > self.MAX_DFA_EDGE:
-            return None
-
-        target = s.edges[t - self.MIN_DFA_EDGE]
+        if t > self.MAX_DFA_EDGE:
+            # the DFA is shared with simulators in other modes, which
+            # disagree on the targets for characters past maxCharValue
+            if s.sparseEdges is None or t > self.maxCharValue:
+                return None
+            target = s.sparseEdges.get(t - self.MIN_DFA_EDGE, None)
+        else:
+            if s.edges is None or t < self.MIN_DFA_EDGE:
+                return None
+            target = s.edges[t - self.MIN_DFA_EDGE]
         if self.debug and target is not None:
             print("reuse state "+s.stateNumber+ " edge to "+target.stateNumber)
 
@@ -306,7 +454,7 @@ class LexerATNSimulator(ATNSimulator):
             lexerActionExecutor.execute(self.recog, input, startIndex)
 
     def getReachableTarget(self, trans, t):
-        if trans.matches(t, 0, 0xFFFE):
+        if trans.matches(t, self.MIN_CHAR_VALUE, self.maxCharValue):
             return trans.target
         else:
             return None
@@ -508,18 +656,28 @@ class LexerATNSimulator(ATNSimulator):
                 return to
 
         # add the edge
-        if tk < self.MIN_DFA_EDGE or tk > self.MAX_DFA_EDGE:
-            # Only track edges within the DFA bounds
+        if tk < self.MIN_DFA_EDGE:
+            # Only track edges for characters, not EOF
             return to
 
         if self.debug:
-            print("EDGE " + str(from_) + " -> " + str(to) + " upon "+ chr(tk))
+            print("EDGE " + str(from_) + " -> " + str(to) + " upon "+ unichr(tk))
+
+        if tk > self.MAX_DFA_EDGE and tk > self.maxCharValue:
+            return to
 
-        if from_.edges is None:
-            #  make room for tokens 1..n and -1 masquerading as index 0
-            from_.edges = [ None ] * (self.MAX_DFA_EDGE - self.MIN_DFA_EDGE + 1)
+        with self.decisionToDFA[self.mode].lock:
+            if tk > self.MAX_DFA_EDGE:
+                if from_.sparseEdges is None:
+                    from_.sparseEdges = dict()
+                from_.sparseEdges[tk - self.MIN_DFA_EDGE] = to # connect
+                return to
+
+            if from_.edges is None:
+                #  make room for tokens 1..n and -1 masquerading as index 0
+                from_.edges = [ None ] * (self.MAX_DFA_EDGE - self.MIN_DFA_EDGE + 1)
 
-        from_.edges[tk - self.MIN_DFA_EDGE] = to # connect
+            from_.edges[tk - self.MIN_DFA_EDGE] = to # connect
 
         return to
 
@@ -546,37 +704,153 @@ class LexerATNSimulator(ATNSimulator):
             proposed.prediction = self.atn.ruleToTokenType[firstConfigWithRuleStopState.state.ruleIndex]
 
         dfa = self.decisionToDFA[self.mode]
-        existing = dfa.states.get(proposed, None)
-        if existing is not None:
-            return existing
+        with dfa.lock:
+            existing = dfa.states.get(proposed, None)
+            if existing is not None:
+                return existing
 
-        newState = proposed
+            newState = proposed
 
-        newState.stateNumber = len(dfa.states)
-        configs.setReadonly(True)
-        newState.configs = configs
-        dfa.states[newState] = newState
+            newState.stateNumber = len(dfa.states)
+            configs.setReadonly(True)
+            newState.configs = configs
+            dfa.states[newState] = newState
         return newState
 
     def getDFA(self, mode):
         return self.decisionToDFA[mode]
 
+    # Build the DFA of {@code mode} up front: starting from its start state,
+    # add an edge for every character of the dense edge range to every
+    # state, so matching never falls back to the ATN for those characters.
+    # The characters of a state are split into the classes its outgoing ATN
+    # transitions can't tell apart, and the target is computed once per
+    # class. Past the dense range, edges are added for classes of at most
+    # {@link #MAX_SPARSE_CLASS} characters; larger classes, typically the
+    # non-ASCII part of a negated set or a wildcard, are still learned one
+    # character at a time.
+    #
+    # <p>Modes whose rules evaluate predicates, or run position-dependent
+    # actions before the end of a rule, depend on more than the characters
+    # matched and are left alone.</p>
+    #
+    # @return the number of states of the DFA, or {@code None} if the mode
+    # can't be built up front
+    def buildDFA(self, mode):
+        if not self.isStaticMode(mode):
+            return None
+        savedMode = self.mode
+        savedStartIndex = self.startIndex
+        # nothing reads the input: there are no predicates to evaluate, and
+        # the offsets of position-dependent actions are never fixed
+        input = ANTLRInputStream(u"")
+        self.mode = mode
+        self.startIndex = 0
+        try:
+            dfa = self.decisionToDFA[mode]
+            if dfa.s0 is None:
+                dfa.s0 = self.addDFAState(self.computeStartState(input, self.atn.modeToStartState[mode]))
+            states = [ dfa.s0 ]
+            seen = set([ id(dfa.s0) ])
+            i = 0
+            while i < len(states):
+                for target in self.buildEdges(input, states[i]):
+                    if target is not self.ERROR and id(target) not in seen:
+                        seen.add(id(target))
+                        states.append(target)
+                i += 1
+            return len(dfa.states)
+        finally:
+            self.mode = savedMode
+            self.startIndex = savedStartIndex
+
+    # Add the edges of DFA state {@code s} for every character class.
+    #
+    # @return the targets of the edges
+    def buildEdges(self, input, s):
+        # the boundaries of the character classes
+        bounds = set([ self.MIN_CHAR_VALUE, self.maxCharValue + 1 ])
+        for cfg in s.configs:
+            for trans in cfg.state.transitions:
+                if trans.label is not None and not trans.isEpsilon:
+                    for interval in trans.label.intervals or ():
+                        bounds.add(max(interval.start, self.MIN_CHAR_VALUE))
+                        bounds.add(min(interval.stop, self.maxCharValue + 1))
+        bounds = sorted(bounds)
+        targets = []
+        for start, stop in zip(bounds, bounds[1:]):
+            if stop - start > self.MAX_SPARSE_CLASS:
+                stop = min(stop, self.MAX_DFA_EDGE + 1)
+            if start >= stop:
+                continue
+            target = self.getExistingTargetState(s, start)
+            if target is None:
+                target = self.computeTargetState(input, s, start)
+            for c in range(start, stop):
+                self.addDFAEdge(s, c, target)
+            targets.append(target)
+        return targets
+
+    # Whether tokens of {@code mode} depend only on the characters matched:
+    # none of its rules has a predicate, or a position-dependent action
+    # followed by more characters.
+    def isStaticMode(self, mode):
+        start = self.atn.modeToStartState[mode]
+        states = [ start ]
+        seen = set([ start.stateNumber ])
+        i = 0
+        while i < len(states):
+            for t in states[i].transitions:
+                if t.serializationType in (Transition.PREDICATE, Transition.PRECEDENCE):
+                    return False
+                if t.serializationType == Transition.ACTION \
+                        and self.atn.lexerActions[t.actionIndex].isPositionDependent \
+                        and not self.endsRule(t.target):
+                    return False
+                targets = [ t.target ]
+                if t.serializationType == Transition.RULE:
+                    targets.append(t.followState)
+                for target in targets:
+                    if target.stateNumber not in seen:
+                        seen.add(target.stateNumber)
+                        states.append(target)
+            i += 1
+        return True
+
+    # Whether the rule ends after {@code state} without matching another
+    # character.
+    def endsRule(self, state):
+        states = [ state ]
+        seen = set([ state.stateNumber ])
+        while states:
+            state = states.pop()
+            if isinstance(state, RuleStopState):
+                continue
+            for t in state.transitions:
+                if not t.isEpsilon or t.serializationType == Transition.RULE:
+                    return False
+                if t.target.stateNumber not in seen:
+                    seen.add(t.target.stateNumber)
+                    states.append(t.target)
+        return True
+
     # Get the text matched so far for the current token.
     def getText(self, input):
         # index is first lookahead char, don't include.
         return input.getText(self.startIndex, input.index-1)
 
     def consume(self, input):
-        curChar = input.LA(1)
-        if curChar==ord('\n'):
-            self.line += 1
-            self.column = 0
-        else:
-            self.column += 1
+        if self.trackPositions:
+            curChar = input.LA(1)
+            if curChar==ord('\n'):
+                self.line += 1
+                self.column = 0
+            else:
+                self.column += 1
         input.consume()
 
     def getTokenName(self, t):
         if t==-1:
             return "EOF"
         else:
-            return "'" + chr(t) + "'"
+            return "'" + unichr(t) + "'"
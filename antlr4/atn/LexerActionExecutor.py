@@ -159,3 +159,8 @@ class LexerActionExecutor(object):
         else:
             return self.hashCode == other.hashCode \
                 and self.lexerActions == other.lexerActions
+
+    # LexerATNConfig compares executors with !=, which Python 2 doesn't
+    # derive from __eq__
+    def __ne__(self, other):
+        return not self == other
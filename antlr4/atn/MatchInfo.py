@@ -0,0 +1,114 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# The statistics {@link ProfilingLexerATNSimulator} gathers for the tokens
+# matched in a lexer mode, or for the tokens of a type.
+#
+# <p>A character the DFA has an edge for costs a list or dictionary
+# lookup; one it hasn't costs a reach set and closure computed with the
+# ATN, which is orders of magnitude slower. The DFA learns most edges early
+# on, so a mode whose ATN transitions keep growing with the input usually
+# has predicates suppressing its edges, or meets characters past the dense
+# edge range (see {@link LexerATNSimulator#MAX_DFA_EDGE}) that it only
+# caches sparsely.</p>
+from antlr4._compat import py2_unicode_compat
+
+
+@py2_unicode_compat
+class MatchInfo(object):
+
+    def __init__(self, key):
+        # The mode or token type, or {@code None} for the statistics of a
+        #  single match.
+        self.key = key
+        # The number of calls to {@link LexerATNSimulator#match}, including
+        #  the failed ones, and the number of those that failed with a
+        #  {@link LexerNoViableAltException}.
+        self.matches = 0
+        self.errors = 0
+        # The total time spent in {@link LexerATNSimulator#match}, in
+        #  seconds, and the part of it spent computing ATN transitions and
+        #  start states.
+        self.time = 0.0
+        self.ATNTime = 0.0
+        # The total and largest number of characters consumed by a match.
+        self.chars = 0
+        self.maxChars = 0
+        # The number of characters that followed a DFA edge, and that had to
+        #  compute a transition with the ATN because the DFA had no edge. The
+        #  ATN transitions include the end of the input, which never gets an
+        #  edge, and {@code sparseATNTransitions} counts those for characters
+        #  past {@link LexerATNSimulator#MAX_DFA_EDGE}.
+        self.DFATransitions = 0
+        self.ATNTransitions = 0
+        self.sparseATNTransitions = 0
+        # The number of matches that computed the start state of the mode
+        #  with the ATN, because the DFA had none yet or a predicate kept it
+        #  out of the DFA.
+        self.ATNStartStates = 0
+        # The number of DFA edges, start states included, left out of the
+        #  DFA because a predicate was evaluated on the way, and the number
+        #  of predicate evaluations.
+        self.suppressedEdges = 0
+        self.predicateEvals = 0
+        # The number of configurations the closure operation visited.
+        self.closureOps = 0
+
+    def add(self, other):
+        self.matches += other.matches
+        self.errors += other.errors
+        self.time += other.time
+        self.ATNTime += other.ATNTime
+        self.chars += other.chars
+        self.maxChars = max(self.maxChars, other.maxChars)
+        self.DFATransitions += other.DFATransitions
+        self.ATNTransitions += other.ATNTransitions
+        self.sparseATNTransitions += other.sparseATNTransitions
+        self.ATNStartStates += other.ATNStartStates
+        self.suppressedEdges += other.suppressedEdges
+        self.predicateEvals += other.predicateEvals
+        self.closureOps += other.closureOps
+
+    # Return the fraction of the transitions that followed a DFA edge, or
+    # {@code None} if there were none.
+    def getDFAHitRate(self):
+        total = self.DFATransitions + self.ATNTransitions
+        if total == 0:
+            return None
+        return float(self.DFATransitions) / total
+
+    def __str__(self):
+        return u"{key=%s, matches=%d, errors=%d, chars=%d, maxChars=%d, DFATransitions=%d, " \
+               u"ATNTransitions=%d, sparseATNTransitions=%d, ATNStartStates=%d, suppressedEdges=%d, " \
+               u"predicateEvals=%d, closureOps=%d}" % (self.key, self.matches, self.errors, self.chars,
+                                                       self.maxChars, self.DFATransitions, self.ATNTransitions,
+                                                       self.sparseATNTransitions, self.ATNStartStates,
+                                                       self.suppressedEdges, self.predicateEvals,
+                                                       self.closureOps)
@@ -0,0 +1,114 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# The profiling information gathered by a {@link ProfilingATNSimulator}
+# during parsing; see {@link Parser#getParseInfo}.
+from antlr4._compat import text_type
+
+
+class ParseInfo(object):
+
+    def __init__(self, atnSimulator):
+        self.atnSimulator = atnSimulator
+
+    # Return the {@link DecisionInfo} of every decision, indexed by decision
+    # number.
+    def getDecisionInfo(self):
+        return self.atnSimulator.getDecisionInfo()
+
+    # Return the numbers of the decisions that fell back to full context
+    # prediction at least once.
+    def getLLDecisions(self):
+        return [ info.decision for info in self.getDecisionInfo() if info.LL_Fallback > 0 ]
+
+    # Return the total time spent in prediction, in seconds.
+    def getTotalTimeInPrediction(self):
+        return sum(info.timeInPrediction for info in self.getDecisionInfo())
+
+    # Return the total number of tokens SLL prediction looked at.
+    def getTotalSLLLookaheadOps(self):
+        return sum(info.SLL_TotalLook for info in self.getDecisionInfo())
+
+    # Return the total number of tokens full context prediction looked at.
+    def getTotalLLLookaheadOps(self):
+        return sum(info.LL_TotalLook for info in self.getDecisionInfo())
+
+    # Return the number of SLL prediction steps that used the ATN rather than
+    # a DFA edge.
+    def getTotalSLLATNLookaheadOps(self):
+        return sum(info.SLL_ATNTransitions for info in self.getDecisionInfo())
+
+    # Return the number of full context prediction steps, which all use the
+    # ATN.
+    def getTotalLLATNLookaheadOps(self):
+        return sum(info.LL_ATNTransitions for info in self.getDecisionInfo())
+
+    def getTotalATNLookaheadOps(self):
+        return self.getTotalSLLATNLookaheadOps() + self.getTotalLLATNLookaheadOps()
+
+    # Return the number of DFA states of {@code decision}, or of all
+    # decisions if it is {@code None}.
+    def getDFASize(self, decision=None):
+        decisionToDFA = self.atnSimulator.decisionToDFA
+        if decision is not None:
+            return len(decisionToDFA[decision].states)
+        return sum(len(dfa.states) for dfa in decisionToDFA)
+
+    # Return a table of the decisions that were predicted, the slowest first,
+    # or the {@code limit} slowest. {@code ruleNames} names the rule of each
+    # decision.
+    def report(self, ruleNames=None, limit=None):
+        infos = sorted((info for info in self.getDecisionInfo() if info.invocations > 0),
+                       key=lambda info: (-info.timeInPrediction, info.decision))
+        if limit is not None:
+            infos = infos[:limit]
+        rows = [ (u"decision", u"rule", u"invocations", u"time ms", u"SLL k avg", u"SLL k max",
+                  u"DFA", u"SLL ATN", u"LL fallback", u"LL k avg", u"LL k max", u"LL ATN",
+                  u"ambiguities", u"ctx sensitive", u"predicates", u"errors") ]
+        decisionToState = self.atnSimulator.atn.decisionToState
+        for info in infos:
+            ruleIndex = decisionToState[info.decision].ruleIndex
+            rule = ruleNames[ruleIndex] if ruleNames is not None else text_type(ruleIndex)
+            rows.append((text_type(info.decision), rule, text_type(info.invocations),
+                         u"%.3f" % (info.timeInPrediction * 1000),
+                         u"%.2f" % (float(info.SLL_TotalLook) / info.invocations),
+                         text_type(info.SLL_MaxLook), text_type(info.SLL_DFATransitions),
+                         text_type(info.SLL_ATNTransitions), text_type(info.LL_Fallback),
+                         u"%.2f" % (float(info.LL_TotalLook) / info.LL_Fallback) if info.LL_Fallback else u"-",
+                         text_type(info.LL_MaxLook), text_type(info.LL_ATNTransitions),
+                         text_type(len(info.ambiguities)), text_type(len(info.contextSensitivities)),
+                         text_type(len(info.predicateEvals)), text_type(len(info.errors))))
+        widths = [ max(len(row[i]) for row in rows) for i in range(len(rows[0])) ]
+        lines = []
+        for row in rows:
+            cells = [ row[0].rjust(widths[0]), row[1].ljust(widths[1]) ]
+            cells.extend(cell.rjust(width) for cell, width in zip(row[2:], widths[2:]))
+            lines.append(u"  ".join(cells).rstrip())
+        return u"\n".join(lines)
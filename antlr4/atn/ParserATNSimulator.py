@@ -183,18 +183,22 @@
 # <strong>THREAD SAFETY</strong></p>
 #
 # <p>
-# The {@link ParserATNSimulator} locks on the {@link #decisionToDFA} field when
-# it adds a new DFA object to that array. {@link #addDFAEdge}
-# locks on the DFA for the current decision when setting the
-# {@link DFAState#edges} field. {@link #addDFAState} locks on
-# the DFA for the current decision when looking up a DFA state to see if it
+# Many threads may parse at once, each with its own parser, on a
+# free-threaded Python build as well; a parser and its simulator keep the
+# state of the current prediction in their fields, so they can't be shared.
+# {@link #decisionToDFA} never changes, and a DFA knows whether it is a
+# precedence DFA from the start (see the {@link DFA} constructor).
+# {@link #addDFAEdge} holds {@link DFA#lock} of the current decision
+# when setting the {@link DFAState#edges} or
+# {@link DFAState#sparseEdges} field. {@link #addDFAState} holds it
+# when looking up a DFA state to see if it
 # already exists. We must make sure that all requests to add DFA states that
 # are equivalent result in the same shared DFA object. This is because lots of
 # threads will be trying to update the DFA at once. The
-# {@link #addDFAState} method also locks inside the DFA lock
-# but this time on the shared context cache when it rebuilds the
-# configurations' {@link PredictionContext} objects using cached
-# subgraphs/nodes. No other locking occurs, even during DFA simulation. This is
+# {@link #addDFAState} method also uses the shared context cache when it
+# rebuilds the configurations' {@link PredictionContext} objects using cached
+# subgraphs/nodes; {@link PredictionContextCache#add} needs no lock.
+# No other locking occurs, even during DFA simulation. This is
 # safe as long as we can guarantee that all threads referencing
 # {@code s.edge[t]} get the same physical target {@link DFAState}, or
 # {@code null}. Once into the DFA, the DFA simulation does not reference the
@@ -288,6 +292,20 @@ class ParserATNSimulator(ATNSimulator):
     dfa_debug = False
     retry_debug = False
 
+    # A DFA state keeps its edges in a dictionary, DFAState.sparseEdges,
+    #  until they fill this fraction of the token types, and then in a list
+    #  with a slot per token type, DFAState.edges. A dictionary entry takes
+    #  several times the memory of a slot, so most states of a grammar with
+    #  hundreds of token types are much smaller as dictionaries. Set it to 0
+    #  to always use lists, or above 1 to always use dictionaries.
+    denseEdgeFill = 0.125
+
+    # When above 0, each DFA compacts the ATN configuration sets of its
+    #  states in batches of this many (see DFA.settle and DFAState.compact),
+    #  so a long running parser holds on to the configurations of the states
+    #  it is still building rather than of every state it has seen. Leave it
+    #  at 0 to call DFA.compact explicitly, for example after a warm up.
+    compactDFAInterval = 0
 
     def __init__(self, parser, atn, decisionToDFA, sharedContextCache):
         super(ParserATNSimulator, self).__init__(atn, sharedContextCache)
@@ -324,6 +342,7 @@ class ParserATNSimulator(ATNSimulator):
         self._outerContext = outerContext
         
         dfa = self.decisionToDFA[decision]
+        dfa.used = True
         m = input.mark()
         index = input.index
 
@@ -510,7 +529,10 @@ class ParserATNSimulator(ATNSimulator):
     #
     def getExistingTargetState(self, previousD, t):
         edges = previousD.edges
-        if edges is None or t + 1 < 0 or t + 1 >= len(edges):
+        if edges is None:
+            sparseEdges = previousD.sparseEdges
+            return None if sparseEdges is None else sparseEdges.get(t + 1, None)
+        elif t + 1 < 0 or t + 1 >= len(edges):
             return None
         else:
             return edges[t + 1]
@@ -1075,7 +1097,7 @@ class ParserATNSimulator(ATNSimulator):
         failed = ATNConfigSet(configs.fullCtx)
         for c in configs:
             if c.semanticContext is not SemanticContext.NONE:
-                predicateEvaluationResult = c.semanticContext.eval(self.parser, outerContext)
+                predicateEvaluationResult = self.evalPredicate(c.semanticContext, outerContext, c.alt, configs.fullCtx)
                 if predicateEvaluationResult:
                     succeeded.add(c)
                 else:
@@ -1098,7 +1120,7 @@ class ParserATNSimulator(ATNSimulator):
                 if not complete:
                     break
                 continue
-            predicateEvaluationResult = pair.pred.eval(self.parser, outerContext)
+            predicateEvaluationResult = self.evalPredicate(pair.pred, outerContext, pair.alt, False)
             if self.debug or self.dfa_debug:
                 print("eval pred " + str(pair) + "=" + str(predicateEvaluationResult))
 
@@ -1110,6 +1132,14 @@ class ParserATNSimulator(ATNSimulator):
                     break
         return predictions
 
+    # Evaluate the semantic context {@code pred} of a configuration predicting
+    #  {@code alt}, in SLL or full context ({@code fullCtx}) prediction. The
+    #  input stream is at the start of the decision. A profiler overrides it
+    #  to record the evaluations.
+    #
+    def evalPredicate(self, pred, outerContext, alt, fullCtx):
+        return pred.eval(self.parser, outerContext)
+
 
     # TODO: If we are doing predicates, there is no point in pursuing
     #     closure operations if we reach a DFA state that uniquely predicts
@@ -1134,7 +1164,7 @@ class ParserATNSimulator(ATNSimulator):
             # run thru all possible stack tops in ctx
             if not config.context.isEmpty():
                 for i in range(0, len(config.context)):
-                    if config.context.getReturnState(i) is PredictionContext.EMPTY_RETURN_STATE:
+                    if config.context.getReturnState(i) == PredictionContext.EMPTY_RETURN_STATE:
                         if fullCtx:
                             configs.add(ATNConfig(state=config.state, context=PredictionContext.EMPTY, config=config), self.mergeCache)
                             continue
@@ -1256,7 +1286,7 @@ class ParserATNSimulator(ATNSimulator):
                 # later during conflict resolution.
                 currentPosition = self._input.index
                 self._input.seek(self._startIndex)
-                predSucceeds = pt.getPredicate().eval(self.parser, self._outerContext);
+                predSucceeds = self.evalPredicate(pt.getPredicate(), self._outerContext, config.alt, fullCtx)
                 self._input.seek(currentPosition)
                 if predSucceeds:
                     c = ATNConfig(state=pt.target, config=config) # no pred context
@@ -1286,7 +1316,7 @@ class ParserATNSimulator(ATNSimulator):
                 # later during conflict resolution.
                 currentPosition = self._input.index
                 self._input.seek(self._startIndex)
-                predSucceeds = pt.getPredicate().eval(self.parser, self._outerContext)
+                predSucceeds = self.evalPredicate(pt.getPredicate(), self._outerContext, config.alt, fullCtx)
                 self._input.seek(currentPosition)
                 if predSucceeds:
                     c = ATNConfig(state=pt.target, config=config) # no pred context
@@ -1430,9 +1460,26 @@ class ParserATNSimulator(ATNSimulator):
         if from_ is None or t < -1 or t > self.atn.maxTokenType:
             return to
 
-        if from_.edges is None:
-            from_.edges = [None] * (self.atn.maxTokenType + 2)
-        from_.edges[t+1] = to # connect
+        with dfa.lock:
+            if from_.edges is not None:
+                from_.edges[t+1] = to # connect
+            else:
+                sparseEdges = from_.sparseEdges
+                if sparseEdges is None:
+                    sparseEdges = from_.sparseEdges = dict()
+                width = self.atn.maxTokenType + 2
+                count = len(sparseEdges) if t+1 in sparseEdges else len(sparseEdges) + 1
+                if count >= width * self.denseEdgeFill:
+                    # a list is smaller now; fill it before publishing it,
+                    # and publish it before dropping the dictionary
+                    edges = [None] * width
+                    for i, target in sparseEdges.items():
+                        edges[i] = target
+                    edges[t+1] = to
+                    from_.edges = edges
+                    from_.sparseEdges = None
+                else:
+                    sparseEdges[t+1] = to
 
         if self.debug:
             names = None if self.parser is None else self.parser.tokenNames
@@ -1460,15 +1507,18 @@ class ParserATNSimulator(ATNSimulator):
             return D
 
 
-        existing = dfa.states.get(D, None)
-        if existing is not None:
-            return existing
+        with dfa.lock:
+            existing = dfa.states.get(D, None)
+            if existing is not None:
+                return existing
 
-        D.stateNumber = len(dfa.states)
-        if not D.configs.readonly:
-            D.configs.optimizeConfigs(self)
-            D.configs.setReadonly(True)
-        dfa.states[D] = D
+            D.stateNumber = len(dfa.states)
+            if not D.configs.readonly:
+                D.configs.optimizeConfigs(self)
+                D.configs.setReadonly(True)
+            dfa.states[D] = D
+            if self.compactDFAInterval > 0:
+                dfa.settle(D, self.compactDFAInterval)
         if self.debug:
             print("adding new DFA state: " + str(D))
         return D
@@ -100,25 +100,43 @@ class PredictionContextCache(object):
 
     def __init__(self):
         self.cache = dict()
+        # The contexts cached before the last call to {@link #age}; a context
+        #  found here moves back to {@link #cache}.
+        self.old = dict()
 
     #  Add a context to the cache and return it. If the context already exists,
     #  return that one instead and do not add a new context to the cache.
-    #  Protect shared cache from unsafe thread access.
+    #  Protect shared cache from unsafe thread access: {@code setdefault}
+    #  adds the context only if no other thread has added an equal one, and
+    #  returns the one that is in the cache either way.
     #
     def add(self, ctx):
         if ctx==PredictionContext.EMPTY:
             return PredictionContext.EMPTY
-        existing = self.cache.get(ctx, None)
+        existing = self.get(ctx)
         if existing is not None:
             return existing
-        self.cache[ctx] = ctx
-        return ctx
+        return self.cache.setdefault(ctx, ctx)
 
     def get(self, ctx):
-        return self.cache.get(ctx, None)
+        existing = self.cache.get(ctx, None)
+        if existing is None and self.old:
+            existing = self.old.pop(ctx, None)
+            if existing is not None:
+                existing = self.cache.setdefault(existing, existing)
+        return existing
+
+    # Start a new generation of the cache: the contexts that haven't been
+    #  used since the previous call are dropped. Dropping a context only
+    #  costs memory if an equal one is cached again, since prediction then
+    #  no longer shares it.
+    #
+    def age(self):
+        self.old = self.cache
+        self.cache = dict()
 
     def __len__(self):
-        return len(self.cache)
+        return len(self.cache) + len(self.old)
 
 
 @py2_unicode_compat
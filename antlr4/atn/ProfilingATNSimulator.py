@@ -0,0 +1,245 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# A {@link ParserATNSimulator} that records statistics about the prediction
+# of each decision in a {@link DecisionInfo}: how often and how long it
+# ran, how much lookahead it needed with SLL and with full context
+# prediction, how many steps followed DFA edges and how many had to use the
+# ATN, and its fallbacks to full context prediction, ambiguities, context
+# sensitivities, predicate evaluations and errors.
+#
+# <p>Use {@link Parser#setProfile} to switch a parser to it, and
+# {@link Parser#getParseInfo} to get the statistics. It shares the DFA of
+# the parser it replaces.</p>
+import unittest
+
+from antlr4._compat import perf_counter
+from antlr4.atn.DecisionInfo import (AmbiguityInfo, ContextSensitivityInfo,
+                                     DecisionInfo, ErrorInfo,
+                                     LookaheadEventInfo, PredicateEvalInfo)
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.atn.SemanticContext import PrecedencePredicate
+
+
+class ProfilingATNSimulator(ParserATNSimulator):
+
+    def __init__(self, parser):
+        interp = parser._interp
+        super(ProfilingATNSimulator, self).__init__(parser, interp.atn, interp.decisionToDFA,
+                                                    interp.sharedContextCache)
+        self.decisions = [ DecisionInfo(i) for i in range(len(self.atn.decisionToState)) ]
+        # the input index of the last token SLL and full context prediction
+        # looked at in the current prediction, or -1
+        self._sllStopIndex = -1
+        self._llStopIndex = -1
+        self.currentDecision = -1
+        self.currentState = None
+        # the alternative SLL prediction would have picked for the conflict
+        # full context prediction is resolving
+        self.conflictingAltResolvedBySLL = 0
+
+    def adaptivePredict(self, input, decision, outerContext):
+        try:
+            self._sllStopIndex = -1
+            self._llStopIndex = -1
+            self.currentDecision = decision
+            start = perf_counter()
+            alt = super(ProfilingATNSimulator, self).adaptivePredict(input, decision, outerContext)
+            stop = perf_counter()
+            info = self.decisions[decision]
+            info.timeInPrediction += stop - start
+            info.invocations += 1
+
+            SLL_k = self._sllStopIndex - self._startIndex + 1
+            info.SLL_TotalLook += SLL_k
+            info.SLL_MinLook = SLL_k if info.SLL_MinLook == 0 else min(info.SLL_MinLook, SLL_k)
+            if SLL_k > info.SLL_MaxLook:
+                info.SLL_MaxLook = SLL_k
+                info.SLL_MaxLookEvent = LookaheadEventInfo(decision, None, alt, input, self._startIndex,
+                                                           self._sllStopIndex, False)
+
+            if self._llStopIndex >= 0:
+                LL_k = self._llStopIndex - self._startIndex + 1
+                info.LL_TotalLook += LL_k
+                info.LL_MinLook = LL_k if info.LL_MinLook == 0 else min(info.LL_MinLook, LL_k)
+                if LL_k > info.LL_MaxLook:
+                    info.LL_MaxLook = LL_k
+                    info.LL_MaxLookEvent = LookaheadEventInfo(decision, None, alt, input, self._startIndex,
+                                                              self._llStopIndex, True)
+            return alt
+        finally:
+            self.currentDecision = -1
+
+    def getExistingTargetState(self, previousD, t):
+        # this method is called after each time the input position advances
+        # during SLL prediction
+        self._sllStopIndex = self._input.index
+        existingTargetState = super(ProfilingATNSimulator, self).getExistingTargetState(previousD, t)
+        if existingTargetState is not None:
+            info = self.decisions[self.currentDecision]
+            # count only if we transition over a DFA state
+            info.SLL_DFATransitions += 1
+            if existingTargetState is self.ERROR:
+                info.errors.append(ErrorInfo(self.currentDecision, None, self._input, self._startIndex,
+                                             self._sllStopIndex, False))
+        self.currentState = existingTargetState
+        return existingTargetState
+
+    def computeTargetState(self, dfa, previousD, t):
+        state = super(ProfilingATNSimulator, self).computeTargetState(dfa, previousD, t)
+        self.currentState = state
+        return state
+
+    def computeReachSet(self, closure, t, fullCtx):
+        if fullCtx:
+            # this method is called after each time the input position
+            # advances during full context prediction
+            self._llStopIndex = self._input.index
+        reachConfigs = super(ProfilingATNSimulator, self).computeReachSet(closure, t, fullCtx)
+        info = self.decisions[self.currentDecision]
+        if fullCtx:
+            # count computation even if error
+            info.LL_ATNTransitions += 1
+        else:
+            info.SLL_ATNTransitions += 1
+        if reachConfigs is None:
+            # no reach on current lookahead symbol. ERROR.
+            stopIndex = self._llStopIndex if fullCtx else self._sllStopIndex
+            info.errors.append(ErrorInfo(self.currentDecision, None, self._input, self._startIndex,
+                                         stopIndex, fullCtx))
+        return reachConfigs
+
+    def evalPredicate(self, pred, outerContext, alt, fullCtx):
+        result = super(ProfilingATNSimulator, self).evalPredicate(pred, outerContext, alt, fullCtx)
+        if not isinstance(pred, PrecedencePredicate):
+            stopIndex = self._llStopIndex if self._llStopIndex >= 0 else self._sllStopIndex
+            self.decisions[self.currentDecision].predicateEvals.append(
+                PredicateEvalInfo(self.currentDecision, self._input, self._startIndex, stopIndex,
+                                  pred, result, alt, fullCtx))
+        return result
+
+    def reportAttemptingFullContext(self, dfa, conflictingAlts, configs, startIndex, stopIndex):
+        if conflictingAlts is not None:
+            self.conflictingAltResolvedBySLL = min(conflictingAlts)
+        else:
+            self.conflictingAltResolvedBySLL = min(c.alt for c in configs)
+        self.decisions[self.currentDecision].LL_Fallback += 1
+        super(ProfilingATNSimulator, self).reportAttemptingFullContext(dfa, conflictingAlts, configs,
+                                                                       startIndex, stopIndex)
+
+    def reportContextSensitivity(self, dfa, prediction, configs, startIndex, stopIndex):
+        if prediction != self.conflictingAltResolvedBySLL:
+            self.decisions[self.currentDecision].contextSensitivities.append(
+                ContextSensitivityInfo(self.currentDecision, configs, self._input, startIndex, stopIndex))
+        super(ProfilingATNSimulator, self).reportContextSensitivity(dfa, prediction, configs,
+                                                                    startIndex, stopIndex)
+
+    def reportAmbiguity(self, dfa, D, startIndex, stopIndex, exact, ambigAlts, configs):
+        if ambigAlts is not None:
+            prediction = min(ambigAlts)
+        else:
+            prediction = min(c.alt for c in configs)
+        info = self.decisions[self.currentDecision]
+        if configs.fullCtx and prediction != self.conflictingAltResolvedBySLL:
+            # Even though this is an ambiguity we are reporting, we can
+            # still detect some context sensitivities. Both SLL and LL
+            # are showing a conflict, hence an ambiguity, but if they resolve
+            # to different minimum alternatives we have also identified a
+            # context sensitivity.
+            info.contextSensitivities.append(
+                ContextSensitivityInfo(self.currentDecision, configs, self._input, startIndex, stopIndex))
+        info.ambiguities.append(AmbiguityInfo(self.currentDecision, configs, ambigAlts, self._input,
+                                              startIndex, stopIndex, configs.fullCtx))
+        super(ProfilingATNSimulator, self).reportAmbiguity(dfa, D, startIndex, stopIndex, exact,
+                                                           ambigAlts, configs)
+
+    def getDecisionInfo(self):
+        return self.decisions
+
+    def getCurrentState(self):
+        return self.currentState
+
+
+class TestProfilingATNSimulator(unittest.TestCase):
+
+    TEXT = u"a = 1; b;\ncc = 22;"
+
+    # a generated parser class with DFAs of its own
+    def parserClass(self):
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TParser import TParser
+        class FreshParser(TParser):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TParser.atn.decisionToState) ]
+        return FreshParser
+
+    def parser(self, text, parserClass, profile=True):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4._testgrammar.TLexer import TLexer
+        parser = parserClass(CommonTokenStream(TLexer(ANTLRInputStream(text))))
+        parser._listeners = []
+        parser.setProfile(profile)
+        return parser
+
+    def counts(self, info):
+        return (info.invocations, info.SLL_TotalLook, info.SLL_MinLook, info.SLL_MaxLook,
+                info.SLL_ATNTransitions, info.SLL_DFATransitions, len(info.errors))
+
+    def testDecisionInfo(self):
+        parserClass = self.parserClass()
+        parser = self.parser(self.TEXT, parserClass)
+        tree = parser.prog().toStringTree(recog=parser)
+        decisions = parser.getParseInfo().getDecisionInfo()
+        # only stat predicts, three times with two tokens of lookahead: the
+        # first needs the ATN for both, the second for the ';' after an ID
+        self.assertEqual([ 0, 0 ], [ info.invocations for info in decisions[:2] ])
+        self.assertEqual((3, 6, 2, 2, 3, 3, 0), self.counts(decisions[2]))
+        self.assertEqual((0, 0, 0), (decisions[2].LL_Fallback, decisions[2].LL_TotalLook,
+                                     decisions[2].LL_ATNTransitions))
+        self.assertEqual(2, decisions[2].SLL_MaxLookEvent.stopIndex - decisions[2].SLL_MaxLookEvent.startIndex + 1)
+        # the DFA has every edge now
+        parser = self.parser(self.TEXT, parserClass)
+        self.assertEqual(tree, parser.prog().toStringTree(recog=parser))
+        self.assertEqual((3, 6, 2, 2, 0, 6, 0), self.counts(parser.getParseInfo().getDecisionInfo()[2]))
+        parser.setProfile(False)
+        self.assertIsNone(parser.getParseInfo())
+        parser = self.parser(self.TEXT, parserClass, False)
+        self.assertEqual(tree, parser.prog().toStringTree(recog=parser))
+
+    def testErrors(self):
+        parser = self.parser(u"a b;", self.parserClass())
+        parser.prog()
+        info = parser.getParseInfo().getDecisionInfo()[2]
+        # recovery consumes nothing the first time, so stat fails twice at
+        # 'a b', with the ATN and then with the error edge it added, before
+        # predicting 'b;' with the ATN for the ';'
+        self.assertEqual((1, 2, 2, 2, 3, 3, 2), self.counts(info))
+        self.assertEqual([ (0, 1, False) ] * 2, [ (e.startIndex, e.stopIndex, e.fullCtx) for e in info.errors ])
+
@@ -0,0 +1,203 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# A {@link LexerATNSimulator} that records statistics about the tokens it
+# matches in a {@link MatchInfo} per mode and per token type: how many and
+# how long they are, the time spent, how many characters followed DFA
+# edges and how many had to use the ATN, and the closure work, predicate
+# evaluations and edges predicates kept out of the DFA.
+#
+# <p>Use {@link Lexer#setProfile} to switch a lexer to it, and
+# {@link Lexer#getLexInfo} to get the statistics. It shares the DFA of the
+# simulator it replaces. The tables of frozen and compiled DFA mode are not
+# scanned while profiling, since they don't tell which characters would
+# have needed the ATN; the DFA they are built from is.</p>
+import unittest
+
+from antlr4._compat import perf_counter
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.MatchInfo import MatchInfo
+from antlr4.Errors import LexerNoViableAltException
+from antlr4.Token import Token
+
+
+class ProfilingLexerATNSimulator(LexerATNSimulator):
+
+    def __init__(self, lexer):
+        interp = lexer._interp
+        super(ProfilingLexerATNSimulator, self).__init__(lexer, interp.atn, interp.decisionToDFA,
+                                                         interp.sharedContextCache)
+        self.copyState(interp)
+        self.copySettings(interp)
+        self.modes = [ MatchInfo(i) for i in range(len(self.atn.modeToStartState)) ]
+        self.tokenTypes = dict()
+        # the statistics of the current match, or {@code None} outside match
+        # (in buildDFA, for example)
+        self.currentMatch = None
+
+    def match(self, input, mode):
+        current = self.currentMatch = MatchInfo(None)
+        start = perf_counter()
+        ttype = Token.INVALID_TYPE
+        try:
+            ttype = super(ProfilingLexerATNSimulator, self).match(input, mode)
+            return ttype
+        except LexerNoViableAltException:
+            current.errors = 1
+            raise
+        finally:
+            current.time = perf_counter() - start
+            current.matches = 1
+            current.chars = current.maxChars = input.index - self.startIndex
+            self.currentMatch = None
+            self.modes[mode].add(current)
+            info = self.tokenTypes.get(ttype, None)
+            if info is None:
+                info = self.tokenTypes[ttype] = MatchInfo(ttype)
+            info.add(current)
+
+    def matchFrozen(self, input, dfa):
+        # take the DFA and ATN path
+        return None
+
+    def getExistingTargetState(self, s, t):
+        target = super(ProfilingLexerATNSimulator, self).getExistingTargetState(s, t)
+        current = self.currentMatch
+        if current is not None:
+            if target is not None:
+                current.DFATransitions += 1
+            else:
+                current.ATNTransitions += 1
+                if t > self.MAX_DFA_EDGE:
+                    current.sparseATNTransitions += 1
+        return target
+
+    def computeTargetState(self, input, s, t):
+        start = perf_counter()
+        try:
+            return super(ProfilingLexerATNSimulator, self).computeTargetState(input, s, t)
+        finally:
+            if self.currentMatch is not None:
+                self.currentMatch.ATNTime += perf_counter() - start
+
+    def computeStartState(self, input, p):
+        start = perf_counter()
+        configs = super(ProfilingLexerATNSimulator, self).computeStartState(input, p)
+        current = self.currentMatch
+        if current is not None:
+            current.ATNTime += perf_counter() - start
+            current.ATNStartStates += 1
+            if configs.hasSemanticContext:
+                current.suppressedEdges += 1
+        return configs
+
+    def addDFAEdge(self, from_, tk, to=None, cfgs=None):
+        if to is None and cfgs is not None and cfgs.hasSemanticContext and self.currentMatch is not None:
+            self.currentMatch.suppressedEdges += 1
+        return super(ProfilingLexerATNSimulator, self).addDFAEdge(from_, tk, to, cfgs)
+
+    def closure(self, input, config, configs, currentAltReachedAcceptState,
+                speculative, treatEofAsEpsilon):
+        if self.currentMatch is not None:
+            self.currentMatch.closureOps += 1
+        return super(ProfilingLexerATNSimulator, self).closure(input, config, configs,
+                                    currentAltReachedAcceptState, speculative, treatEofAsEpsilon)
+
+    def evaluatePredicate(self, input, ruleIndex, predIndex, speculative):
+        if self.currentMatch is not None:
+            self.currentMatch.predicateEvals += 1
+        return super(ProfilingLexerATNSimulator, self).evaluatePredicate(input, ruleIndex, predIndex, speculative)
+
+    # Return the {@link MatchInfo} of every mode, indexed by mode.
+    def getModeInfo(self):
+        return self.modes
+
+    # Return the {@link MatchInfo} of every token type matched, by token
+    # type. Failed matches count under {@link Token#INVALID_TYPE}.
+    def getTokenTypeInfo(self):
+        return self.tokenTypes
+
+
+class TestProfilingLexerATNSimulator(unittest.TestCase):
+
+    TEXT = u"a = 1; b;\ncc = 22;"
+
+    # a generated lexer class with DFAs of its own
+    def lexerClass(self):
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TLexer import TLexer
+        class FreshLexer(TLexer):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+        return FreshLexer
+
+    def lex(self, text, lexerClass, profile=True, frozen=False):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        lexer = lexerClass(ANTLRInputStream(text))
+        lexer._listeners = []
+        lexer.setFrozenDFA(frozen)
+        lexer.setProfile(profile)
+        tokens = [ (t.type, t.start, t.stop) for t in lexer.getAllTokens() ]
+        return lexer, tokens
+
+    def testMatchInfo(self):
+        from antlr4._testgrammar.TLexer import TLexer
+        lexerClass = self.lexerClass()
+        lexer, tokens = self.lex(self.TEXT, lexerClass)
+        info = lexer.getLexInfo()
+        mode = info.getModeInfo()[0]
+        self.assertEqual((16, 18, 2, 0, 1), (mode.matches, mode.chars, mode.maxChars, mode.errors,
+                                             mode.ATNStartStates))
+        # every match follows an edge for each of its characters and for the
+        # one after it, which ends it
+        self.assertEqual(mode.chars + mode.matches, mode.DFATransitions + mode.ATNTransitions)
+        self.assertEqual({ TLexer.ID: (3, 4, 2), TLexer.NUM: (2, 3, 2), TLexer.WS: (6, 6, 1),
+                           TLexer.SEMI: (3, 3, 1), TLexer.EQ: (2, 2, 1) },
+                         dict((key, (i.matches, i.chars, i.maxChars))
+                              for key, i in info.getTokenTypeInfo().items()))
+        # the DFA has every edge now, but the end of the input never gets one;
+        # frozen DFA mode makes no difference
+        for frozen in (False, True):
+            lexer, warmTokens = self.lex(self.TEXT, lexerClass, frozen=frozen)
+            self.assertEqual(tokens, warmTokens)
+            mode = lexer.getLexInfo().getModeInfo()[0]
+            self.assertEqual((16, 33, 1, 0, 0), (mode.matches, mode.DFATransitions, mode.ATNTransitions,
+                                                 mode.ATNStartStates, mode.closureOps))
+        lexer.setProfile(False)
+        self.assertIsNone(lexer.getLexInfo())
+        self.assertEqual(tokens, self.lex(self.TEXT, lexerClass, False)[1])
+
+    def testErrors(self):
+        lexer, tokens = self.lex(u"x # 1;", self.lexerClass())
+        info = lexer.getLexInfo()
+        self.assertEqual((6, 1, 5), (info.getModeInfo()[0].matches, info.getModeInfo()[0].errors,
+                                     info.getModeInfo()[0].chars))
+        invalid = info.getTokenTypeInfo()[Token.INVALID_TYPE]
+        self.assertEqual((1, 1, 0), (invalid.matches, invalid.errors, invalid.chars))
+
@@ -27,9 +27,12 @@
 #  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 #  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
 #  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import threading
+import unittest
 
 from antlr4._compat import py2_unicode_compat, text_type
 from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNState import StarLoopEntryState
 from antlr4.dfa.DFAState import DFAState
 from antlr4.Errors import IllegalStateException
 
@@ -49,7 +52,26 @@ class DFA(object):
         # {@code false}. This is the backing field for {@link #isPrecedenceDfa},
         # {@link #setPrecedenceDfa}.
         self.precedenceDfa = False
-
+        # Serializes the changes to this DFA: adding a state or an edge. The
+        #  simulators read the DFA without it, so every change publishes a
+        #  finished object with a single assignment.
+        self.lock = threading.Lock()
+        # Decide up front whether this is a precedence DFA, rather than when
+        #  prediction first gets here, which could clear the states another
+        #  thread has just added.
+        if isinstance(atnStartState, StarLoopEntryState) and atnStartState.precedenceRuleDecision:
+            self.precedenceDfa = True
+            self.clear()
+        # The flat tables of a lexer DFA scanned in frozen DFA mode, or
+        # {@code None}; see {@link FrozenLexerDFA}.
+        self.frozen = None
+        # The states added since the last automatic compaction, and the ones
+        #  added before them, which {@link #settle} compacts next.
+        self.recentStates = []
+        self.settlingStates = []
+        # Set by the simulators every time they use this DFA, and reset by
+        #  {@link MemoryGovernor#enforce} to find the DFAs nobody uses.
+        self.used = False
 
     # Get the start state for a specific precedence value.
     #
@@ -88,10 +110,11 @@ class DFA(object):
         # synchronization on s0 here is ok. when the DFA is turned into a
         # precedence DFA, s0 will be initialized once and not updated again
         # s0.edges is never null for a precedence DFA
-        if precedence >= len(self.s0.edges):
-            ext = [None] * (precedence + 1 - len(self.s0.edges))
-            self.s0.edges.extend(ext)
-        self.s0.edges[precedence] = startState
+        with self.lock:
+            if precedence >= len(self.s0.edges):
+                ext = [None] * (precedence + 1 - len(self.s0.edges))
+                self.s0.edges.extend(ext)
+            self.s0.edges[precedence] = startState
     #
     # Sets whether this is a precedence DFA. If the specified value differs
     # from the current DFA configuration, the following actions are taken;
@@ -110,22 +133,98 @@ class DFA(object):
     # {@code false}
 
     def setPrecedenceDfa(self, precedenceDfa):
-        if self.precedenceDfa != precedenceDfa:
-            self._states = dict()
-            if precedenceDfa:
-                precedenceState = DFAState(ATNConfigSet())
-                precedenceState.edges = []
-                precedenceState.isAcceptState = False
-                precedenceState.requiresFullContext = False
-                self.s0 = precedenceState
-            else:
-                self.s0 = None
-            self.precedenceDfa = precedenceDfa
+        with self.lock:
+            if self.precedenceDfa != precedenceDfa:
+                self.precedenceDfa = precedenceDfa
+                self.clear()
+
+    # Drop all states of this DFA, which prediction then builds again as it
+    # needs them. This must not be called while a recognizer is using the
+    # DFA.
+    def clear(self):
+        self._states = dict()
+        if self.precedenceDfa:
+            precedenceState = DFAState(ATNConfigSet())
+            precedenceState.edges = []
+            precedenceState.isAcceptState = False
+            precedenceState.requiresFullContext = False
+            self.s0 = precedenceState
+        else:
+            self.s0 = None
+        self.frozen = None
+        self.recentStates = []
+        self.settlingStates = []
 
     @property
     def states(self):
         return self._states
 
+    # Save the states of all DFAs in {@code decisionToDFA}, which must all be
+    # built from the same ATN, to a binary file. The file can be loaded with
+    # {@link #load} by another process to start from a warm DFA.
+    #
+    # @see DFAWriter
+    @staticmethod
+    def save(decisionToDFA, fileName):
+        from antlr4.dfa.DFAStore import DFAWriter
+        atn = decisionToDFA[0].atnStartState.atn
+        DFAWriter(atn).write(decisionToDFA, fileName)
+
+    # Replace the states of all DFAs in {@code decisionToDFA} with the states
+    # saved to {@code fileName} by {@link #save}. This must not be called
+    # while a recognizer is using the DFAs.
+    #
+    # @return {@code true} if the file was loaded, {@code false} if it was
+    # saved for a different ATN or is truncated or corrupt.
+    # @see DFAReader
+    @staticmethod
+    def load(decisionToDFA, fileName):
+        from antlr4.dfa.DFAStore import DFAReader
+        atn = decisionToDFA[0].atnStartState.atn
+        return DFAReader(atn).read(decisionToDFA, fileName)
+
+    # Compact the ATN configuration sets of the states of this DFA (see
+    # {@link DFAState#compact}), except the start states and the states that
+    # require full context prediction, whose sets are used every time
+    # prediction reaches them. A compacted state rebuilds its set if
+    # prediction needs it again, to compute a missing edge or report an
+    # error. Parser DFAs only; the lexer uses the set of the last state of
+    # every token.
+    #
+    # @return the number of states compacted.
+    def compact(self):
+        with self.lock:
+            return self.compactStates(self._states)
+
+    def compactStates(self, states):
+        if self.precedenceDfa:
+            startStates = set(id(s) for s in self.s0.edges if s is not None)
+        else:
+            startStates = set([ id(self.s0) ])
+        n = 0
+        for s in states:
+            if s.requiresFullContext or id(s) in startStates:
+                continue
+            # a compacted state drops the set it has rebuilt since
+            if s.compact():
+                n += 1
+        return n
+
+    # Record that prediction added {@code state} to this DFA, and compact
+    # the states added before the last {@code interval} states once as many
+    # again have been added, so a state is compacted once prediction has had
+    # a while to compute its edges.
+    #
+    # Called with {@link #lock} held.
+    #
+    # @see ParserATNSimulator#compactDFAInterval
+    def settle(self, state, interval):
+        self.recentStates.append(state)
+        if len(self.recentStates) >= interval:
+            self.compactStates(self.settlingStates)
+            self.settlingStates = self.recentStates
+            self.recentStates = []
+
     # Return a list of all states in this DFA, ordered by state number.
     def sortedStates(self):
         return sorted(self._states.keys(), key=lambda state: state.stateNumber)
@@ -146,3 +245,238 @@ class DFA(object):
         from antlr4.dfa.DFASerializer import LexerDFASerializer
         serializer = LexerDFASerializer(self)
         return text_type(serializer)
+
+
+class TestDFA(unittest.TestCase):
+
+    # a generated parser class with DFAs of its own
+    def parserClass(self):
+        from antlr4._testgrammar.TParser import TParser
+        class FreshParser(TParser):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TParser.atn.decisionToState) ]
+        return FreshParser
+
+    def parse(self, parserClass, text, compactDFAInterval=0):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4._testgrammar.TLexer import TLexer
+        parser = parserClass(CommonTokenStream(TLexer(ANTLRInputStream(text))))
+        parser._listeners = []
+        parser._interp.compactDFAInterval = compactDFAInterval
+        return parser.prog().toStringTree(recog=parser)
+
+    def testCompactedConfigs(self):
+        parserClass = self.parserClass()
+        text = u"x = 1; y;"
+        expected = self.parse(parserClass, text)
+        dfa = parserClass.decisionsToDFA[2]
+        states = [ s for s in dfa.states if s is not dfa.s0 ]
+        before = [ s.configs for s in states ]
+        self.assertEqual(len(states), dfa.compact())
+        expanded = []
+        for s, configs in zip(states, before):
+            self.assertTrue(s.isCompact())
+            self.assertIsNone(s.expandedConfigs)
+            expanded.append(s.configs)
+            # rebuilt once, equal to the original
+            self.assertIs(expanded[-1], s.configs)
+            self.assertEqual(configs, expanded[-1])
+            self.assertEqual(hash(configs), hash(expanded[-1]))
+            self.assertEqual(configs.configs, expanded[-1].configs)
+            self.assertTrue(expanded[-1].readonly)
+        self.assertEqual(expected, self.parse(parserClass, text))
+        # compacting again drops the rebuilt sets
+        self.assertEqual(0, dfa.compact())
+        for s, configs in zip(states, expanded):
+            self.assertIsNone(s.expandedConfigs)
+            self.assertIsNot(configs, s.configs)
+            self.assertEqual(configs, s.configs)
+
+    # A parser simulator over an ATN of {@code n} basic states, a DFA for
+    # its first state, and a function creating a DFA state for a state
+    # number.
+    def simulator(self, n):
+        from antlr4.atn.ATN import ATN
+        from antlr4.atn.ATNConfig import ATNConfig
+        from antlr4.atn.ATNState import BasicState
+        from antlr4.atn.ATNType import ATNType
+        from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+        from antlr4.atn.PredictionContext import PredictionContext, PredictionContextCache
+        atn = ATN(ATNType.PARSER, 100)
+        for i in range(n):
+            state = BasicState()
+            state.stateNumber = i
+            atn.states.append(state)
+        dfa = DFA(atn.states[0])
+        simulator = ParserATNSimulator(None, atn, [dfa], PredictionContextCache())
+
+        def newState(i):
+            configs = ATNConfigSet()
+            configs.add(ATNConfig(atn.states[i], 1, PredictionContext.EMPTY))
+            configs.setReadonly(True)
+            return DFAState(configs=configs)
+        return dfa, simulator, newState
+
+    def testConcurrentUpdates(self):
+        dfa, simulator, newState = self.simulator(200)
+
+        # every thread adds its own copy of the same states and edges
+        results = []
+        def run():
+            targets = []
+            for i in range(1, 200):
+                targets.append(simulator.addDFAEdge(dfa, dfa.s0, i % 100, newState(i)))
+            results.append(targets)
+        dfa.s0 = simulator.addDFAState(dfa, newState(0))
+        threads = [ threading.Thread(target=run) for i in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(200, len(dfa.states))
+        self.assertEqual(list(range(200)), sorted(s.stateNumber for s in dfa.states))
+        for targets in results[1:]:
+            self.assertTrue(all(a is b for a, b in zip(results[0], targets)))
+        for i in range(100, 200):
+            self.assertTrue(simulator.getExistingTargetState(dfa.s0, i % 100) is results[0][i - 1])
+
+    def testSparseEdges(self):
+        dfa, simulator, newState = self.simulator(20)
+        dfa.s0 = simulator.addDFAState(dfa, newState(0))
+        targets = [ simulator.addDFAEdge(dfa, dfa.s0, t, newState(t + 1)) for t in range(12) ]
+        # 12 edges of 102 slots stay in the dictionary, also when one of them
+        # is replaced
+        targets[11] = simulator.addDFAEdge(dfa, dfa.s0, 11, newState(13))
+        self.assertIsNone(dfa.s0.edges)
+        self.assertEqual(list(range(1, 13)), sorted(dfa.s0.sparseEdges.keys()))
+        for t, target in enumerate(targets):
+            self.assertIs(target, simulator.getExistingTargetState(dfa.s0, t))
+        self.assertIsNone(simulator.getExistingTargetState(dfa.s0, 12))
+        # the 13th switches to the list
+        targets.append(simulator.addDFAEdge(dfa, dfa.s0, 12, newState(14)))
+        self.assertIsNone(dfa.s0.sparseEdges)
+        self.assertEqual(102, len(dfa.s0.edges))
+        for t, target in enumerate(targets):
+            self.assertIs(target, simulator.getExistingTargetState(dfa.s0, t))
+        self.assertIsNone(simulator.getExistingTargetState(dfa.s0, 13))
+
+    def testSaveSparseEdges(self):
+        import os
+        import shutil
+        import tempfile
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+        from antlr4._testgrammar.TLexer import TLexer
+        text = u"x = 1; y;"
+        denseEdgeFill = ParserATNSimulator.denseEdgeFill
+        directory = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(directory, "T.dfa")
+            # saved with dictionaries, and saved with lists and given
+            # dictionaries on loading
+            for savedFill in (2, 0):
+                ParserATNSimulator.denseEdgeFill = savedFill
+                parserClass = self.parserClass()
+                expected = self.parse(parserClass, text)
+                DFA.save(parserClass.decisionsToDFA, fileName)
+                ParserATNSimulator.denseEdgeFill = 2
+                loadedClass = self.parserClass()
+                DFA.load(loadedClass.decisionsToDFA, fileName)
+                edges = dict()
+                for s in parserClass.decisionsToDFA[2].states:
+                    edges[s.stateNumber] = sorted(i for i, t in enumerate(s.edges or []) if t is not None) \
+                                           or sorted((s.sparseEdges or {}).keys())
+                states = loadedClass.decisionsToDFA[2].states
+                self.assertEqual(len(edges), len(states))
+                for s in states:
+                    self.assertIsNone(s.edges)
+                    self.assertEqual(edges[s.stateNumber], sorted((s.sparseEdges or {}).keys()))
+                # every prediction follows the loaded edges
+                parser = loadedClass(CommonTokenStream(TLexer(ANTLRInputStream(text))))
+                parser._listeners = []
+                parser.setProfile(True)
+                self.assertEqual(expected, parser.prog().toStringTree(recog=parser))
+                info = parser.getParseInfo().getDecisionInfo()[2]
+                self.assertEqual((0, 4), (info.SLL_ATNTransitions, info.SLL_DFATransitions))
+                self.assertEqual(len(edges), len(states))
+        finally:
+            ParserATNSimulator.denseEdgeFill = denseEdgeFill
+            shutil.rmtree(directory)
+
+    def testSettle(self):
+        dfa, simulator, newState = self.simulator(12)
+        simulator.compactDFAInterval = 3
+        states = []
+        compacted = []
+        for i in range(12):
+            states.append(simulator.addDFAState(dfa, newState(i)))
+            if i == 0:
+                dfa.s0 = states[0]
+            elif i == 4:
+                states[4].requiresFullContext = True
+            compacted.append([ s.stateNumber for s in states if s.isCompact() ])
+        # each batch of three is compacted once the next batch is complete,
+        # except the start state and states requiring full context
+        self.assertEqual([ [] ] * 5 + [ [1, 2] ] * 3 + [ [1, 2, 3, 5] ] * 3 + [ [1, 2, 3, 5, 6, 7, 8] ], compacted)
+        self.assertEqual([], dfa.recentStates)
+        self.assertEqual(states[9:], dfa.settlingStates)
+        dfa.clear()
+        self.assertEqual(([], []), (dfa.recentStates, dfa.settlingStates))
+
+    def testConcurrentSettle(self):
+        dfa, simulator, newState = self.simulator(801)
+        simulator.compactDFAInterval = 7
+        dfa.s0 = simulator.addDFAState(dfa, newState(0))
+        def run(offset):
+            for i in range(offset, 801, 8):
+                simulator.addDFAState(dfa, newState(i))
+        threads = [ threading.Thread(target=run, args=(i + 1,)) for i in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # every state is in exactly one place: compacted, or waiting in one
+        # of the two batches
+        recent = set(id(s) for s in dfa.recentStates)
+        settling = set(id(s) for s in dfa.settlingStates)
+        self.assertEqual(801 % 7, len(recent))
+        self.assertEqual(7, len(settling))
+        self.assertFalse(recent & settling)
+        for s in dfa.states:
+            waiting = id(s) in recent or id(s) in settling
+            self.assertEqual(not waiting and s is not dfa.s0, s.isCompact())
+
+    def testSettleWhileParsing(self):
+        text = u"\n".join(u"x = %d; y;" % i for i in range(20))
+        parserClass = self.parserClass()
+        expected = self.parse(parserClass, text)
+        compactingClass = self.parserClass()
+        self.assertEqual(expected, self.parse(compactingClass, text, 1))
+        dfa = compactingClass.decisionsToDFA[2]
+        self.assertTrue(any(s.isCompact() for s in dfa.states))
+        self.assertEqual(expected, self.parse(compactingClass, text, 1))
+
+    def testSaveCompacted(self):
+        import os
+        import shutil
+        import tempfile
+        parserClass = self.parserClass()
+        text = u"x = 1; y;"
+        expected = self.parse(parserClass, text)
+        dfa = parserClass.decisionsToDFA[2]
+        compacted = dfa.compact()
+        directory = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(directory, "T.dfa")
+            DFA.save(parserClass.decisionsToDFA, fileName)
+            # saving leaves the states as compact as it found them
+            self.assertEqual(compacted, sum(1 for s in dfa.states if s.isCompact()))
+            self.assertTrue(all(s.expandedConfigs is None for s in dfa.states))
+            loadedClass = self.parserClass()
+            DFA.load(loadedClass.decisionsToDFA, fileName)
+            self.assertEqual(len(dfa.states), len(loadedClass.decisionsToDFA[2].states))
+            self.assertEqual(expected, self.parse(loadedClass, text))
+            self.assertEqual(len(dfa.states), len(loadedClass.decisionsToDFA[2].states))
+        finally:
+            shutil.rmtree(directory)
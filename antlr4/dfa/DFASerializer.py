@@ -48,11 +48,12 @@ class DFASerializer(object):
             return None
         buf = StringBuilder()
         for s in self.dfa.sortedStates():
-            n = 0
+            edges = []
             if s.edges is not None:
-                n = len(s.edges)
-            for i in range(0, n):
-                t = s.edges[i]
+                edges.extend(enumerate(s.edges))
+            if s.sparseEdges is not None:
+                edges.extend(sorted(s.sparseEdges.items()))
+            for i, t in edges:
                 if t is not None and t.stateNumber != 0x7FFFFFFF:
                     buf.append(self.getStateString(s))
                     label = self.getEdgeLabel(i)
@@ -33,7 +33,8 @@
 # Map a predicate to a predicted alternative.#/
 from antlr4._compat import py2_unicode_compat, text_type
 from antlr4._java import StringBuilder
-from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNConfig import ATNConfig, LexerATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet, OrderedATNConfigSet
 
 
 @py2_unicode_compat
@@ -74,10 +75,22 @@ class DFAState(object):
 
     def __init__(self, stateNumber=-1, configs=ATNConfigSet()):
         self.stateNumber = stateNumber
-        self.configs = configs
+        # The ATN configurations of this state, or {@code None} while
+        #  {@link #compactConfigs} holds them (see {@link #compact}).
+        self._configs = configs
+        self.compactConfigs = None
+        # The set {@link #configs} last rebuilt from {@link #compactConfigs},
+        #  kept until the next {@link #compact}.
+        self.expandedConfigs = None
         # {@code edges[symbol]} points to target of symbol. Shift up by 1 so (-1)
         #  {@link Token#EOF} maps to {@code edges[0]}.
         self.edges = None
+        # Edges for symbols past the end of {@link #edges}, keyed by their index
+        #  in {@link #edges}. The lexer keeps a dense {@link #edges} array for
+        #  ASCII only and caches edges for all other characters here. The
+        #  parser keeps all edges of a state here while it has few of them,
+        #  with {@link #edges} null (see ParserATNSimulator.denseEdgeFill).
+        self.sparseEdges = None
         self.isAcceptState = False
         # if accept state, what ttype do we match or alt do we predict?
         #  This is set to {@link ATN#INVALID_ALT_NUMBER} when {@link #predicates}{@code !=null} or
@@ -102,7 +115,51 @@ class DFAState(object):
         #  <p>This list is computed by {@link ParserATNSimulator#predicateDFAState}.</p>
         self.predicates = None
 
+    # The ATN configuration set of this state. A compacted state rebuilds it
+    #  when first asked, and keeps it in {@link #expandedConfigs} until it is
+    #  compacted again; the simulators only need it to compute a missing edge
+    #  or to report an error. {@link #compactConfigs} stays set, since the
+    #  simulators read states without a lock.
+    @property
+    def configs(self):
+        configs = self._configs
+        if configs is None:
+            # compact sets compactConfigs before it drops _configs
+            compactConfigs = self.compactConfigs
+            if compactConfigs is not None:
+                configs = self.expandedConfigs
+                if configs is None:
+                    configs = self.expandedConfigs = compactConfigs.expand()
+        return configs
 
+    @configs.setter
+    def configs(self, configs):
+        self._configs = configs
+        self.compactConfigs = None
+        self.expandedConfigs = None
+
+    # Replace the ATN configuration set of this state with a
+    #  {@link CompactConfigs}. Once the edges of a state are computed,
+    #  prediction follows them and only needs the configurations to find the
+    #  state again in {@link DFA#states}, which the compact form still
+    #  supports; the set and its {@link ATNConfig} objects take several times
+    #  as much memory.
+    #
+    #  A state compacted before drops the set it has rebuilt since.
+    #
+    #  @return {@code true} if the state was compacted.
+    def compact(self):
+        self.expandedConfigs = None
+        configs = self._configs
+        if configs is None or len(configs) == 0:
+            return False
+        # set before the configurations are dropped, for lock free readers
+        self.compactConfigs = CompactConfigs(configs)
+        self._configs = None
+        return True
+
+    def isCompact(self):
+        return self.compactConfigs is not None
 
     # Get the set of all alts mentioned by all ATN configurations in this
     #  DFA state.
@@ -117,7 +174,9 @@ class DFAState(object):
             return alts
 
     def __hash__(self):
-        return hash(self.configs)
+        if self.compactConfigs is not None:
+            return self.compactConfigs.hashCode
+        return hash(self._configs)
 
     # Two {@link DFAState} instances are equal if their ATN configuration sets
     # are the same. This method is used to see if a state already exists.
@@ -136,8 +195,18 @@ class DFAState(object):
             return True
         elif not isinstance(other, DFAState):
             return False
+        elif self.compactConfigs is None and other.compactConfigs is None:
+            return self._configs==other._configs
         else:
-            return self.configs==other.configs
+            # compare without expanding a compacted state
+            return self.configsKey() == other.configsKey()
+
+    def configsKey(self):
+        if self.compactConfigs is not None:
+            return self.compactConfigs.key()
+        if self._configs is None:
+            return None
+        return CompactConfigs(self._configs).key()
 
     def __str__(self):
         buf = StringBuilder()
@@ -151,3 +220,68 @@ class DFAState(object):
             else:
                 buf.append(text_type(self.prediction))
         return buf.toString()
+
+
+# The ATN configurations of a compacted {@link DFAState}: the fields of
+# every configuration in one flat tuple, with the fields of the set and its
+# hash code. {@link #key} returns what {@link ATNConfigSet#__eq__} compares,
+# and {@link #expand} rebuilds the set.
+class CompactConfigs(object):
+
+    __slots__ = ('hashCode', 'lexer', 'fullCtx', 'uniqueAlt', 'conflictingAlts',
+                 'hasSemanticContext', 'dipsIntoOuterContext', 'fields')
+
+    def __init__(self, configs):
+        self.hashCode = hash(configs)
+        self.lexer = isinstance(configs, OrderedATNConfigSet)
+        self.fullCtx = configs.fullCtx
+        self.uniqueAlt = configs.uniqueAlt
+        self.conflictingAlts = configs.conflictingAlts
+        self.hasSemanticContext = configs.hasSemanticContext
+        self.dipsIntoOuterContext = configs.dipsIntoOuterContext
+        fields = []
+        if self.lexer:
+            for c in configs:
+                fields.extend((c.state, c.alt, c.context, c.semanticContext, c.reachesIntoOuterContext,
+                               c.lexerActionExecutor, c.passedThroughNonGreedyDecision))
+        else:
+            for c in configs:
+                fields.extend((c.state, c.alt, c.context, c.semanticContext, c.reachesIntoOuterContext))
+        self.fields = tuple(fields)
+
+    def width(self):
+        return 7 if self.lexer else 5
+
+    def key(self):
+        width = self.width()
+        fields = self.fields
+        configs = tuple((fields[i].stateNumber,) + fields[i + 1:i + 4] + fields[i + 5:i + width]
+                        for i in range(0, len(fields), width))
+        return (self.fullCtx, self.uniqueAlt, self.conflictingAlts, self.hasSemanticContext,
+                self.dipsIntoOuterContext, configs)
+
+    def expand(self):
+        if self.lexer:
+            configs = OrderedATNConfigSet()
+        else:
+            configs = ATNConfigSet()
+        configs.fullCtx = self.fullCtx
+        fields = self.fields
+        if self.lexer:
+            for i in range(0, len(fields), 7):
+                c = LexerATNConfig(fields[i], fields[i + 1], fields[i + 2], fields[i + 3], fields[i + 5])
+                c.reachesIntoOuterContext = fields[i + 4]
+                c.passedThroughNonGreedyDecision = fields[i + 6]
+                configs.add(c)
+        else:
+            for i in range(0, len(fields), 5):
+                c = ATNConfig(fields[i], fields[i + 1], fields[i + 2], fields[i + 3])
+                c.reachesIntoOuterContext = fields[i + 4]
+                configs.add(c)
+        configs.uniqueAlt = self.uniqueAlt
+        configs.conflictingAlts = self.conflictingAlts
+        configs.hasSemanticContext = self.hasSemanticContext
+        configs.dipsIntoOuterContext = self.dipsIntoOuterContext
+        configs.setReadonly(True)
+        configs.cachedHashCode = self.hashCode
+        return configs
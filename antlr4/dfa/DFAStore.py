@@ -0,0 +1,576 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#/
+
+# Binary snapshots of the DFA built by an ATN simulator.
+#
+# <p>All recognizers of a grammar share one DFA per decision (or lexer mode),
+# which starts out empty in every process and is filled in as input is
+# recognized. A snapshot written by {@link DFAWriter} lets another process
+# start with the DFA of a previous run instead. A snapshot holds the complete
+# state of every {@link DFAState}, including its ATN configurations, so the
+# simulator can keep extending a loaded DFA exactly as if it had built the
+# states itself.</p>
+#
+# <p>A snapshot is only valid for the ATN it was built from. It is keyed by
+# {@link ATN#checksum}, and {@link DFAReader} ignores snapshots whose key or
+# format version does not match.</p>
+#
+# <p>The file starts with a fixed header followed by a stream of 32-bit
+# little-endian integers holding the prediction context, semantic context
+# and lexer action executor tables, followed by the DFAs themselves.</p>
+import struct
+import sys
+import unittest
+from array import array
+
+from antlr4._compat import array_frombytes, array_tobytes
+from antlr4.atn.ATNConfig import ATNConfig, LexerATNConfig
+from antlr4.atn.ATNConfigSet import ATNConfigSet, OrderedATNConfigSet
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.ATNType import ATNType
+from antlr4.atn.LexerAction import LexerIndexedCustomAction
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from antlr4.atn.PredictionContext import (ArrayPredictionContext,
+                                          PredictionContext,
+                                          SingletonPredictionContext)
+from antlr4.atn.SemanticContext import (AND, OR, PrecedencePredicate,
+                                        Predicate, SemanticContext)
+from antlr4.dfa.DFAState import DFAState, PredPrediction
+from antlr4.Errors import IllegalStateException
+
+MAGIC = b"ANTLRDFA"
+
+SERIALIZED_VERSION = 2
+
+HEADER = struct.Struct("<8sHH")
+
+# reference to {@link ATNSimulator#ERROR} in an edge table
+ERROR_STATE = -2
+
+# prediction context record kinds; index 0 is always the empty context
+SINGLETON_CONTEXT = 1
+ARRAY_CONTEXT = 2
+
+# semantic context record kinds; index 0 is always {@link SemanticContext#NONE}
+PREDICATE = 1
+PRECEDENCE_PREDICATE = 2
+AND_CONTEXT = 3
+OR_CONTEXT = 4
+
+
+class DFAWriter(object):
+
+    def __init__(self, atn):
+        if atn.checksum is None:
+            raise IllegalStateException("Cannot save the DFA of an ATN without a checksum.")
+        self.atn = atn
+        self.isLexer = atn.grammarType == ATNType.LEXER
+        self.contexts = array("i", [0])
+        self.contextIds = { id(PredictionContext.EMPTY): 0 }
+        self.semantics = array("i", [0])
+        self.semanticIds = { id(SemanticContext.NONE): 0 }
+        self.executors = array("i", [0])
+        self.executorIds = dict()
+        self.actionIds = dict((id(a), i) for i, a in enumerate(atn.lexerActions or []))
+        self.dfas = array("i")
+
+    def write(self, decisionToDFA, fileName):
+        self.dfas.append(len(decisionToDFA))
+        for dfa in decisionToDFA:
+            self.writeDFA(dfa)
+        data = array("i")
+        for table in (self.contexts, self.semantics, self.executors, self.dfas):
+            data.extend(table)
+        if sys.byteorder == "big":
+            data.byteswap()
+        key = self.atn.checksum.encode("ascii")
+        with open(fileName, "wb") as f:
+            f.write(HEADER.pack(MAGIC, SERIALIZED_VERSION, len(key)))
+            f.write(key)
+            f.write(array_tobytes(data))
+
+    def writeDFA(self, dfa):
+        out = self.dfas
+        states = dfa.sortedStates()
+        positions = dict((id(s), i) for i, s in enumerate(states))
+        out.append(1 if dfa.precedenceDfa else 0)
+        out.append(len(states))
+        for s in states:
+            self.writeState(s)
+        for s in states:
+            self.writeEdges(s.edges, positions)
+            self.writeSparseEdges(s.sparseEdges, positions)
+        if dfa.s0 is None:
+            out.append(-1)
+        elif dfa.precedenceDfa:
+            out.append(0)
+            self.writeEdges(dfa.s0.edges, positions)
+        else:
+            out.append(positions[id(dfa.s0)])
+
+    def writeState(self, s):
+        out = self.dfas
+        out.append(s.stateNumber)
+        out.append(1 if s.isAcceptState else 0)
+        out.append(s.prediction)
+        out.append(1 if s.requiresFullContext else 0)
+        out.append(self.addExecutor(s.lexerActionExecutor))
+        if s.predicates is None:
+            out.append(-1)
+        else:
+            out.append(len(s.predicates))
+            for p in s.predicates:
+                out.append(self.addSemanticContext(p.pred))
+                out.append(p.alt)
+        compact = s.isCompact()
+        configs = s.configs
+        out.append((1 if configs.fullCtx else 0)
+                   | (2 if configs.hasSemanticContext else 0)
+                   | (4 if configs.dipsIntoOuterContext else 0))
+        out.append(configs.uniqueAlt)
+        if configs.conflictingAlts is None:
+            out.append(-1)
+        else:
+            out.append(len(configs.conflictingAlts))
+            out.extend(sorted(configs.conflictingAlts))
+        out.append(len(configs))
+        for c in configs:
+            out.append(c.state.stateNumber)
+            out.append(c.alt)
+            out.append(self.addContext(c.context))
+            out.append(self.addSemanticContext(c.semanticContext))
+            out.append(c.reachesIntoOuterContext)
+            if self.isLexer:
+                out.append(self.addExecutor(c.lexerActionExecutor))
+                out.append(1 if c.passedThroughNonGreedyDecision else 0)
+        if compact:
+            # drop the set reading it has rebuilt
+            s.compact()
+
+    def writeEdges(self, edges, positions):
+        out = self.dfas
+        if edges is None:
+            out.append(-1)
+            return
+        out.append(len(edges))
+        targets = [ (i, t) for i, t in enumerate(edges) if t is not None ]
+        out.append(len(targets))
+        for i, t in targets:
+            out.append(i)
+            out.append(ERROR_STATE if t is ATNSimulator.ERROR else positions[id(t)])
+
+    def writeSparseEdges(self, sparseEdges, positions):
+        out = self.dfas
+        if sparseEdges is None:
+            out.append(-1)
+            return
+        out.append(len(sparseEdges))
+        for i, t in sorted(sparseEdges.items()):
+            out.append(i)
+            out.append(ERROR_STATE if t is ATNSimulator.ERROR else positions[id(t)])
+
+    # Contexts form a graph which may be deep; add parents before their
+    # children without recursing.
+    def addContext(self, context):
+        if context is None:
+            return -1
+        stack = [ context ]
+        while len(stack)>0:
+            ctx = stack[-1]
+            if id(ctx) in self.contextIds:
+                stack.pop()
+                continue
+            parents = [ ctx.getParent(i) for i in range(len(ctx)) ]
+            pending = [ p for p in parents if p is not None and id(p) not in self.contextIds ]
+            if len(pending)>0:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            out = self.contexts
+            if isinstance(ctx, ArrayPredictionContext):
+                out.append(ARRAY_CONTEXT)
+                out.append(len(ctx))
+            else:
+                out.append(SINGLETON_CONTEXT)
+            for p in parents:
+                out.append(-1 if p is None else self.contextIds[id(p)])
+            for i in range(len(ctx)):
+                out.append(ctx.getReturnState(i))
+            self.contextIds[id(ctx)] = len(self.contextIds)
+            out[0] += 1
+        return self.contextIds[id(context)]
+
+    def addSemanticContext(self, semctx):
+        if semctx is None:
+            return -1
+        index = self.semanticIds.get(id(semctx), None)
+        if index is not None:
+            return index
+        record = []
+        if isinstance(semctx, Predicate):
+            record.extend((PREDICATE, semctx.ruleIndex, semctx.predIndex, 1 if semctx.isCtxDependent else 0))
+        elif isinstance(semctx, PrecedencePredicate):
+            record.extend((PRECEDENCE_PREDICATE, semctx.precedence))
+        else:
+            record.append(AND_CONTEXT if isinstance(semctx, AND) else OR_CONTEXT)
+            record.append(len(semctx.opnds))
+            record.extend([ self.addSemanticContext(o) for o in semctx.opnds ])
+        self.semantics.extend(record)
+        index = len(self.semanticIds)
+        self.semanticIds[id(semctx)] = index
+        self.semantics[0] += 1
+        return index
+
+    def addExecutor(self, executor):
+        if executor is None:
+            return -1
+        index = self.executorIds.get(id(executor), None)
+        if index is not None:
+            return index
+        out = self.executors
+        out.append(len(executor.lexerActions))
+        for action in executor.lexerActions:
+            if isinstance(action, LexerIndexedCustomAction):
+                out.append(action.offset)
+                out.append(self.actionIndex(action.action))
+            else:
+                out.append(-1)
+                out.append(self.actionIndex(action))
+        index = len(self.executorIds)
+        self.executorIds[id(executor)] = index
+        out[0] += 1
+        return index
+
+    def actionIndex(self, action):
+        index = self.actionIds.get(id(action), None)
+        if index is None:
+            index = self.atn.lexerActions.index(action)
+        return index
+
+
+class DFAReader(object):
+
+    def __init__(self, atn):
+        self.atn = atn
+        self.isLexer = atn.grammarType == ATNType.LEXER
+        self.data = None
+        self.pos = 0
+        self.contexts = None
+        self.semantics = None
+        self.executors = None
+        # the longest edge list a state can have: a slot per character of
+        # the lexer's dense range, per token type, or per precedence level
+        self.maxEdges = max(LexerATNSimulator.MAX_DFA_EDGE - LexerATNSimulator.MIN_DFA_EDGE + 1,
+                            atn.maxTokenType + 2, len(atn.states))
+
+    # Replace the states of the DFAs in {@code decisionToDFA} with the ones
+    # stored in {@code fileName}.
+    #
+    # @return {@code true} if the snapshot was loaded, {@code false} if it
+    # was written for a different ATN or by a different format version, or
+    # is truncated or corrupt, in which case {@code decisionToDFA} is left
+    # unchanged.
+    def read(self, decisionToDFA, fileName):
+        with open(fileName, "rb") as f:
+            raw = f.read()
+        if len(raw) < HEADER.size:
+            return False
+        magic, version, keyLength = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != SERIALIZED_VERSION:
+            return False
+        start = HEADER.size + keyLength
+        if self.atn.checksum is None or raw[HEADER.size:start] != self.atn.checksum.encode("ascii"):
+            return False
+        try:
+            loaded = self.readDFAs(decisionToDFA, raw[start:])
+        except (IndexError, ValueError):
+            # the data ended early, or a record referred past its table
+            loaded = None
+        if loaded is None:
+            return False
+        for dfa, (precedenceDfa, states, s0) in zip(decisionToDFA, loaded):
+            dfa.precedenceDfa = precedenceDfa
+            dfa._states = dict((s, s) for s in states)
+            dfa.s0 = s0
+        return True
+
+    def readDFAs(self, decisionToDFA, data):
+        self.data = array("i")
+        array_frombytes(self.data, data)
+        if sys.byteorder == "big":
+            self.data.byteswap()
+        self.pos = 0
+        self.readContexts()
+        self.readSemanticContexts()
+        self.readExecutors()
+        if self.readInt() != len(decisionToDFA):
+            return None
+        loaded = [ self.readDFA() for dfa in decisionToDFA ]
+        if self.pos != len(self.data):
+            return None
+        return loaded
+
+    def readInt(self):
+        i = self.data[self.pos]
+        self.pos += 1
+        return i
+
+    def readContexts(self):
+        self.contexts = [ PredictionContext.EMPTY ]
+        for i in range(self.readInt()):
+            kind = self.readInt()
+            n = 1 if kind == SINGLETON_CONTEXT else self.readInt()
+            parents = [ self.context(self.readInt()) for j in range(n) ]
+            returnStates = [ self.readInt() for j in range(n) ]
+            if kind == SINGLETON_CONTEXT:
+                ctx = SingletonPredictionContext.create(parents[0], returnStates[0])
+            else:
+                ctx = ArrayPredictionContext(parents, returnStates)
+            self.contexts.append(ctx)
+
+    def context(self, index):
+        return None if index == -1 else self.contexts[index]
+
+    def readSemanticContexts(self):
+        self.semantics = [ SemanticContext.NONE ]
+        for i in range(self.readInt()):
+            kind = self.readInt()
+            if kind == PREDICATE:
+                ruleIndex = self.readInt()
+                predIndex = self.readInt()
+                semctx = Predicate(ruleIndex, predIndex, self.readInt() != 0)
+            elif kind == PRECEDENCE_PREDICATE:
+                semctx = PrecedencePredicate(self.readInt())
+            else:
+                # operands were already reduced when the context was built
+                cls = AND if kind == AND_CONTEXT else OR
+                semctx = cls.__new__(cls)
+                semctx.opnds = [ self.semanticContext(self.readInt()) for j in range(self.readInt()) ]
+            self.semantics.append(semctx)
+
+    def semanticContext(self, index):
+        return None if index == -1 else self.semantics[index]
+
+    def readExecutors(self):
+        self.executors = []
+        lexerActions = self.atn.lexerActions
+        for i in range(self.readInt()):
+            actions = []
+            for j in range(self.readInt()):
+                offset = self.readInt()
+                action = lexerActions[self.readInt()]
+                if offset >= 0:
+                    action = LexerIndexedCustomAction(offset, action)
+                actions.append(action)
+            self.executors.append(LexerActionExecutor(actions))
+
+    def executor(self, index):
+        return None if index == -1 else self.executors[index]
+
+    def readDFA(self):
+        precedenceDfa = self.readInt() != 0
+        states = [ self.readState() for i in range(self.readInt()) ]
+        for s in states:
+            s.edges = self.readEdges(states)
+            s.sparseEdges = self.readSparseEdges(states)
+            if not self.isLexer and s.edges is not None:
+                self.compactEdges(s)
+        s0 = self.readInt()
+        if s0 == -1:
+            s0 = None
+        elif precedenceDfa:
+            s0 = DFAState(configs=ATNConfigSet())
+            s0.edges = self.readEdges(states)
+        else:
+            s0 = states[s0]
+        return precedenceDfa, states, s0
+
+    def readState(self):
+        s = DFAState(stateNumber=self.readInt(), configs=None)
+        s.isAcceptState = self.readInt() != 0
+        s.prediction = self.readInt()
+        s.requiresFullContext = self.readInt() != 0
+        s.lexerActionExecutor = self.executor(self.readInt())
+        n = self.readInt()
+        if n >= 0:
+            s.predicates = []
+            for i in range(n):
+                pred = self.semanticContext(self.readInt())
+                s.predicates.append(PredPrediction(pred, self.readInt()))
+        flags = self.readInt()
+        configs = OrderedATNConfigSet() if self.isLexer else ATNConfigSet()
+        configs.fullCtx = (flags & 1) != 0
+        configs.hasSemanticContext = (flags & 2) != 0
+        configs.dipsIntoOuterContext = (flags & 4) != 0
+        configs.uniqueAlt = self.readInt()
+        n = self.readInt()
+        if n >= 0:
+            configs.conflictingAlts = set(self.readInt() for i in range(n))
+        states = self.atn.states
+        for i in range(self.readInt()):
+            state = states[self.readInt()]
+            alt = self.readInt()
+            context = self.context(self.readInt())
+            semctx = self.semanticContext(self.readInt())
+            reach = self.readInt()
+            if self.isLexer:
+                c = LexerATNConfig(state, alt, context, semctx, self.executor(self.readInt()))
+                c.passedThroughNonGreedyDecision = self.readInt() != 0
+            else:
+                c = ATNConfig(state, alt, context, semctx)
+            c.reachesIntoOuterContext = reach
+            configs.configs.append(c)
+        configs.setReadonly(True)
+        s.configs = configs
+        return s
+
+    def readEdges(self, states):
+        n = self.readInt()
+        if n == -1:
+            return None
+        if n > self.maxEdges:
+            raise ValueError("edge list too long")
+        edges = [ None ] * n
+        for i in range(self.readInt()):
+            index = self.readInt()
+            target = self.readInt()
+            edges[index] = ATNSimulator.ERROR if target == ERROR_STATE else states[target]
+        return edges
+
+    # A parser DFA state saved with a list of edges, because it filled the
+    # list or ParserATNSimulator.denseEdgeFill was lower then, gets a
+    # dictionary if it has few enough edges for the current setting, as the
+    # simulator would have given it.
+    def compactEdges(self, s):
+        targets = dict((i, t) for i, t in enumerate(s.edges) if t is not None)
+        if len(targets) < len(s.edges) * ParserATNSimulator.denseEdgeFill:
+            s.edges = None
+            s.sparseEdges = targets
+
+    def readSparseEdges(self, states):
+        n = self.readInt()
+        if n == -1:
+            return None
+        edges = dict()
+        for i in range(n):
+            index = self.readInt()
+            target = self.readInt()
+            edges[index] = ATNSimulator.ERROR if target == ERROR_STATE else states[target]
+        return edges
+
+
+class TestDFAStore(unittest.TestCase):
+
+    TEXT = u"x = 1; y;\n\u00e9t\u00e9 = 22;"
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    # a generated lexer class with DFAs of its own
+    def lexerClass(self):
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TLexer import TLexer
+        class FreshLexer(TLexer):
+            decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+        return FreshLexer
+
+    def lexer(self, lexerClass, text=TEXT):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        lexer = lexerClass(ANTLRInputStream(text))
+        lexer._listeners = []
+        return lexer
+
+    def states(self, dfa):
+        return sorted(((s.stateNumber, s.isAcceptState, s.prediction, s.lexerActionExecutor)
+                       for s in dfa.states), key=lambda state: state[0])
+
+    # a snapshot of a warm lexer DFA, its states and tokens
+    def save(self):
+        import os
+        lexerClass = self.lexerClass()
+        lexer = self.lexer(lexerClass)
+        tokens = [ (t.type, t.start, t.stop, t.channel) for t in lexer.getAllTokens() ]
+        fileName = os.path.join(self.directory, "TLexer.dfa")
+        lexer.saveDFA(fileName)
+        return fileName, self.states(lexerClass.decisionsToDFA[0]), tokens
+
+    def testLexerRoundTrip(self):
+        fileName, states, tokens = self.save()
+        # the whitespace rule skips its tokens
+        self.assertTrue(any(state[3] is not None for state in states))
+        lexerClass = self.lexerClass()
+        lexer = self.lexer(lexerClass)
+        self.assertTrue(lexer.loadDFA(fileName))
+        self.assertEqual(states, self.states(lexerClass.decisionsToDFA[0]))
+        # lexing the same text again only takes the ATN at the end
+        lexer.setProfile(True)
+        self.assertEqual(tokens, [ (t.type, t.start, t.stop, t.channel) for t in lexer.getAllTokens() ])
+        self.assertEqual(1, lexer.getLexInfo().getModeInfo()[0].ATNTransitions)
+        self.assertEqual(states, self.states(lexerClass.decisionsToDFA[0]))
+
+    def testOtherATN(self):
+        from antlr4.dfa.DFA import DFA
+        from antlr4._testgrammar.TParser import TParser
+        fileName, states, tokens = self.save()
+        decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TParser.atn.decisionToState) ]
+        self.assertFalse(DFA.load(decisionsToDFA, fileName))
+        self.assertTrue(all(dfa.s0 is None and len(dfa.states) == 0 for dfa in decisionsToDFA))
+
+    def testCorruptFile(self):
+        fileName, states, tokens = self.save()
+        with open(fileName, "rb") as f:
+            data = f.read()
+        keyEnd = HEADER.size + len(self.lexerClass().atn.checksum)
+        # truncated in the header, the key, the tables and the last int, a
+        # partial int, extra data, and an edge list of 2**31-1 slots
+        edges = data.index(struct.pack("<i", LexerATNSimulator.MAX_DFA_EDGE - LexerATNSimulator.MIN_DFA_EDGE + 1))
+        for corrupt in (data[:HEADER.size - 1], data[:keyEnd - 1], data[:keyEnd + 40], data[:-4],
+                        data[:-1], data + struct.pack("<i", 0),
+                        data[:edges] + struct.pack("<i", 2**31 - 1) + data[edges + 4:]):
+            with open(fileName, "wb") as f:
+                f.write(corrupt)
+            lexerClass = self.lexerClass()
+            dfa = lexerClass.decisionsToDFA[0]
+            self.lexer(lexerClass).getAllTokens()
+            before = (dfa.s0, list(dfa.states))
+            self.assertFalse(self.lexer(lexerClass).loadDFA(fileName))
+            self.assertEqual(before, (dfa.s0, list(dfa.states)))
+            self.assertEqual(tokens, [ (t.type, t.start, t.stop, t.channel)
+                                       for t in self.lexer(lexerClass).getAllTokens() ])
+
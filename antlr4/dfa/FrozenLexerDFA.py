@@ -0,0 +1,118 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# A snapshot of a lexer {@link DFA} as flat tables, which
+# {@link LexerATNSimulator} scans in frozen DFA mode (see
+# {@link Lexer#setFrozenDFA}).
+#
+# <p>The states reachable from {@link DFA#s0} are numbered from 0, accept
+# states first, and a state is represented by the offset of its row in
+# {@link #transitions}: its number times the width of a row, one entry per
+# character of the dense edge range. Scanning starts at {@link #start}, and
+# a state is an accept state if its offset is below {@link #acceptLimit}.
+# An entry is the target state, {@link #MISSING} if the DFA has no edge for
+# the character yet, or {@link #ERROR} if the character ends the token.
+# Characters past the dense range are looked up in the dictionaries of
+# {@link #sparseTransitions}. {@link #predictions} holds the token type of
+# each accept state, by state number, and {@link #executors} its lexer
+# actions.</p>
+#
+# <p>The tables don't change when the DFA learns new edges; the simulator
+# counts the {@link #misses} and rebuilds them after
+# {@link #REFREEZE_MISSES} of them.</p>
+#
+# <p>In compiled DFA mode the simulator also counts the tokens matched with
+# the tables, and after {@link #COMPILE_MATCHES} of them sets
+# {@link #scanner} to a function compiled from the tables by
+# {@link LexerDFACompiler}.</p>
+from antlr4.atn.ATNSimulator import ATNSimulator
+
+
+class FrozenLexerDFA(object):
+
+    MISSING = -1
+    ERROR = -2
+
+    REFREEZE_MISSES = 64
+    COMPILE_MATCHES = 1000
+
+    def __init__(self, dfa, minEdge, maxEdge):
+        self.s0 = dfa.s0
+        self.minEdge = minEdge
+        self.width = maxEdge - minEdge + 1
+        self.misses = 0
+        self.matches = 0
+        self.scanner = None
+        states = [ dfa.s0 ]
+        found = set([ id(dfa.s0) ])
+        i = 0
+        while i < len(states):
+            for target in self.targets(states[i]):
+                if target is not ATNSimulator.ERROR and id(target) not in found:
+                    found.add(id(target))
+                    states.append(target)
+            i += 1
+        # accept states first, so scanning tells them by their offset
+        states = [ s for s in states if s.isAcceptState ] + [ s for s in states if not s.isAcceptState ]
+        numbers = dict((id(s), i) for i, s in enumerate(states))
+        width = self.width
+        self.start = numbers[id(dfa.s0)] * width
+        self.acceptLimit = sum(1 for s in states if s.isAcceptState) * width
+        self.transitions = [ self.MISSING ] * (len(states) * width)
+        self.sparseTransitions = dict()
+        self.predictions = [ None ] * len(states)
+        self.executors = [ None ] * len(states)
+        for i, s in enumerate(states):
+            base = i * width
+            if s.edges is not None:
+                for c, target in enumerate(s.edges):
+                    if target is not None:
+                        self.transitions[base + c] = self.encode(target, numbers)
+            if s.sparseEdges is not None:
+                self.sparseTransitions[base] = dict((c, self.encode(target, numbers))
+                                                    for c, target in s.sparseEdges.items() if target is not None)
+            if s.isAcceptState:
+                self.predictions[i] = s.prediction
+                self.executors[i] = s.lexerActionExecutor
+
+    def targets(self, s):
+        if s.edges is not None:
+            for target in s.edges:
+                if target is not None:
+                    yield target
+        if s.sparseEdges is not None:
+            for target in s.sparseEdges.values():
+                if target is not None:
+                    yield target
+
+    def encode(self, target, numbers):
+        if target is ATNSimulator.ERROR:
+            return self.ERROR
+        return numbers[id(target)] * self.width
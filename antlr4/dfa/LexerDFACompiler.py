@@ -0,0 +1,328 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+# Turns the tables of a {@link FrozenLexerDFA} into a Python function that
+# scans a token, for compiled DFA mode (see {@link Lexer#setCompiledDFA}).
+#
+# <p>The function has a branch per DFA state, found by a binary search on
+# the state number, and tests the character against the ranges leading to
+# each target state inline, as comparisons or, for scattered characters, a
+# {@code frozenset} lookup. A state that loops on itself, like the inside of
+# an identifier or a string, skips the run of characters it loops on with a
+# regular expression over the input's string, or with a tight inner loop
+# when the string doesn't have a character per symbol. Characters past the
+# dense edge range go through a dictionary per state. Like
+# {@link LexerATNSimulator#scanFrozen} it returns {@code None} for a
+# character the DFA has no edge for yet, and otherwise the offset of the
+# last accept state seen, or -1, and the position after it.</p>
+#
+# <p>Compiling the source of a large DFA takes a while, so {@link #compile}
+# keeps the code objects it compiled, keyed by a hash of the source, the
+# runtime version and the Python version; a lexer that builds the same DFA
+# again, for example from a saved DFA, reuses the code object instead.
+# {@link #DEFAULT} keeps them in memory only. A compiler created with a
+# directory also keeps the source and the code object there, for later
+# processes. The code is executed when it is loaded, so the directory must
+# be one only the user can write to, such as
+# {@code user_cache_dir("antlr4-lexer")}:</p>
+#
+# <pre>
+# LexerDFACompiler.DEFAULT = LexerDFACompiler(user_cache_dir("antlr4-lexer"))
+# </pre>
+import hashlib
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from antlr4._compat import text_type
+from antlr4.dfa.FrozenLexerDFA import FrozenLexerDFA
+
+FORMAT_VERSION = 1
+
+
+class LexerDFACompiler(object):
+
+    DEFAULT = None
+
+    # a character set with more ranges than this is tested with a frozenset
+    MAX_INLINE_RANGES = 3
+
+    def __init__(self, directory=None):
+        # the directory holding the cache files, or {@code None} to keep the
+        # code objects in memory only
+        self.directory = directory
+        self.codes = dict()
+
+    # Return the scanner function for {@code frozen}.
+    def compile(self, frozen):
+        source = self.generate(frozen)
+        key = self.key(source)
+        code = self.codes.get(key, None)
+        fileName = None
+        if code is None and self.directory is not None:
+            fileName = os.path.join(self.directory, key)
+            try:
+                with open(fileName + ".code", "rb") as f:
+                    code = marshal.load(f)
+            except Exception:
+                # missing, damaged or out of date; compile it
+                code = None
+        if code is None:
+            code = compile(source, "<lexer DFA>", "exec")
+            if fileName is not None:
+                self.save(source, code, fileName)
+        self.codes[key] = code
+        namespace = dict()
+        exec(code, namespace)
+        return namespace["scan"]
+
+    def key(self, source):
+        from antlr4 import __version__
+        key = u"|".join((source, __version__, text_type(sys.version_info[:2]), text_type(FORMAT_VERSION)))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def save(self, source, code, fileName):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # write to temporary files and rename them, so other processes
+            # never see a partial file; the code goes last, since it is the
+            # file that is read back
+            for suffix, write in ((".py", lambda f: f.write(source.encode("utf-8"))),
+                                  (".code", lambda f: marshal.dump(code, f))):
+                fd, tempName = tempfile.mkstemp(dir=self.directory)
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                try:
+                    os.rename(tempName, fileName + suffix)
+                except OSError:
+                    # another process created it first (Windows)
+                    os.remove(tempName)
+        except (IOError, OSError):
+            # the files are an optimization; ignore an unwritable directory
+            pass
+
+    # Remove all cached scanners.
+    def clear(self):
+        self.codes = dict()
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".py") or name.endswith(".code"):
+                os.remove(os.path.join(self.directory, name))
+
+    # Return the source of the scanner function for {@code frozen}.
+    def generate(self, frozen):
+        return ScannerWriter(frozen).write()
+
+
+# Writes the source of a scanner function.
+class ScannerWriter(object):
+
+    def __init__(self, frozen):
+        self.frozen = frozen
+        self.width = frozen.width
+        self.minEdge = frozen.minEdge
+        self.numberOfStates = len(frozen.transitions) // frozen.width
+        self.lines = []
+        # module level constants, and the names of the character sets
+        self.constants = []
+        self.setNames = dict()
+        self.loopNames = []
+
+    def write(self):
+        self.emit(1, u"s = %d" % (self.frozen.start // self.width))
+        self.emit(1, u"accept = -1")
+        self.emit(1, u"acceptPos = pos")
+        self.emit(1, u"while pos < size:")
+        self.emit(2, u"c = data[pos]")
+        self.writeDispatch(0, self.numberOfStates, 2)
+        self.emit(1, u"else:")
+        self.emit(2, u"# the ATN path decides what to do at EOF")
+        self.emit(2, u"return -1, pos")
+        self.emit(1, u"return accept, acceptPos")
+        header = [ u"# generated from a lexer DFA; do not edit", u"import re", u"" ]
+        header.extend(self.constants)
+        header.append(u"")
+        header.append(u"def scan(data, text, pos, size, maxChar):")
+        return u"\n".join(header + self.lines) + u"\n"
+
+    def emit(self, indent, line):
+        self.lines.append(u"    " * indent + line)
+
+    # Dispatch on the state number with a binary search over states
+    # {@code [lo, hi)}.
+    def writeDispatch(self, lo, hi, indent):
+        if hi - lo == 1:
+            self.writeState(lo, indent)
+            return
+        mid = (lo + hi) // 2
+        self.emit(indent, u"if s < %d:" % mid)
+        self.writeDispatch(lo, mid, indent + 1)
+        self.emit(indent, u"else:")
+        self.writeDispatch(mid, hi, indent + 1)
+
+    def writeState(self, number, indent):
+        width = self.width
+        base = number * width
+        groups = dict()
+        for i in range(width):
+            target = self.frozen.transitions[base + i]
+            if target != FrozenLexerDFA.MISSING:
+                groups.setdefault(target, []).append(i + self.minEdge)
+        # the loop first, then the most common targets; errors end tokens,
+        # so they come last
+        order = sorted(groups, key=lambda target: (target != base, target == FrozenLexerDFA.ERROR,
+                                                   -len(groups[target]), target))
+        for target in order:
+            test = self.condition(groups[target])
+            self.emit(indent, u"if %s:" % test)
+            if target == base:
+                self.emit(indent + 1, u"if text is None:")
+                self.emit(indent + 2, u"pos += 1")
+                self.emit(indent + 2, u"while pos < size:")
+                self.emit(indent + 3, u"c = data[pos]")
+                self.emit(indent + 3, u"if not (%s):" % test)
+                self.emit(indent + 4, u"break")
+                self.emit(indent + 3, u"pos += 1")
+                self.emit(indent + 1, u"else:")
+                self.emit(indent + 2, u"pos = %s(text, pos + 1).end()" % self.loopPattern(groups[target]))
+                self.writeAccept(target, indent + 1)
+                self.emit(indent + 1, u"continue")
+            elif target == FrozenLexerDFA.ERROR:
+                self.emit(indent + 1, u"break")
+            else:
+                self.emit(indent + 1, u"s = %d" % (target // width))
+                self.emit(indent + 1, u"pos += 1")
+                self.writeAccept(target, indent + 1)
+                self.emit(indent + 1, u"continue")
+        sparse = self.frozen.sparseTransitions.get(base, None)
+        if sparse:
+            name = u"SPARSE%d" % number
+            self.constants.append(u"%s = %r" % (name, dict((c + self.minEdge, t) for c, t in sparse.items())))
+            self.emit(indent, u"if %d < c <= maxChar:" % (self.minEdge + width - 1))
+            self.emit(indent + 1, u"t = %s.get(c, %d)" % (name, FrozenLexerDFA.MISSING))
+            self.emit(indent + 1, u"if t == %d:" % FrozenLexerDFA.ERROR)
+            self.emit(indent + 2, u"break")
+            self.emit(indent + 1, u"if t != %d:" % FrozenLexerDFA.MISSING)
+            self.emit(indent + 2, u"s = t // %d" % width)
+            self.emit(indent + 2, u"pos += 1")
+            self.emit(indent + 2, u"if t < %d:" % self.frozen.acceptLimit)
+            self.emit(indent + 3, u"accept = t")
+            self.emit(indent + 3, u"acceptPos = pos")
+            self.emit(indent + 2, u"continue")
+        self.emit(indent, u"return None")
+
+    def writeAccept(self, target, indent):
+        if target < self.frozen.acceptLimit:
+            self.emit(indent, u"accept = %d" % target)
+            self.emit(indent, u"acceptPos = pos")
+
+    # Return a test of {@code c} against the sorted characters
+    # {@code chars}.
+    def condition(self, chars):
+        ranges = []
+        for c in chars:
+            if ranges and ranges[-1][1] == c - 1:
+                ranges[-1][1] = c
+            else:
+                ranges.append([c, c])
+        if len(ranges) > LexerDFACompiler.MAX_INLINE_RANGES:
+            return u"c in %s" % self.characterSet(chars)
+        tests = []
+        for a, b in ranges:
+            if a == b:
+                tests.append(u"c == %d" % a)
+            else:
+                tests.append(u"%d <= c <= %d" % (a, b))
+        return u" or ".join(tests)
+
+    # Return the name of the {@code match} method of a pattern matching a
+    # run of the characters {@code chars}.
+    def loopPattern(self, chars):
+        name = u"LOOP%d" % len(self.loopNames)
+        self.loopNames.append(name)
+        pattern = u"[%s]*" % u"".join(u"\\x%02x" % c for c in chars)
+        self.constants.append(u"%s = re.compile(%r).match" % (name, pattern))
+        return name
+
+    def characterSet(self, chars):
+        key = tuple(chars)
+        name = self.setNames.get(key, None)
+        if name is None:
+            name = self.setNames[key] = u"SET%d" % len(self.setNames)
+            self.constants.append(u"%s = frozenset(%r)" % (name, list(chars)))
+        return name
+
+
+LexerDFACompiler.DEFAULT = LexerDFACompiler()
+
+
+class TestLexerDFACompiler(unittest.TestCase):
+
+    def frozen(self):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4._testgrammar.TLexer import TLexer
+        lexer = TLexer(ANTLRInputStream(u"x = 1; y;"))
+        lexer.getAllTokens()
+        return FrozenLexerDFA(TLexer.decisionsToDFA[0], lexer._interp.MIN_DFA_EDGE, lexer._interp.MAX_DFA_EDGE)
+
+    def testMemoryCache(self):
+        self.assertIsNone(LexerDFACompiler.DEFAULT.directory)
+        frozen = self.frozen()
+        compiler = LexerDFACompiler()
+        compiler.compile(frozen)
+        codes = dict(compiler.codes)
+        self.assertEqual(1, len(codes))
+        compiler.compile(frozen)
+        self.assertEqual(codes, compiler.codes)
+        self.assertTrue(all(compiler.codes[key] is code for key, code in codes.items()))
+        compiler.clear()
+        self.assertEqual({}, compiler.codes)
+
+    def testDiskCache(self):
+        frozen = self.frozen()
+        directory = tempfile.mkdtemp()
+        try:
+            compiler = LexerDFACompiler(directory)
+            compiler.compile(frozen)
+            key = list(compiler.codes.keys())[0]
+            self.assertEqual([key + ".code", key + ".py"], sorted(os.listdir(directory)))
+            # a new compiler loads the code object from the directory
+            with open(os.path.join(directory, key + ".code"), "wb") as f:
+                marshal.dump(compile("def scan(*args):\n    return 'cached'\n", "<test>", "exec"), f)
+            self.assertEqual("cached", LexerDFACompiler(directory).compile(frozen)())
+            compiler.clear()
+            self.assertEqual([], os.listdir(directory))
+        finally:
+            shutil.rmtree(directory)
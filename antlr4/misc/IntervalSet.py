@@ -12,8 +12,9 @@ class Interval(object):
         self.stop = stop
         self.range = xrange(start, stop)
 
+    # compare rather than look in the xrange, which Python 2 scans
     def __contains__(self, item):
-        return item in self.range
+        return self.start <= item < self.stop
     
     def __len__(self):
         return self.stop - self.start
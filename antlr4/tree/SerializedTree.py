@@ -0,0 +1,403 @@
+#
+# [The "BSD license"]
+#  Copyright (c) 2012 Terence Parr
+#  Copyright (c) 2012 Sam Harwell
+#  Copyright (c) 2014 Eric Vergnaud
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in the
+#     documentation and/or other materials provided with the distribution.
+#  3. The name of the author may not be used to endorse or promote products
+#     derived from this software without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE AUTHOR ``AS IS'' AND ANY EXPRESS OR
+#  IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+#  OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+#  IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT
+#  NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+#  DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+#  THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+#  (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+#  THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+# A compact, self-contained form of a parse tree.
+#
+# <p>A {@link ParserRuleContext} tree refers to its parser, its token stream
+# and, through every token, the lexer and the character stream, so it cannot
+# be pickled or kept around without keeping all of those alive. A
+# {@link SerializedTree} holds the same information in three flat tables:</p>
+#
+# <ul>
+# <li>one record per node in preorder: its kind, the rule index (rule nodes)
+# or token (terminal nodes), the number of nodes in its subtree, the start and
+# stop token and the invoking state. The children of node {@code i} start at
+# {@code i+1} and each one's subtree size gives the next sibling.</li>
+# <li>one record per token: type, channel, start, stop, line, column, token
+# index and text.</li>
+# <li>the distinct token texts.</li>
+# </ul>
+#
+# <p>{@link #toBytes} and {@link #fromBytes} convert it to and from a string
+# of bytes. Its {@link #root} is a tree of {@link SerializedRuleContext}
+# nodes, which are {@link ParserRuleContext}s whose children and tokens are
+# only built from the tables when they are first asked for. They, and the
+# tree itself, pickle as the serialized bytes.</p>
+#
+# <p>Use {@link RuleContext#toBytes} and {@link RuleContext#fromBytes} to
+# serialize a tree.</p>
+import pickle
+import struct
+import sys
+import unittest
+from array import array
+
+from antlr4._compat import array_frombytes, array_tobytes
+from antlr4.Errors import IllegalStateException
+from antlr4.ParserRuleContext import ParserRuleContext
+from antlr4.Token import CommonToken
+from antlr4.tree.Tree import (ErrorNode, ErrorNodeImpl, TerminalNode,
+                              TerminalNodeImpl)
+
+MAGIC = b"ANTLRPTR"
+
+SERIALIZED_VERSION = 1
+
+# magic, version, node count, token count, text count
+HEADER = struct.Struct("<8sHIII")
+
+# node kinds
+RULE_NODE = 0
+TERMINAL_NODE = 1
+ERROR_NODE = 2
+
+# node record fields
+KIND = 0
+REF = 1
+SIZE = 2
+START = 3
+STOP = 4
+INVOKING_STATE = 5
+NODE_FIELDS = 6
+
+# token record fields
+TYPE = 0
+CHANNEL = 1
+START_INDEX = 2
+STOP_INDEX = 3
+LINE = 4
+COLUMN = 5
+TOKEN_INDEX = 6
+TEXT = 7
+TOKEN_FIELDS = 8
+
+
+class SerializedTree(object):
+
+    def __init__(self, nodes, tokens, texts):
+        self.nodes = nodes
+        self.tokens = tokens
+        self.texts = texts
+        self._tokens = [None] * (len(tokens) // TOKEN_FIELDS)
+        self._root = None
+
+    @classmethod
+    def fromTree(cls, tree):
+        nodes = array("i")
+        tokens = array("i")
+        texts = []
+        tokenIds = dict()
+        textIds = dict()
+
+        def addToken(token):
+            if token is None:
+                return -1
+            index = tokenIds.get(id(token), None)
+            if index is None:
+                index = len(tokenIds)
+                tokenIds[id(token)] = index
+                text = token.text
+                if text is None:
+                    textIndex = -1
+                else:
+                    textIndex = textIds.get(text, None)
+                    if textIndex is None:
+                        textIndex = len(texts)
+                        textIds[text] = textIndex
+                        texts.append(text)
+                tokens.extend((token.type, token.channel, token.start, token.stop,
+                               token.line, token.column, token.tokenIndex, textIndex))
+            return index
+
+        def addNode(node):
+            position = len(nodes) // NODE_FIELDS
+            if isinstance(node, TerminalNode):
+                kind = ERROR_NODE if isinstance(node, ErrorNode) else TERMINAL_NODE
+                nodes.extend((kind, addToken(node.symbol), 1, -1, -1, -1))
+            else:
+                nodes.extend((RULE_NODE, node.getRuleIndex(), 0, addToken(node.start),
+                              addToken(node.stop), node.invokingState))
+            return position
+
+        # walk the tree without recursion, so deep trees don't hit the
+        # recursion limit; subtree sizes are filled in on the way back up
+        stack = [(addNode(tree), tree.getChildren())]
+        while len(stack) > 0:
+            position, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                nodes[position * NODE_FIELDS + SIZE] = len(nodes) // NODE_FIELDS - position
+            else:
+                childPosition = addNode(child)
+                if not isinstance(child, TerminalNode):
+                    stack.append((childPosition, child.getChildren()))
+        return cls(nodes, tokens, texts)
+
+    @classmethod
+    def fromBytes(cls, data):
+        if len(data) < HEADER.size:
+            raise IllegalStateException("Could not deserialize parse tree: truncated data.")
+        magic, version, nodeCount, tokenCount, textCount = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != SERIALIZED_VERSION:
+            raise IllegalStateException("Could not deserialize parse tree: unsupported format.")
+        ints = array("i")
+        intCount = nodeCount * NODE_FIELDS + tokenCount * TOKEN_FIELDS + textCount
+        end = HEADER.size + intCount * ints.itemsize
+        if len(data) < end:
+            raise IllegalStateException("Could not deserialize parse tree: truncated data.")
+        array_frombytes(ints, data[HEADER.size:end])
+        if sys.byteorder == "big":
+            ints.byteswap()
+        tokenStart = nodeCount * NODE_FIELDS
+        textStart = tokenStart + tokenCount * TOKEN_FIELDS
+        texts = []
+        for length in ints[textStart:]:
+            if length < 0 or end + length > len(data):
+                raise IllegalStateException("Could not deserialize parse tree: truncated data.")
+            texts.append(data[end:end + length].decode("utf-8"))
+            end += length
+        if nodeCount == 0 or ints[SIZE] != nodeCount:
+            raise IllegalStateException("Could not deserialize parse tree: corrupt node table.")
+        return cls(ints[:tokenStart], ints[tokenStart:textStart], texts)
+
+    def toBytes(self):
+        encoded = [text.encode("utf-8") for text in self.texts]
+        ints = self.nodes + self.tokens + array("i", [len(text) for text in encoded])
+        if sys.byteorder == "big":
+            ints.byteswap()
+        header = HEADER.pack(MAGIC, SERIALIZED_VERSION, len(self.nodes) // NODE_FIELDS,
+                             len(self.tokens) // TOKEN_FIELDS, len(self.texts))
+        return b"".join([header, array_tobytes(ints)] + encoded)
+
+    def __reduce__(self):
+        return (_fromBytes, (self.toBytes(),))
+
+    @property
+    def root(self):
+        if self._root is None:
+            self._root = SerializedRuleContext(self, 0, None)
+        return self._root
+
+    def node(self, position, parent):
+        if self.nodes[position * NODE_FIELDS + KIND] == RULE_NODE:
+            return SerializedRuleContext(self, position, parent)
+        elif self.nodes[position * NODE_FIELDS + KIND] == ERROR_NODE:
+            node = ErrorNodeImpl(self.token(self.nodes[position * NODE_FIELDS + REF]))
+        else:
+            node = TerminalNodeImpl(self.token(self.nodes[position * NODE_FIELDS + REF]))
+        node.parentCtx = parent
+        return node
+
+    def token(self, index):
+        if index < 0:
+            return None
+        if index >= len(self._tokens):
+            raise IllegalStateException("Could not deserialize parse tree: corrupt node table.")
+        token = self._tokens[index]
+        if token is None:
+            r = index * TOKEN_FIELDS
+            t = self.tokens
+            text = self.texts[t[r + TEXT]] if t[r + TEXT] >= 0 else None
+            token = CommonToken(type=t[r + TYPE], channel=t[r + CHANNEL], start=t[r + START_INDEX],
+                                stop=t[r + STOP_INDEX], text=text)
+            token.line = t[r + LINE]
+            token.column = t[r + COLUMN]
+            token.tokenIndex = t[r + TOKEN_INDEX]
+            self._tokens[index] = token
+        return token
+
+    # The text of the terminal nodes in the subtree of the node at
+    # {@code position}, read straight from the tables.
+    def getText(self, position):
+        nodes = self.nodes
+        tokens = self.tokens
+        texts = []
+        end = position + nodes[position * NODE_FIELDS + SIZE]
+        for i in range(position, end):
+            if nodes[i * NODE_FIELDS + KIND] != RULE_NODE:
+                text = tokens[nodes[i * NODE_FIELDS + REF] * TOKEN_FIELDS + TEXT]
+                if text >= 0:
+                    texts.append(self.texts[text])
+        return u"".join(texts)
+
+
+# A rule node of a {@link SerializedTree}. Its children, start and stop
+# tokens are created on first use.
+class SerializedRuleContext(ParserRuleContext):
+
+    def __init__(self, tree, position, parent):
+        # no super().__init__: children, start and stop are properties
+        self.parentCtx = parent
+        self.invokingState = tree.nodes[position * NODE_FIELDS + INVOKING_STATE]
+        self.exception = None
+        self.tree = tree
+        self.position = position
+        self._children = None
+
+    @property
+    def children(self):
+        if self._children is None:
+            size = self.tree.nodes[self.position * NODE_FIELDS + SIZE]
+            if size == 1:
+                return None
+            children = []
+            position = self.position + 1
+            end = self.position + size
+            while position < end:
+                childSize = self.tree.nodes[position * NODE_FIELDS + SIZE]
+                if childSize < 1 or position + childSize > end:
+                    # corrupt data; don't loop or run into the next subtree
+                    raise IllegalStateException("Could not deserialize parse tree: corrupt node table.")
+                children.append(self.tree.node(position, self))
+                position += childSize
+            self._children = children
+        return self._children
+
+    @property
+    def start(self):
+        return self.tree.token(self.tree.nodes[self.position * NODE_FIELDS + START])
+
+    @property
+    def stop(self):
+        return self.tree.token(self.tree.nodes[self.position * NODE_FIELDS + STOP])
+
+    def getRuleIndex(self):
+        return self.tree.nodes[self.position * NODE_FIELDS + REF]
+
+    def getText(self):
+        return self.tree.getText(self.position)
+
+    def __reduce__(self):
+        return (_nodeAt, (self.tree, self.position))
+
+
+# Python 2 can't pickle a reference to a class method
+def _fromBytes(data):
+    return SerializedTree.fromBytes(data)
+
+
+def _nodeAt(tree, position):
+    # walk down from the root so the node gets its parents
+    node = tree.root
+    while node.position != position:
+        for child in node.children or ():
+            if isinstance(child, SerializedRuleContext) and \
+                    child.position <= position < child.position + tree.nodes[child.position * NODE_FIELDS + SIZE]:
+                node = child
+                break
+        else:
+            raise IllegalStateException("Could not deserialize parse tree: no rule node at %d." % position)
+    return node
+
+
+class TestSerializedTree(unittest.TestCase):
+
+    def parse(self, text):
+        from antlr4.ANTLRInputStream import ANTLRInputStream
+        from antlr4.CommonTokenStream import CommonTokenStream
+        from antlr4._testgrammar.TLexer import TLexer
+        from antlr4._testgrammar.TParser import TParser
+        parser = TParser(CommonTokenStream(TLexer(ANTLRInputStream(text))))
+        parser._listeners = []
+        return parser, parser.prog()
+
+    def assertSameTree(self, expected, actual, parser):
+        self.assertEqual(expected.toStringTree(recog=parser), actual.toStringTree(recog=parser))
+        self.assertEqual(expected.getText(), actual.getText())
+        self.assertEqual(expected.getRuleIndex(), actual.getRuleIndex())
+        self.assertEqual(expected.invokingState, actual.invokingState)
+        for attribute in ("type", "channel", "start", "stop", "line", "column", "tokenIndex", "text"):
+            self.assertEqual(getattr(expected.start, attribute), getattr(actual.start, attribute))
+            self.assertEqual(getattr(expected.stop, attribute), getattr(actual.stop, attribute))
+        self.assertEqual(expected.getChildCount(), actual.getChildCount())
+        for e, a in zip(expected.getChildren(), actual.getChildren()):
+            self.assertIs(actual, a.parentCtx)
+            if isinstance(e, TerminalNode):
+                self.assertEqual(type(e), type(a))
+                self.assertEqual(e.symbol.type, a.symbol.type)
+                self.assertEqual(e.symbol.text, a.symbol.text)
+                self.assertEqual((e.symbol.line, e.symbol.column), (a.symbol.line, a.symbol.column))
+            else:
+                self.assertSameTree(e, a, parser)
+
+    def testRoundTrip(self):
+        for text in (u"x = 1; y;\nz = 22;", u"x = ; y;", u"\u00e9t\u00e9 = 3;"):
+            parser, tree = self.parse(text)
+            data = tree.toBytes()
+            self.assertEqual(SerializedTree.fromTree(tree).toBytes(), data)
+            self.assertSameTree(tree, tree.fromBytes(data), parser)
+            self.assertEqual(data, tree.fromBytes(data).toBytes())
+
+    def testErrorNode(self):
+        parser, tree = self.parse(u"x = ; y;")
+        copy = tree.fromBytes(tree.toBytes())
+        self.assertIsInstance(copy.getChild(0).getChild(2), ErrorNode)
+
+    def testLaziness(self):
+        parser, tree = self.parse(u"x = 1; y;")
+        copy = tree.fromBytes(tree.toBytes())
+        self.assertIsNone(copy._children)
+        self.assertEqual([None] * len(copy.tree._tokens), copy.tree._tokens)
+        self.assertEqual(u"x=1;y;<EOF>", copy.getText())
+        self.assertIsNone(copy._children)
+        stat = copy.getChild(1)
+        self.assertIsNotNone(copy._children)
+        self.assertIsNone(stat._children)
+        self.assertEqual(u"y", stat.start.text)
+        # the EOF node of the root, and the start of the second statement
+        self.assertEqual([u"<EOF>", u"y"], sorted(token.text for token in copy.tree._tokens if token is not None))
+
+    def testPickle(self):
+        parser, tree = self.parse(u"x = 1; y;")
+        copy = tree.fromBytes(tree.toBytes())
+        stat = pickle.loads(pickle.dumps(copy.getChild(1), 2))
+        self.assertEqual(u"y;", stat.getText())
+        self.assertEqual(copy.getChild(1).position, stat.position)
+        self.assertEqual(u"x=1;y;<EOF>", stat.parentCtx.getText())
+        self.assertSameTree(tree, pickle.loads(pickle.dumps(copy, 2)), parser)
+
+    def testCorruptData(self):
+        parser, tree = self.parse(u"x = 1; y;")
+        data = tree.toBytes()
+        for end in (0, 10, HEADER.size, len(data) - 1):
+            self.assertRaises(IllegalStateException, SerializedTree.fromBytes, data[:end])
+        nodes = SerializedTree.fromBytes(data).nodes
+        # a subtree running past its parent's, or of size 0
+        for position, size in ((1, len(nodes) // NODE_FIELDS), (2, 0)):
+            corrupt = SerializedTree.fromBytes(data)
+            corrupt.nodes[position * NODE_FIELDS + SIZE] = size
+            root = SerializedTree.fromBytes(corrupt.toBytes()).root
+            self.assertRaises(IllegalStateException, lambda: root.getChild(0).getChild(0))
+        corrupt = SerializedTree.fromBytes(data)
+        corrupt.nodes[SIZE] = 1
+        self.assertRaises(IllegalStateException, SerializedTree.fromBytes, corrupt.toBytes())
+        self.assertRaises(IllegalStateException, _nodeAt, SerializedTree.fromBytes(data), len(nodes))
@@ -0,0 +1,83 @@
+#
+# Compares loading the ATN of generated recognizers with ATNDeserializer
+# and with an ATNCache whose files are already written.
+#
+# Each measurement runs in a new interpreter, the way a short-lived command
+# line tool loads its grammar: the runtime is imported first, and only the
+# call that builds the ATN is timed. The modules are generated recognizers
+# (anything with a serializedATN() function) and default to the test grammar
+# (antlr4/_testgrammar/T.g4), whose ATNs are too small to show much; pass
+# the modules of a real grammar, on PYTHONPATH, to measure it. Before
+# timing, it checks that the cached ATN has the same object graph as the
+# deserialized one.
+#
+#   python benchmarks/atncache.py --runs 10 mygrammar.MyLexer mygrammar.MyParser
+#
+from __future__ import print_function
+
+import argparse
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from antlr4.atn.ATNCache import ATNCache, ATNWriter  # isort:skip
+from antlr4.atn.ATNDeserializer import ATNDeserializer  # isort:skip
+
+SCRIPT = "\n".join([
+    "import importlib, sys",
+    "from antlr4._compat import perf_counter",
+    "from antlr4.atn.ATNCache import ATNCache",
+    "from antlr4.atn.ATNDeserializer import ATNDeserializer",
+    "data = importlib.import_module(sys.argv[1]).serializedATN()",
+    "start = perf_counter()",
+    "if sys.argv[2]:",
+    "    ATNCache(sys.argv[2]).deserialize(data)",
+    "else:",
+    "    ATNDeserializer().deserialize(data)",
+    "print(perf_counter() - start)",
+])
+
+
+def measure(module, directory, runs):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT] + [p for p in [env.get("PYTHONPATH", None)] if p])
+    times = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", SCRIPT, module, directory or ""], env=env)
+        times.append(float(output.decode("ascii")))
+    return min(times), sorted(times)[len(times) // 2]
+
+
+def main():
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("--runs", type=int, default=5)
+    argParser.add_argument("modules", nargs="*",
+                           default=["antlr4._testgrammar.TLexer", "antlr4._testgrammar.TParser"])
+    args = argParser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        print("Python %s, best and median of %d runs" % (sys.version.split()[0], args.runs))
+        print("%-40s %7s %22s %22s %8s" % ("module", "states", "ATNDeserializer ms", "ATNCache ms", "speedup"))
+        for module in args.modules:
+            data = importlib.import_module(module).serializedATN()
+            expected = ATNDeserializer().deserialize(data)
+            cache = ATNCache(directory)
+            cache.deserialize(data)
+            assert ATNWriter().write(cache.deserialize(data)) == ATNWriter().write(expected)
+            deserialized = measure(module, None, args.runs)
+            cached = measure(module, directory, args.runs)
+            print("%-40s %7d %10.2f %11.2f %10.2f %11.2f %8.2f"
+                  % (module, len(expected.states), deserialized[0] * 1000, deserialized[1] * 1000,
+                     cached[0] * 1000, cached[1] * 1000, deserialized[1] / cached[1]))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
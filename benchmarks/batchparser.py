@@ -0,0 +1,107 @@
+#
+# Compares parsing documents of the test grammar (antlr4/_testgrammar/T.g4)
+# serially with parsing them on a BatchParser pool, for each number of
+# workers.
+#
+# For each run it prints the time to start the pool (the workers build their
+# lexer and parser, deserializing the ATN, when they start), the time to
+# parse every document and the throughput, once with the default reducer
+# (toStringTree) and once with toBytes. It also prints how long pickling the
+# results takes in the parent, which the pool pays on top of parsing.
+#
+# Forked workers inherit the parent's ATN and its warm DFA; with
+# --start-method spawn (or forkserver) they import the grammar and build
+# both themselves, as they do on Windows and macOS.
+#
+#   python benchmarks/batchparser.py --documents 400 --workers 1,2,4
+#
+from __future__ import print_function
+
+import argparse
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from antlr4.ANTLRInputStream import ANTLRInputStream  # isort:skip
+from antlr4.BatchParser import BatchParser, toBytes, toStringTree  # isort:skip
+from antlr4.CommonTokenStream import CommonTokenStream  # isort:skip
+from antlr4._testgrammar.TLexer import TLexer  # isort:skip
+from antlr4._testgrammar.TParser import TParser  # isort:skip
+
+
+def makeDocuments(count, statements, seed=42):
+    rand = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        lines = []
+        for _ in range(statements):
+            name = u"".join(rand.choice(u"abcdefghij") for _ in range(rand.randint(1, 8)))
+            if rand.random() < 0.7:
+                lines.append(u"%s = %d;" % (name, rand.randint(0, 99999)))
+            else:
+                lines.append(u"%s;" % name)
+        documents.append(u"\n".join(lines))
+    return documents
+
+
+def parseSerially(documents, reducer):
+    lexer = TLexer(ANTLRInputStream(u""))
+    parser = TParser(CommonTokenStream(lexer))
+    results = []
+    for text in documents:
+        lexer.inputStream = ANTLRInputStream(text)
+        parser.setTokenStream(CommonTokenStream(lexer))
+        results.append(reducer(parser.prog(), parser))
+    return results
+
+
+def main():
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("--documents", type=int, default=400)
+    argParser.add_argument("--statements", type=int, default=100)
+    argParser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, multiprocessing.cpu_count()})))
+    argParser.add_argument("--chunksize", type=int, default=4)
+    argParser.add_argument("--start-method", default=None)
+    args = argParser.parse_args()
+    if args.start_method is not None:
+        multiprocessing.set_start_method(args.start_method)
+    documents = makeDocuments(args.documents, args.statements)
+    chars = sum(len(text) for text in documents)
+    print("%d documents, %d characters, %d CPUs, %s workers"
+          % (len(documents), chars, multiprocessing.cpu_count(), args.start_method or "default"))
+    for name, reducer in (("toStringTree", toStringTree), ("toBytes", toBytes)):
+        # the first serial run warms the DFA, as the workers' first documents do
+        parseSerially(documents[:10], reducer)
+        start = time.time()
+        expected = parseSerially(documents, reducer)
+        serial = time.time() - start
+        start = time.time()
+        pickle.dumps(expected, 2)
+        pickling = time.time() - start
+        print()
+        print("reducer %s: serial %.2fs, %.0f docs/s; pickling the results %.3fs"
+              % (name, serial, len(documents) / serial, pickling))
+        print("%8s %10s %10s %10s %8s" % ("workers", "start s", "parse s", "docs/s", "speedup"))
+        for workers in [ int(n) for n in args.workers.split(",") ]:
+            start = time.time()
+            batch = BatchParser(TLexer, TParser, "prog", reducer=reducer, processes=workers,
+                                chunksize=args.chunksize)
+            # one document per worker, so every worker has started
+            list(batch.parseStrings([u"x;"] * workers))
+            started = time.time()
+            results = [ result for _, result in batch.parseStrings(documents) ]
+            parsed = time.time()
+            batch.close()
+            assert results == expected
+            parse = parsed - started
+            print("%8d %10.2f %10.2f %10.0f %8.2f" % (workers, started - start, parse,
+                                                     len(documents) / parse, serial / parse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#
+# Compares lexing mostly non-ASCII text with lexing ASCII text, with the
+# lexer DFA caching edges for every character and with it ignoring the
+# edges of characters past LexerATNSimulator.MAX_DFA_EDGE (127), as it did
+# before DFAState.sparseEdges: every such character then takes the ATN.
+#
+# The documents are statements of the test grammar (antlr4/_testgrammar/T.g4)
+# whose identifiers are drawn from accented Latin, Greek, Cyrillic and CJK
+# letters, or from ASCII letters. Each lexer class has a DFA of its own; the
+# first run warms it, and the runs after it are timed with getAllTokens.
+#
+#   python benchmarks/lexer_unicode.py --chars 300000 --runs 5
+#
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from antlr4._compat import perf_counter  # isort:skip
+from antlr4.ANTLRInputStream import ANTLRInputStream  # isort:skip
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator  # isort:skip
+from antlr4.atn.PredictionContext import PredictionContextCache  # isort:skip
+from antlr4.dfa.DFA import DFA  # isort:skip
+from antlr4._testgrammar.TLexer import TLexer  # isort:skip
+
+LETTERS = {
+    # accented Latin, Greek, Cyrillic and CJK
+    "non-ASCII": u"\u00e0\u00e9\u00ee\u00f5\u00fc\u00df\u03b1\u03b2\u03b3\u03b4\u03b5\u03bb\u03c9"
+                 u"\u0430\u0431\u0432\u0433\u0434\u0436\u044f\u4e2d\u6587\u5b57\u7b26\u8a9e\u6cd5",
+    "ASCII": u"abcdefghijklmnopqrstuvwxyz",
+}
+
+
+class DenseOnlyLexerATNSimulator(LexerATNSimulator):
+
+    # the lookup as it was, no slower than the current one for ASCII
+    def getExistingTargetState(self, s, t):
+        if s.edges is None or t < self.MIN_DFA_EDGE or t > self.MAX_DFA_EDGE:
+            return None
+        return s.edges[t - self.MIN_DFA_EDGE]
+
+
+def lexerClass(simulatorClass):
+    class BenchmarkLexer(TLexer):
+        decisionsToDFA = [ DFA(ds, i) for i, ds in enumerate(TLexer.atn.decisionToState) ]
+
+        def __init__(self, input=None):
+            super(BenchmarkLexer, self).__init__(input)
+            self._interp = simulatorClass(self, self.atn, self.decisionsToDFA, PredictionContextCache())
+    return BenchmarkLexer
+
+
+def makeText(letters, chars, seed=42):
+    rand = random.Random(seed)
+    lines = []
+    size = 0
+    while size < chars:
+        name = u"".join(rand.choice(letters) for _ in range(rand.randint(1, 10)))
+        if rand.random() < 0.7:
+            lines.append(u"%s = %d;" % (name, rand.randint(0, 99999)))
+        else:
+            lines.append(u"%s;" % name)
+        size += len(lines[-1]) + 1
+    return u"\n".join(lines)
+
+
+def measure(cls, text, runs):
+    tokens = None
+    times = []
+    for _ in range(runs + 1):
+        lexer = cls(ANTLRInputStream(text))
+        start = perf_counter()
+        tokens = lexer.getAllTokens()
+        times.append(perf_counter() - start)
+    # the first run warms the DFA
+    times = sorted(times[1:])
+    return [ (t.type, t.start, t.stop) for t in tokens ], times[0], times[len(times) // 2]
+
+
+def main():
+    argParser = argparse.ArgumentParser()
+    argParser.add_argument("--chars", type=int, default=300000)
+    argParser.add_argument("--runs", type=int, default=3)
+    args = argParser.parse_args()
+    print("Python %s, best and median of %d runs" % (sys.version.split()[0], args.runs))
+    print("%-10s %-12s %8s %10s %22s" % ("text", "edges", "states", "sparse", "chars/s"))
+    for name in ("non-ASCII", "ASCII"):
+        text = makeText(LETTERS[name], args.chars)
+        expected = None
+        for edges, simulatorClass in (("all", LexerATNSimulator), ("ASCII only", DenseOnlyLexerATNSimulator)):
+            cls = lexerClass(simulatorClass)
+            tokens, best, median = measure(cls, text, args.runs)
+            if expected is None:
+                expected = tokens
+            assert tokens == expected
+            states = cls.decisionsToDFA[0].states
+            sparse = sum(len(s.sparseEdges) for s in states if s.sparseEdges is not None)
+            print("%-10s %-12s %8d %10d %10.0f %11.0f" % (name, edges, len(states), sparse,
+                                                          len(text) / best, len(text) / median))
+
+
+if __name__ == "__main__":
+    main()